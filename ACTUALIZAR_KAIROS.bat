@@ -23,10 +23,19 @@ if not exist "backup" mkdir backup
 
 REM Hacer backup de la BD actual (si existe)
 echo Haciendo backup de datos existentes...
+REM Con journal WAL, las ventas confirmadas pueden estar todavia en
+REM kairos.db-wal: copiar solo kairos.db las perderia. La API de backup de
+REM SQLite copia una instantanea completa, aunque Kairos este abierto.
+set "BACKUP_DB=backup\kairos_backup_%date:~-4,4%%date:~-10,2%%date:~-7,2%.db"
 if exist "%APPDATA%\Kairos\datos\kairos.db" (
     echo Copiando base de datos...
-    copy "%APPDATA%\Kairos\datos\kairos.db" "backup\kairos_backup_%date:~-4,4%%date:~-10,2%%date:~-7,2%.db" >nul
-    echo ✅ Backup creado: backup\kairos_backup_%date:~-4,4%%date:~-10,2%%date:~-7,2%.db
+    python -c "import sqlite3, sys; origen = sqlite3.connect(sys.argv[1]); destino = sqlite3.connect(sys.argv[2]); origen.backup(destino); destino.close(); origen.close()" "%APPDATA%\Kairos\datos\kairos.db" "%BACKUP_DB%"
+    if errorlevel 1 (
+        echo ❌ No se pudo crear el backup. Se cancela la actualizacion.
+        pause
+        exit /b 1
+    )
+    echo ✅ Backup creado: %BACKUP_DB%
 ) else (
     echo ℹ️  No hay base de datos existente para respaldar
 )
@@ -11,6 +11,12 @@ from routes.inventario_routes import inventario_bp
 from routes.productos_routes import productos_bp
 from routes.registros_routes import registros_bp
 from routes.ventas_routes import ventas_bp
+from services.escritor_ventas import iniciar_escritor_ventas
+from services.perfil_sqlite import aplicar_perfil_sqlite
+from services.pool_conexiones import configurar_pool
+from services.purga_idempotencia import iniciar_purga_periodica
+from services.refresco_agregados import iniciar_refresco_periodico
+from services.replica_lectura import configurar_replica
 from utils import register_error_handlers, setup_logging
 
 
@@ -27,8 +33,13 @@ def create_app():
     # -------------------------
     # Configurar SQLAlchemy
     # -------------------------
+    configurar_pool(app)  # opciones del pool en Postgres, antes de crear el engine
+    configurar_replica(app)  # engine de lectura para los reportes, si hay URL
     db.init_app(app)
 
+    # WAL, caché y demás ajustes en cada conexión (solo SQLite)
+    aplicar_perfil_sqlite(app)
+
     # Forzar HTTPS en producción (simple redirect). Si se usa proxy/reverse-proxy, asegúrate de
     # configurar X-Forwarded-Proto y ProxyFix en producción.
     @app.before_request
@@ -90,6 +101,15 @@ def create_app():
     app.register_blueprint(inventario_bp)
     app.register_blueprint(admin_bp)
 
+    # Refresco periódico de las vistas materializadas (Postgres)
+    iniciar_refresco_periodico(app)
+
+    # Purga de claves de idempotencia vencidas, fuera de los requests
+    iniciar_purga_periodica(app)
+
+    # Escritor único de ventas (SQLite, opcional)
+    iniciar_escritor_ventas(app)
+
     return app
 
 
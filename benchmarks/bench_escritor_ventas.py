@@ -0,0 +1,112 @@
+"""
+Benchmark: ventas concurrentes en SQLite con y sin escritor único.
+
+Lanza H hilos (terminales) que registran ventas de una línea tan rápido como
+pueden sobre una base SQLite temporal, primero escribiendo cada venta desde
+su hilo y después a través de ``services.escritor_ventas`` (commit
+agrupado). Informa ventas por segundo, ventas por commit y cuántas fallaron
+(p. ej. "database is locked").
+
+Uso:
+    python benchmarks/bench_escritor_ventas.py            # 1, 4, 8 y 16 hilos
+    python benchmarks/bench_escritor_ventas.py 4 32       # hilos propios
+    VENTAS_POR_HILO=200 python benchmarks/bench_escritor_ventas.py
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from flask import Flask  # noqa: E402
+
+from models.venta import registrar_venta  # noqa: E402
+from models_alchemy import Producto, db  # noqa: E402
+from services.escritor_ventas import (  # noqa: E402
+    detener_escritor_ventas,
+    iniciar_escritor_ventas,
+)
+
+HILOS_POR_DEFECTO = [1, 4, 8, 16]
+VENTAS_POR_HILO = int(os.environ.get("VENTAS_POR_HILO", "100"))
+PRODUCTOS = 50
+
+
+def crear_app(ruta):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{ruta}"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        db.session.add_all(
+            Producto(
+                nombre=f"Producto {i}",
+                precio=100.0 + i,
+                stock=10**9,
+                codigo_barras=f"BE{i:04d}",
+            )
+            for i in range(PRODUCTOS)
+        )
+        db.session.commit()
+    return app
+
+
+def medir(app, hilos):
+    largada = threading.Barrier(hilos + 1)
+    errores = []
+
+    def terminal(n):
+        with app.app_context():
+            largada.wait()
+            for i in range(VENTAS_POR_HILO):
+                producto_id = (n * VENTAS_POR_HILO + i) % PRODUCTOS + 1
+                exito, mensaje = registrar_venta([{"id": producto_id, "cantidad": 1}])
+                if not exito:
+                    errores.append(mensaje)
+            db.session.remove()
+
+    trabajadores = [threading.Thread(target=terminal, args=(n,)) for n in range(hilos)]
+    for t in trabajadores:
+        t.start()
+    largada.wait()
+    inicio = time.perf_counter()
+    for t in trabajadores:
+        t.join()
+    return time.perf_counter() - inicio, errores
+
+
+def main(lista_hilos):
+    print(
+        f"{'hilos':>5} | {'modo':>15} | {'ventas/s':>9} | "
+        f"{'ventas/commit':>13} | {'fallidas':>8}"
+    )
+    print("-" * 62)
+    for hilos in lista_hilos:
+        for modo in ("por request", "escritor único"):
+            with tempfile.TemporaryDirectory() as directorio:
+                app = crear_app(os.path.join(directorio, "bench.db"))
+                escritor = None
+                if modo == "escritor único":
+                    escritor = iniciar_escritor_ventas(app, forzar=True)
+                duracion, errores = medir(app, hilos)
+                if escritor is not None:
+                    detener_escritor_ventas(app)
+                    por_commit = escritor.ventas / max(escritor.lotes, 1)
+                else:
+                    por_commit = 1.0
+                with app.app_context():
+                    db.engine.dispose()
+
+            exitosas = hilos * VENTAS_POR_HILO - len(errores)
+            print(
+                f"{hilos:>5} | {modo:>15} | {exitosas / duracion:>9.0f} | "
+                f"{por_commit:>13.1f} | {len(errores):>8}"
+            )
+
+
+if __name__ == "__main__":
+    argumentos = [int(a) for a in sys.argv[1:]]
+    main(argumentos or HILOS_POR_DEFECTO)
@@ -0,0 +1,175 @@
+"""
+Benchmark: latencia de ventas y del dashboard con el perfil SQLite y sin él.
+
+Para cada modo (valores por defecto de SQLite y perfil de
+``services.perfil_sqlite``) crea una base temporal con N ventas históricas
+y mide:
+
+* venta: ``registrar_venta`` de un carrito de 3 productos, una tras otra;
+* dashboard: estadísticas y top de productos (``_calcular_dashboard``, sin
+  cache) más la primera página del listado de registros;
+* dashboard con ventas: lo mismo mientras otro hilo registra ventas sin
+  pausa, como una caja vendiendo mientras alguien mira los registros.
+
+Uso:
+    python benchmarks/bench_perfil_sqlite.py           # 20k ventas
+    python benchmarks/bench_perfil_sqlite.py 100000    # ventas propias
+"""
+
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from flask import Flask  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from config import Config  # noqa: E402
+from models.agregados import refrescar_agregados  # noqa: E402
+from models.resumen import reconstruir_resumenes  # noqa: E402
+from models.venta import obtener_pagina_ventas, registrar_venta  # noqa: E402
+from models_alchemy import DetalleVenta, Producto, Venta, db  # noqa: E402
+from routes.registros_routes import _calcular_dashboard  # noqa: E402
+from services.perfil_sqlite import aplicar_perfil_sqlite  # noqa: E402
+
+VENTAS_POR_DEFECTO = 20_000
+PRODUCTOS = 200
+REPETICIONES_VENTA = 200
+REPETICIONES_DASHBOARD = 30
+
+
+def crear_app(ruta, optimizar):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{ruta}"
+    app.config.update(
+        {k: getattr(Config, k) for k in dir(Config) if k.startswith("SQLITE_")}
+    )
+    app.config["SQLITE_OPTIMIZAR"] = optimizar
+    db.init_app(app)
+    aplicar_perfil_sqlite(app)
+    return app
+
+
+def sembrar(cantidad_ventas, semilla=42):
+    rnd = random.Random(semilla)
+    db.create_all()
+    db.session.add_all(
+        Producto(
+            nombre=f"Producto {i:03d}",
+            precio=float(rnd.randint(1, 100) * 500),
+            stock=10**9,
+            categoria=f"cat{i % 10}",
+            codigo_barras=f"BP{i:05d}",
+        )
+        for i in range(PRODUCTOS)
+    )
+    inicio = datetime.now() - timedelta(days=730)
+    db.session.execute(
+        insert(Venta),
+        [
+            {
+                "id": i + 1,
+                "fecha": inicio
+                + timedelta(minutes=i * 730 * 24 * 60 // cantidad_ventas),
+                "total": 1000.0,
+            }
+            for i in range(cantidad_ventas)
+        ],
+    )
+    db.session.execute(
+        insert(DetalleVenta),
+        [
+            {
+                "venta_id": i + 1,
+                "producto_id": rnd.randint(1, PRODUCTOS),
+                "cantidad": 1,
+                "subtotal": 1000.0,
+            }
+            for i in range(cantidad_ventas)
+        ],
+    )
+    db.session.commit()
+    reconstruir_resumenes()
+    refrescar_agregados()
+
+
+def carrito(rnd):
+    return [{"id": rnd.randint(1, PRODUCTOS), "cantidad": 1} for _ in range(3)]
+
+
+def dashboard():
+    _calcular_dashboard()
+    obtener_pagina_ventas(page=1, per_page=10)
+
+
+def latencias(fn, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        fn()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+        db.session.remove()
+    tiempos.sort()
+    return statistics.median(tiempos), tiempos[int(len(tiempos) * 0.95) - 1]
+
+
+def medir_modo(cantidad_ventas, optimizar):
+    with tempfile.TemporaryDirectory() as directorio:
+        app = crear_app(os.path.join(directorio, "bench.db"), optimizar)
+        rnd = random.Random(7)
+        with app.app_context():
+            sembrar(cantidad_ventas)
+            resultados = {
+                "venta": latencias(
+                    lambda: registrar_venta(carrito(rnd)), REPETICIONES_VENTA
+                ),
+                "dashboard": latencias(dashboard, REPETICIONES_DASHBOARD),
+            }
+
+        # Dashboard mientras otro hilo vende
+        detener = threading.Event()
+
+        def vender():
+            rnd_hilo = random.Random(11)
+            with app.app_context():
+                while not detener.is_set():
+                    registrar_venta(carrito(rnd_hilo))
+                    db.session.remove()
+
+        caja = threading.Thread(target=vender)
+        caja.start()
+        try:
+            with app.app_context():
+                resultados["dashboard con ventas"] = latencias(
+                    dashboard, REPETICIONES_DASHBOARD
+                )
+        finally:
+            detener.set()
+            caja.join()
+        with app.app_context():
+            db.engine.dispose()
+    return resultados
+
+
+def main(cantidad_ventas):
+    print(f"{cantidad_ventas:,} ventas históricas, {PRODUCTOS} productos\n")
+    print(f"{'medición':>20} | {'modo':>8} | {'mediana (ms)':>12} | {'p95 (ms)':>9}")
+    print("-" * 60)
+    por_modo = {
+        "defecto": medir_modo(cantidad_ventas, optimizar=False),
+        "perfil": medir_modo(cantidad_ventas, optimizar=True),
+    }
+    for medicion in ("venta", "dashboard", "dashboard con ventas"):
+        for modo, resultados in por_modo.items():
+            mediana, p95 = resultados[medicion]
+            print(f"{medicion:>20} | {modo:>8} | {mediana:>12.2f} | {p95:>9.2f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else VENTAS_POR_DEFECTO)
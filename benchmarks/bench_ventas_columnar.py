@@ -0,0 +1,96 @@
+"""
+Benchmark: estadísticas del dashboard con el servicio puro vs. el motor columnar.
+
+Genera N ventas sintéticas (dicts como los de ``obtener_ventas``) y mide el
+tiempo de calcular estadísticas del día, generales, por mes y por semana con
+``services.ventas_service`` y con ``services.ventas_columnar.VentasColumnar``
+(incluyendo la carga a arreglos NumPy).
+
+Uso:
+    python benchmarks/bench_ventas_columnar.py              # 10k, 100k y 1M
+    python benchmarks/bench_ventas_columnar.py 10000 50000  # tamaños propios
+"""
+
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from services import ventas_service  # noqa: E402
+from services.ventas_columnar import VentasColumnar  # noqa: E402
+
+TAMANOS_POR_DEFECTO = [10_000, 100_000, 1_000_000]
+
+
+def generar_ventas(n, semilla=42):
+    rnd = random.Random(semilla)
+    hoy = date.today()
+    usuarios = [f"caja{i}" for i in range(8)] + ["admin", "-"]
+    return [
+        {
+            "id": i + 1,
+            "fecha": (
+                f"{(hoy - timedelta(days=rnd.randint(0, 1095))).isoformat()} "
+                f"{rnd.randint(8, 21):02d}:{rnd.randint(0, 59):02d}:00"
+            ),
+            "total": float(rnd.randint(1, 500) * 1000),
+            "usuario_id": None,
+            "username": rnd.choice(usuarios),
+        }
+        for i in range(n)
+    ]
+
+
+def medir(fn):
+    inicio = time.perf_counter()
+    fn()
+    return time.perf_counter() - inicio
+
+
+def con_servicio(ventas):
+    ventas_service.usuarios_unicos(ventas)
+    ventas_service.estadisticas_del_dia(ventas)
+    ventas_service.estadisticas_generales(ventas)
+    ventas_service.ventas_por_mes(ventas, meses_atras=6)
+    ventas_service.ventas_por_semana(ventas, semanas_atras=8)
+
+
+def con_motor(motor):
+    motor.usuarios_unicos()
+    motor.estadisticas_del_dia()
+    motor.estadisticas_generales()
+    motor.ventas_por_mes(meses_atras=6)
+    motor.ventas_por_semana(semanas_atras=8)
+
+
+def main(tamanos):
+    print(
+        f"{'ventas':>10} | {'servicio (s)':>12} | {'carga (s)':>10} | "
+        f"{'cálculo (s)':>11} | {'total (s)':>10} | {'speed-up':>9}"
+    )
+    print("-" * 78)
+    for n in tamanos:
+        ventas = generar_ventas(n)
+        t_servicio = medir(lambda: con_servicio(ventas))
+
+        motor = None
+
+        def cargar():
+            nonlocal motor
+            motor = VentasColumnar.desde_ventas(ventas)
+
+        t_carga = medir(cargar)
+        t_calculo = medir(lambda: con_motor(motor))
+        t_total = t_carga + t_calculo
+        print(
+            f"{n:>10,} | {t_servicio:>12.3f} | {t_carga:>10.3f} | "
+            f"{t_calculo:>11.4f} | {t_total:>10.3f} | {t_servicio / t_total:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    argumentos = [int(a) for a in sys.argv[1:]]
+    main(argumentos or TAMANOS_POR_DEFECTO)
@@ -56,6 +56,81 @@ class Config:
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = "Lax"
 
+    # Registros: hasta este total de ventas filtradas se usan enlaces
+    # numerados (OFFSET); por encima, paginación por cursor (fecha, id).
+    REGISTROS_UMBRAL_PAGINACION = int(
+        os.environ.get("REGISTROS_UMBRAL_PAGINACION", "1000")
+    )
+
+    # Cache del dashboard de registros, invalidada por generación de ventas
+    REGISTROS_CACHE_DASHBOARD = (
+        os.environ.get("REGISTROS_CACHE_DASHBOARD", "true").lower() == "true"
+    )
+
+    # Refresco de las vistas materializadas de ventas por mes/semana
+    # (solo Postgres; 0 lo desactiva)
+    AGREGADOS_REFRESCO_MINUTOS = int(os.environ.get("AGREGADOS_REFRESCO_MINUTOS", "15"))
+
+    # Exportaciones CSV en segundo plano (spool local; por defecto
+    # <KAIROS_DATA_DIR o cwd>/exportaciones)
+    EXPORTACIONES_DIR = os.environ.get("EXPORTACIONES_DIR")
+    EXPORTACIONES_MAX_WORKERS = int(os.environ.get("EXPORTACIONES_MAX_WORKERS", "2"))
+    EXPORTACIONES_EXPIRACION_MINUTOS = int(
+        os.environ.get("EXPORTACIONES_EXPIRACION_MINUTOS", "60")
+    )
+
+    # Las claves de idempotencia de la API de ventas se conservan al menos
+    # estas horas; después un reintento con la misma clave es una venta nueva
+    IDEMPOTENCIA_EXPIRACION_HORAS = int(
+        os.environ.get("IDEMPOTENCIA_EXPIRACION_HORAS", "24")
+    )
+    # Cada cuántos minutos se borran las claves vencidas (0 lo desactiva)
+    IDEMPOTENCIA_PURGA_MINUTOS = int(os.environ.get("IDEMPOTENCIA_PURGA_MINUTOS", "60"))
+
+    # Pool de conexiones por worker (solo Postgres, services.pool_conexiones)
+    DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "true").lower() == "true"
+
+    # Réplica de lectura para registros, inventario y exportaciones
+    # (services.replica_lectura). Si está caída o le faltan ventas de hace
+    # más de REPLICA_TOLERANCIA_SEGUNDOS, las lecturas van a la base principal.
+    DATABASE_REPLICA_URL = os.environ.get("DATABASE_REPLICA_URL") or None
+    REPLICA_TOLERANCIA_SEGUNDOS = float(
+        os.environ.get("REPLICA_TOLERANCIA_SEGUNDOS", "30")
+    )
+    REPLICA_VERIFICACION_SEGUNDOS = float(
+        os.environ.get("REPLICA_VERIFICACION_SEGUNDOS", "5")
+    )
+    REPLICA_TIMEOUT_CONEXION_SEGUNDOS = int(
+        os.environ.get("REPLICA_TIMEOUT_CONEXION_SEGUNDOS", "3")
+    )
+
+    # Perfil de SQLite aplicado a cada conexión (services.perfil_sqlite);
+    # SQLITE_OPTIMIZAR=false deja los valores por defecto de SQLite
+    SQLITE_OPTIMIZAR = os.environ.get("SQLITE_OPTIMIZAR", "true").lower() == "true"
+    SQLITE_JOURNAL_MODE = os.environ.get("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    SQLITE_CACHE_SIZE_KB = int(os.environ.get("SQLITE_CACHE_SIZE_KB", "65536"))
+    SQLITE_MMAP_SIZE_MB = int(os.environ.get("SQLITE_MMAP_SIZE_MB", "256"))
+    SQLITE_TEMP_STORE = os.environ.get("SQLITE_TEMP_STORE", "MEMORY")
+    SQLITE_WAL_CHECKPOINT_SEGUNDOS = int(
+        os.environ.get("SQLITE_WAL_CHECKPOINT_SEGUNDOS", "300")
+    )
+
+    # Escritor único de ventas con commit agrupado (solo SQLite): las ventas
+    # que llegan dentro de la ventana se confirman juntas
+    VENTAS_ESCRITOR_UNICO = (
+        os.environ.get("VENTAS_ESCRITOR_UNICO", "false").lower() == "true"
+    )
+    VENTAS_ESCRITOR_VENTANA_MS = float(
+        os.environ.get("VENTAS_ESCRITOR_VENTANA_MS", "5")
+    )
+    VENTAS_ESCRITOR_MAX_LOTE = int(os.environ.get("VENTAS_ESCRITOR_MAX_LOTE", "50"))
+
     # Logging
     LOG_LEVEL = "DEBUG"
 
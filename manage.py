@@ -6,6 +6,7 @@ Uso:
     flask db migrate -m "message"  # Generar migración
     flask db upgrade       # Aplicar migraciones
     flask seed            # Sembrar datos iniciales (admin)
+    flask rebuild-rollups # Recalcular tablas de resumen de ventas
 """
 
 import os
@@ -64,5 +65,50 @@ def seed():
         print(f"  Password: {pwd} (o usar ADMIN_PASSWORD)")
 
 
+@app.cli.command("rebuild-rollups")
+def rebuild_rollups():
+    """Recalcula las tablas de resumen de ventas desde el historial completo."""
+    from models.agregados import refrescar_agregados
+    from models.resumen import reconstruir_resumenes
+
+    with app.app_context():
+        for tabla, filas in reconstruir_resumenes().items():
+            print(f"{tabla} reconstruida: {filas} filas.")
+        for nombre, filas in refrescar_agregados().items():
+            print(f"{nombre} refrescada: {filas} filas.")
+
+
+@app.cli.command("rebuild-search-index")
+def rebuild_search_index():
+    """Crea (si falta) y recalcula el índice de búsqueda de ventas."""
+    from models.busqueda import reconstruir_indice_busqueda
+
+    with app.app_context():
+        print(
+            f"Índice de búsqueda reconstruido: {reconstruir_indice_busqueda()} ventas."
+        )
+
+
+@app.cli.command("refresh-aggregates")
+def refresh_aggregates():
+    """Refresca las ventas por mes y semana (vistas materializadas en Postgres)."""
+    from models.agregados import refrescar_agregados
+
+    with app.app_context():
+        for nombre, filas in refrescar_agregados().items():
+            print(f"{nombre} refrescada: {filas} filas.")
+
+
+@app.cli.command("purge-idempotency-keys")
+def purge_idempotency_keys():
+    """Elimina las claves de idempotencia de la API de ventas ya vencidas."""
+    from models.venta import purgar_claves_idempotencia
+
+    with app.app_context():
+        horas = app.config.get("IDEMPOTENCIA_EXPIRACION_HORAS", 24)
+        eliminadas = purgar_claves_idempotencia(horas)
+        print(f"Claves de idempotencia eliminadas (más de {horas} h): {eliminadas}.")
+
+
 if __name__ == "__main__":
     app.run(debug=True)
@@ -0,0 +1,43 @@
+"""Resumen diario de ventas
+
+Revision ID: 3b8f2c6d1a47
+Revises: e64b5d2341a5
+Create Date: 2026-10-18 10:12:40.512873
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "3b8f2c6d1a47"
+down_revision = "e64b5d2341a5"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "ventas_diarias",
+        sa.Column("dia", sa.String(length=10), nullable=False),
+        sa.Column("usuario_id", sa.Integer(), nullable=False),
+        sa.Column("cantidad", sa.Integer(), nullable=False),
+        sa.Column("total", sa.Float(), nullable=False),
+        sa.Column("minimo", sa.Float(), nullable=False),
+        sa.Column("maximo", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("dia", "usuario_id"),
+    )
+
+    # Poblar el resumen con el historial existente
+    op.execute(
+        """
+        INSERT INTO ventas_diarias (dia, usuario_id, cantidad, total, minimo, maximo)
+        SELECT substr(fecha, 1, 10), coalesce(usuario_id, 0),
+               count(id), sum(total), min(total), max(total)
+        FROM ventas
+        GROUP BY substr(fecha, 1, 10), coalesce(usuario_id, 0)
+        """
+    )
+
+
+def downgrade():
+    op.drop_table("ventas_diarias")
@@ -0,0 +1,38 @@
+"""índice de claves de idempotencia por fecha de creación
+
+Revision ID: 4b7f0e2c9a61
+Revises: 7d2e9b4f6c15
+Create Date: 2026-10-19 11:03:27.554120
+
+Para purgar las claves vencidas sin recorrer la tabla. En Postgres se crea
+con ``CREATE INDEX CONCURRENTLY`` fuera de la transacción de la migración.
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "4b7f0e2c9a61"
+down_revision = "7d2e9b4f6c15"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_claves_idempotencia_creada",
+            "claves_idempotencia",
+            ["creada"],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_claves_idempotencia_creada",
+            table_name="claves_idempotencia",
+            postgresql_concurrently=True,
+        )
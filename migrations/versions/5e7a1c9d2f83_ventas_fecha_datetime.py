@@ -0,0 +1,125 @@
+"""Fecha de venta como DateTime nativo con índice
+
+Revision ID: 5e7a1c9d2f83
+Revises: 9c41d7e2b5f0
+Create Date: 2026-10-18 15:42:08.517204
+
+La conversión se hace sin reescribir ``ventas`` bajo un bloqueo exclusivo:
+
+* Postgres: se agrega ``fecha_dt`` con un trigger que la completa en las
+  ventas nuevas, se completan las existentes por lotes de IDs con un commit
+  por lote (las ventas que se registran mientras tanto no esperan), se
+  valida un ``CHECK (fecha_dt IS NOT NULL)`` y se crea el índice con
+  ``CREATE INDEX CONCURRENTLY``. Al final, en una transacción corta que no
+  recorre la tabla, se marca NOT NULL y se intercambian las columnas.
+* SQLite: el texto existente se normaliza por lotes al formato de
+  ``DateTime`` de SQLAlchemy ("%Y-%m-%d %H:%M:%S.%f") y se crea el índice.
+  El tipo declarado no se cambia: SQLite no lo aplica y reconstruir la tabla
+  con ``batch_alter_table`` haría ``CAST(fecha AS DATETIME)``, que convierte
+  el texto en un número.
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5e7a1c9d2f83"
+down_revision = "9c41d7e2b5f0"
+branch_labels = None
+depends_on = None
+
+TAMANO_LOTE = 5000
+
+
+def _actualizar_por_lotes(sentencia):
+    """Ejecuta ``sentencia`` (con :desde/:hasta sobre ventas.id) lote por lote."""
+    conexion = op.get_bind()
+    minimo, maximo = conexion.execute(
+        sa.text("SELECT min(id), max(id) FROM ventas")
+    ).one()
+    if minimo is None:
+        return
+    with op.get_context().autocommit_block():
+        for desde in range(minimo, maximo + 1, TAMANO_LOTE):
+            conexion.execute(
+                sa.text(sentencia), {"desde": desde, "hasta": desde + TAMANO_LOTE}
+            )
+
+
+def upgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        op.add_column("ventas", sa.Column("fecha_dt", sa.DateTime(), nullable=True))
+        with op.get_context().autocommit_block():
+            # Las ventas que se registren desde ahora completan fecha_dt solas,
+            # así que ninguna queda en NULL entre el backfill y el intercambio
+            op.execute(
+                """
+                CREATE OR REPLACE FUNCTION ventas_completar_fecha_dt()
+                RETURNS trigger AS $$
+                BEGIN
+                    NEW.fecha_dt := to_timestamp(NEW.fecha, 'YYYY-MM-DD HH24:MI:SS');
+                    RETURN NEW;
+                END;
+                $$ LANGUAGE plpgsql
+                """
+            )
+            op.execute(
+                "CREATE TRIGGER ventas_completar_fecha_dt "
+                "BEFORE INSERT OR UPDATE OF fecha ON ventas "
+                "FOR EACH ROW EXECUTE FUNCTION ventas_completar_fecha_dt()"
+            )
+        _actualizar_por_lotes(
+            """
+            UPDATE ventas
+            SET fecha_dt = to_timestamp(fecha, 'YYYY-MM-DD HH24:MI:SS')
+            WHERE id >= :desde AND id < :hasta AND fecha_dt IS NULL
+            """
+        )
+        with op.get_context().autocommit_block():
+            # NOT VALID no recorre la tabla; VALIDATE sí, pero con un lock
+            # que no bloquea las ventas. Con el CHECK validado, SET NOT NULL
+            # (Postgres 12+) no vuelve a recorrer la tabla.
+            op.execute(
+                "ALTER TABLE ventas ADD CONSTRAINT ck_ventas_fecha_dt_not_null "
+                "CHECK (fecha_dt IS NOT NULL) NOT VALID"
+            )
+            op.execute(
+                "ALTER TABLE ventas VALIDATE CONSTRAINT ck_ventas_fecha_dt_not_null"
+            )
+            op.execute(
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_ventas_fecha_dt "
+                "ON ventas (fecha_dt)"
+            )
+
+        # Transacción corta, solo cambios de catálogo: no recorre ``ventas``
+        op.alter_column("ventas", "fecha_dt", nullable=False)
+        op.execute("ALTER TABLE ventas DROP CONSTRAINT ck_ventas_fecha_dt_not_null")
+        op.execute("DROP TRIGGER ventas_completar_fecha_dt ON ventas")
+        op.execute("DROP FUNCTION ventas_completar_fecha_dt()")
+        op.drop_column("ventas", "fecha")
+        op.alter_column("ventas", "fecha_dt", new_column_name="fecha")
+        op.execute("ALTER INDEX ix_ventas_fecha_dt RENAME TO ix_ventas_fecha")
+    else:
+        _actualizar_por_lotes(
+            """
+            UPDATE ventas
+            SET fecha = fecha || '.000000'
+            WHERE id >= :desde AND id < :hasta AND length(fecha) = 19
+            """
+        )
+        op.create_index("ix_ventas_fecha", "ventas", ["fecha"], unique=False)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        op.drop_index("ix_ventas_fecha", table_name="ventas")
+        op.add_column("ventas", sa.Column("fecha_txt", sa.String(), nullable=True))
+        op.execute(
+            "UPDATE ventas SET fecha_txt = to_char(fecha, 'YYYY-MM-DD HH24:MI:SS')"
+        )
+        op.alter_column("ventas", "fecha_txt", nullable=False)
+        op.drop_column("ventas", "fecha")
+        op.alter_column("ventas", "fecha_txt", new_column_name="fecha")
+    else:
+        op.drop_index("ix_ventas_fecha", table_name="ventas")
+        op.execute("UPDATE ventas SET fecha = substr(fecha, 1, 19)")
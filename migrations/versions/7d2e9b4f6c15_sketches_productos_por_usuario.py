@@ -0,0 +1,82 @@
+"""resúmenes Space-Saving de productos por usuario
+
+Revision ID: 7d2e9b4f6c15
+Revises: a9e2d4c7b318
+Create Date: 2026-10-19 10:12:36.218904
+
+La fila del mes era una sola para todas las cajas y cada venta la bloqueaba
+hasta el commit. Los resúmenes son derivados: la tabla se vuelve a crear
+con ``usuario_id`` en la clave primaria y se puebla desde
+``ventas_productos_diarias``, que no distingue usuarios (``usuario_id`` 0).
+
+"""
+import json
+from collections import defaultdict
+
+import sqlalchemy as sa
+from alembic import op
+
+from services.space_saving import SpaceSaving
+
+# revision identifiers, used by Alembic.
+revision = "7d2e9b4f6c15"
+down_revision = "a9e2d4c7b318"
+branch_labels = None
+depends_on = None
+
+CAPACIDAD = 100
+
+
+def _sketches_desde_resumen_diario():
+    sketches = defaultdict(lambda: SpaceSaving(CAPACIDAD))
+    filas = op.get_bind().execute(
+        sa.text(
+            "SELECT dia, producto_id, unidades FROM ventas_productos_diarias "
+            "ORDER BY dia, producto_id"
+        )
+    )
+    for dia, producto_id, unidades in filas:
+        sketches[dia].agregar(producto_id, unidades)
+        sketches[dia[:7]].agregar(producto_id, unidades)
+    return sketches
+
+
+def upgrade():
+    op.drop_table("sketches_productos")
+    sketches_productos = op.create_table(
+        "sketches_productos",
+        sa.Column("periodo", sa.String(length=10), nullable=False),
+        sa.Column("usuario_id", sa.Integer(), nullable=False),
+        sa.Column("datos", sa.Text(), nullable=False),
+        sa.PrimaryKeyConstraint("periodo", "usuario_id"),
+    )
+
+    sketches = _sketches_desde_resumen_diario()
+    if sketches:
+        op.bulk_insert(
+            sketches_productos,
+            [
+                {"periodo": p, "usuario_id": 0, "datos": json.dumps(s.a_dict())}
+                for p, s in sketches.items()
+            ],
+        )
+
+
+def downgrade():
+    op.drop_table("sketches_productos")
+    sketches_productos = op.create_table(
+        "sketches_productos",
+        sa.Column("periodo", sa.String(length=10), nullable=False),
+        sa.Column("datos", sa.Text(), nullable=False),
+        sa.PrimaryKeyConstraint("periodo"),
+    )
+
+    sketches = _sketches_desde_resumen_diario()
+    if sketches:
+        op.bulk_insert(
+            sketches_productos,
+            [
+                {"periodo": p, "datos": json.dumps(s.a_dict())}
+                for p, s in sketches.items()
+            ],
+        )
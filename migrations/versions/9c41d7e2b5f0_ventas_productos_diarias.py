@@ -0,0 +1,42 @@
+"""Resumen diario de ventas por producto
+
+Revision ID: 9c41d7e2b5f0
+Revises: 3b8f2c6d1a47
+Create Date: 2026-10-18 11:03:12.204518
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "9c41d7e2b5f0"
+down_revision = "3b8f2c6d1a47"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "ventas_productos_diarias",
+        sa.Column("dia", sa.String(length=10), nullable=False),
+        sa.Column("producto_id", sa.Integer(), nullable=False),
+        sa.Column("unidades", sa.Integer(), nullable=False),
+        sa.Column("ingresos", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("dia", "producto_id"),
+    )
+
+    # Poblar el resumen con el historial existente
+    op.execute(
+        """
+        INSERT INTO ventas_productos_diarias (dia, producto_id, unidades, ingresos)
+        SELECT substr(v.fecha, 1, 10), d.producto_id,
+               sum(d.cantidad), sum(d.subtotal)
+        FROM detalle_ventas d
+        JOIN ventas v ON v.id = d.venta_id
+        GROUP BY substr(v.fecha, 1, 10), d.producto_id
+        """
+    )
+
+
+def downgrade():
+    op.drop_table("ventas_productos_diarias")
@@ -0,0 +1,60 @@
+"""Índices de ventas, detalle_ventas y productos
+
+Revision ID: a8d3f6b2e914
+Revises: 5e7a1c9d2f83
+Create Date: 2026-10-18 17:20:44.901376
+
+En Postgres los índices se crean con ``CREATE INDEX CONCURRENTLY`` fuera de
+la transacción de la migración, para no bloquear las escrituras.
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "a8d3f6b2e914"
+down_revision = "5e7a1c9d2f83"
+branch_labels = None
+depends_on = None
+
+INDICES = [
+    ("ix_ventas_fecha_id", "ventas", ["fecha", "id"]),
+    ("ix_ventas_usuario_id_fecha", "ventas", ["usuario_id", "fecha"]),
+    ("ix_detalle_ventas_venta_id", "detalle_ventas", ["venta_id"]),
+    (
+        "ix_detalle_ventas_producto_id_venta_id",
+        "detalle_ventas",
+        ["producto_id", "venta_id"],
+    ),
+    ("ix_productos_nombre", "productos", ["nombre"]),
+    ("ix_productos_categoria", "productos", ["categoria"]),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for nombre, tabla, columnas in INDICES:
+            op.create_index(
+                nombre,
+                tabla,
+                columnas,
+                unique=False,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+        # (fecha, id) reemplaza al índice simple sobre fecha
+        op.drop_index(
+            "ix_ventas_fecha", table_name="ventas", postgresql_concurrently=True
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_ventas_fecha",
+            "ventas",
+            ["fecha"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        for nombre, tabla, _ in reversed(INDICES):
+            op.drop_index(nombre, table_name=tabla, postgresql_concurrently=True)
@@ -0,0 +1,33 @@
+"""claves de idempotencia de la API de ventas
+
+Revision ID: a9e2d4c7b318
+Revises: e8c14a5f2d93
+Create Date: 2026-10-18 22:05:13.480211
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "a9e2d4c7b318"
+down_revision = "e8c14a5f2d93"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "claves_idempotencia",
+        sa.Column("usuario_id", sa.Integer(), nullable=False),
+        sa.Column("clave", sa.String(length=100), nullable=False),
+        sa.Column("huella", sa.String(length=64), nullable=False),
+        sa.Column("venta_id", sa.Integer(), nullable=False),
+        sa.Column("respuesta", sa.Text(), nullable=False),
+        sa.Column("creada", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["venta_id"], ["ventas.id"]),
+        sa.PrimaryKeyConstraint("usuario_id", "clave"),
+    )
+
+
+def downgrade():
+    op.drop_table("claves_idempotencia")
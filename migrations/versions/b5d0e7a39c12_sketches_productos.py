@@ -0,0 +1,57 @@
+"""Resúmenes Space-Saving de productos más vendidos por día y mes
+
+Revision ID: b5d0e7a39c12
+Revises: f3a6c8e1b702
+Create Date: 2026-10-18 20:41:09.775316
+
+Se pueblan desde ``ventas_productos_diarias`` con la misma capacidad que
+usa ``models.top_productos``.
+
+"""
+import json
+from collections import defaultdict
+
+import sqlalchemy as sa
+from alembic import op
+
+from services.space_saving import SpaceSaving
+
+# revision identifiers, used by Alembic.
+revision = "b5d0e7a39c12"
+down_revision = "f3a6c8e1b702"
+branch_labels = None
+depends_on = None
+
+CAPACIDAD = 100
+
+
+def upgrade():
+    sketches_productos = op.create_table(
+        "sketches_productos",
+        sa.Column("periodo", sa.String(length=10), nullable=False),
+        sa.Column("datos", sa.Text(), nullable=False),
+        sa.PrimaryKeyConstraint("periodo"),
+    )
+
+    sketches = defaultdict(lambda: SpaceSaving(CAPACIDAD))
+    filas = op.get_bind().execute(
+        sa.text(
+            "SELECT dia, producto_id, unidades FROM ventas_productos_diarias "
+            "ORDER BY dia, producto_id"
+        )
+    )
+    for dia, producto_id, unidades in filas:
+        sketches[dia].agregar(producto_id, unidades)
+        sketches[dia[:7]].agregar(producto_id, unidades)
+    if sketches:
+        op.bulk_insert(
+            sketches_productos,
+            [
+                {"periodo": periodo, "datos": json.dumps(sketch.a_dict())}
+                for periodo, sketch in sketches.items()
+            ],
+        )
+
+
+def downgrade():
+    op.drop_table("sketches_productos")
@@ -0,0 +1,28 @@
+"""Contadores de generación para invalidar caches
+
+Revision ID: c2f94e07b6d1
+Revises: a8d3f6b2e914
+Create Date: 2026-10-18 18:05:31.662940
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c2f94e07b6d1"
+down_revision = "a8d3f6b2e914"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "generaciones",
+        sa.Column("clave", sa.String(length=50), nullable=False),
+        sa.Column("valor", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("clave"),
+    )
+
+
+def downgrade():
+    op.drop_table("generaciones")
@@ -0,0 +1,96 @@
+"""Ventas por mes y por semana (vistas materializadas en Postgres)
+
+Revision ID: d7b3e1f05a28
+Revises: c2f94e07b6d1
+Create Date: 2026-10-18 19:12:57.339018
+
+Las tablas ``ventas_mensuales`` y ``ventas_semanales`` se crean en todos los
+motores; en SQLite se pueblan y se mantienen con cada venta. En Postgres los
+datos se leen de ``ventas_mensuales_mv`` y ``ventas_semanales_mv``, con un
+índice único cada una para poder usar ``REFRESH ... CONCURRENTLY``.
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "d7b3e1f05a28"
+down_revision = "c2f94e07b6d1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "ventas_mensuales",
+        sa.Column("mes", sa.String(length=7), nullable=False),
+        sa.Column("cantidad", sa.Integer(), nullable=False),
+        sa.Column("total", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("mes"),
+    )
+    op.create_table(
+        "ventas_semanales",
+        sa.Column("semana_inicio", sa.String(length=10), nullable=False),
+        sa.Column("anio", sa.Integer(), nullable=False),
+        sa.Column("cantidad", sa.Integer(), nullable=False),
+        sa.Column("total", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("semana_inicio", "anio"),
+    )
+
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(
+            """
+            CREATE MATERIALIZED VIEW ventas_mensuales_mv AS
+            SELECT to_char(date_trunc('month', fecha), 'YYYY-MM') AS mes,
+                   count(*)::integer AS cantidad,
+                   sum(total) AS total
+            FROM ventas
+            GROUP BY 1
+            """
+        )
+        op.execute(
+            "CREATE UNIQUE INDEX ix_ventas_mensuales_mv_mes "
+            "ON ventas_mensuales_mv (mes)"
+        )
+        op.execute(
+            """
+            CREATE MATERIALIZED VIEW ventas_semanales_mv AS
+            SELECT to_char(date_trunc('week', fecha), 'YYYY-MM-DD') AS semana_inicio,
+                   extract(year FROM fecha)::integer AS anio,
+                   count(*)::integer AS cantidad,
+                   sum(total) AS total
+            FROM ventas
+            GROUP BY 1, 2
+            """
+        )
+        op.execute(
+            "CREATE UNIQUE INDEX ix_ventas_semanales_mv_semana "
+            "ON ventas_semanales_mv (semana_inicio, anio)"
+        )
+    else:
+        op.execute(
+            """
+            INSERT INTO ventas_mensuales (mes, cantidad, total)
+            SELECT strftime('%Y-%m', fecha), count(*), sum(total)
+            FROM ventas
+            GROUP BY 1
+            """
+        )
+        op.execute(
+            """
+            INSERT INTO ventas_semanales (semana_inicio, anio, cantidad, total)
+            SELECT date(fecha, '-6 days', 'weekday 1'),
+                   CAST(strftime('%Y', fecha) AS INTEGER),
+                   count(*), sum(total)
+            FROM ventas
+            GROUP BY 1, 2
+            """
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP MATERIALIZED VIEW IF EXISTS ventas_semanales_mv")
+        op.execute("DROP MATERIALIZED VIEW IF EXISTS ventas_mensuales_mv")
+    op.drop_table("ventas_semanales")
+    op.drop_table("ventas_mensuales")
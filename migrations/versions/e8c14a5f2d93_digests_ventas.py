@@ -0,0 +1,61 @@
+"""t-digests del total por venta, por día/mes y usuario
+
+Revision ID: e8c14a5f2d93
+Revises: b5d0e7a39c12
+Create Date: 2026-10-18 21:17:52.041388
+
+Se pueblan desde ``ventas`` con la misma compresión que usa
+``models.percentiles``.
+
+"""
+import json
+from collections import defaultdict
+
+import sqlalchemy as sa
+from alembic import op
+
+from services.tdigest import TDigest
+
+# revision identifiers, used by Alembic.
+revision = "e8c14a5f2d93"
+down_revision = "b5d0e7a39c12"
+branch_labels = None
+depends_on = None
+
+COMPRESION = 100
+
+
+def upgrade():
+    digests_ventas = op.create_table(
+        "digests_ventas",
+        sa.Column("periodo", sa.String(length=10), nullable=False),
+        sa.Column("usuario_id", sa.Integer(), nullable=False),
+        sa.Column("datos", sa.Text(), nullable=False),
+        sa.PrimaryKeyConstraint("periodo", "usuario_id"),
+    )
+
+    ventas = sa.table(
+        "ventas",
+        sa.column("fecha", sa.DateTime()),
+        sa.column("usuario_id", sa.Integer()),
+        sa.column("total", sa.Float()),
+    )
+    digests = defaultdict(lambda: TDigest(COMPRESION))
+    filas = op.get_bind().execute(
+        sa.select(ventas.c.fecha, ventas.c.usuario_id, ventas.c.total)
+    )
+    for fecha, usuario_id, total in filas:
+        for periodo in (fecha.strftime("%Y-%m-%d"), fecha.strftime("%Y-%m")):
+            digests[(periodo, usuario_id or 0)].agregar(total)
+    if digests:
+        op.bulk_insert(
+            digests_ventas,
+            [
+                {"periodo": p, "usuario_id": u, "datos": json.dumps(d.a_dict())}
+                for (p, u), d in digests.items()
+            ],
+        )
+
+
+def downgrade():
+    op.drop_table("digests_ventas")
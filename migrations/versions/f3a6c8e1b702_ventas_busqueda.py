@@ -0,0 +1,69 @@
+"""Índice de búsqueda de texto completo sobre ventas
+
+Revision ID: f3a6c8e1b702
+Revises: d7b3e1f05a28
+Create Date: 2026-10-18 20:03:44.518207
+
+SQLite: tabla virtual FTS5 ``ventas_busqueda`` (``rowid`` = ID de venta).
+Postgres: tabla ``ventas_busqueda`` con un ``tsvector`` e índice GIN.
+En ambos casos se indexan el ID, el usuario y los nombres de producto.
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "f3a6c8e1b702"
+down_revision = "d7b3e1f05a28"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(
+            """
+            CREATE TABLE ventas_busqueda (
+                venta_id INTEGER PRIMARY KEY REFERENCES ventas (id) ON DELETE CASCADE,
+                documento TSVECTOR NOT NULL
+            )
+            """
+        )
+        op.execute(
+            """
+            INSERT INTO ventas_busqueda (venta_id, documento)
+            SELECT v.id,
+                   to_tsvector('simple', v.id::text || ' ' || coalesce(u.username, '')
+                       || ' ' || coalesce(string_agg(p.nombre, ' ' ORDER BY d.id), ''))
+            FROM ventas v
+            LEFT JOIN usuarios u ON u.id = v.usuario_id
+            LEFT JOIN detalle_ventas d ON d.venta_id = v.id
+            LEFT JOIN productos p ON p.id = d.producto_id
+            GROUP BY v.id, u.username
+            """
+        )
+        op.execute(
+            "CREATE INDEX ix_ventas_busqueda_documento "
+            "ON ventas_busqueda USING gin (documento)"
+        )
+    else:
+        op.execute(
+            "CREATE VIRTUAL TABLE ventas_busqueda USING fts5("
+            "texto, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        op.execute(
+            """
+            INSERT INTO ventas_busqueda (rowid, texto)
+            SELECT v.id,
+                   CAST(v.id AS TEXT) || ' ' || coalesce(u.username, '')
+                       || ' ' || coalesce(group_concat(p.nombre, ' '), '')
+            FROM ventas v
+            LEFT JOIN usuarios u ON u.id = v.usuario_id
+            LEFT JOIN detalle_ventas d ON d.venta_id = v.id
+            LEFT JOIN productos p ON p.id = d.producto_id
+            GROUP BY v.id, u.username
+            """
+        )
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS ventas_busqueda")
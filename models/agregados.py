@@ -0,0 +1,158 @@
+"""Ventas por mes y por semana para los gráficos del dashboard.
+
+En Postgres se leen de las vistas materializadas ``ventas_mensuales_mv`` y
+``ventas_semanales_mv``, que se refrescan con ``REFRESH MATERIALIZED VIEW
+CONCURRENTLY`` de forma periódica (``services.refresco_agregados``) o a
+pedido (``flask refresh-aggregates``, p. ej. después de una importación
+masiva). En SQLite se usan las tablas ``ventas_mensuales`` y
+``ventas_semanales``, que ``registrar_venta`` actualiza en la misma
+transacción.
+
+En ambos casos una consulta lee una fila por mes o por semana, no una por
+venta. ``models.series`` las lee con ``fuente_mensual`` y ``fuente_semanal``.
+"""
+
+from datetime import timedelta
+
+from models.resumen import (
+    _reemplazar_resumen,
+    _upsert,
+    incrementar_generacion,
+    periodo_de_fecha,
+)
+from models_alchemy import Venta, VentaMensual, VentaSemanal, db
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Se incrementa en cada refresco, para invalidar el cache del dashboard
+GENERACION_AGREGADOS = "agregados"
+
+VISTA_MENSUAL = "ventas_mensuales_mv"
+VISTA_SEMANAL = "ventas_semanales_mv"
+
+# Clave del advisory lock de Postgres que serializa los refrescos entre workers
+_BLOQUEO_REFRESCO = 4_712_031
+
+
+def _es_postgres():
+    return db.session.get_bind().dialect.name == "postgresql"
+
+
+def fuente_mensual():
+    """Vista o tabla mensual: ``mes`` ("%Y-%m"), ``cantidad``, ``total``."""
+    from sqlalchemy import column, table
+
+    if _es_postgres():
+        return table(VISTA_MENSUAL, column("mes"), column("cantidad"), column("total"))
+    return VentaMensual.__table__
+
+
+def fuente_semanal():
+    """Vista o tabla semanal: ``semana_inicio``, ``anio``, ``cantidad``, ``total``."""
+    from sqlalchemy import column, table
+
+    if _es_postgres():
+        return table(
+            VISTA_SEMANAL,
+            column("semana_inicio"),
+            column("anio"),
+            column("cantidad"),
+            column("total"),
+        )
+    return VentaSemanal.__table__
+
+
+def acumular_venta_periodos(fecha, total):
+    """Suma una venta a las tablas mensual y semanal de SQLite. No hace commit.
+
+    En Postgres no hace nada: las vistas materializadas se refrescan aparte.
+    """
+    if _es_postgres():
+        return
+
+    dia = fecha.date()
+    _upsert(
+        VentaMensual,
+        {"mes": dia.strftime("%Y-%m"), "cantidad": 1, "total": total},
+        claves=("mes",),
+        sumas=("cantidad", "total"),
+    )
+    _upsert(
+        VentaSemanal,
+        {
+            "semana_inicio": (dia - timedelta(days=dia.weekday())).isoformat(),
+            "anio": dia.year,
+            "cantidad": 1,
+            "total": total,
+        },
+        claves=("semana_inicio", "anio"),
+        sumas=("cantidad", "total"),
+    )
+
+
+def refrescar_agregados(solo_si_libre=False):
+    """Recalcula los agregados mensuales y semanales desde ``ventas``.
+
+    Postgres: ``REFRESH MATERIALIZED VIEW CONCURRENTLY`` de ambas vistas (las
+    lecturas no se bloquean mientras tanto). Un advisory lock evita que dos
+    workers refresquen a la vez.
+    SQLite: reemplaza el contenido de las tablas de resumen.
+
+    Args:
+        solo_si_libre: si otro proceso ya está refrescando, no esperar y
+            devolver None (lo usa el refresco periódico)
+
+    Returns:
+        dict: {nombre: filas} o None si se omitió el refresco
+    """
+    from sqlalchemy import Integer, cast, func, select, text
+
+    try:
+        if _es_postgres():
+            bloqueo = (
+                "pg_try_advisory_xact_lock"
+                if solo_si_libre
+                else "pg_advisory_xact_lock"
+            )
+            obtenido = db.session.execute(
+                text(f"SELECT {bloqueo}(:clave)"), {"clave": _BLOQUEO_REFRESCO}
+            ).scalar()
+            if obtenido is False:
+                db.session.rollback()
+                return None
+
+            filas = {}
+            for vista in (VISTA_MENSUAL, VISTA_SEMANAL):
+                db.session.execute(
+                    text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {vista}")
+                )
+                filas[vista] = db.session.execute(
+                    text(f"SELECT count(*) FROM {vista}")
+                ).scalar()
+        else:
+            mes = periodo_de_fecha(Venta.fecha, "month")
+            semana = func.date(Venta.fecha, "-6 days", "weekday 1")  # lunes
+            anio = cast(func.strftime("%Y", Venta.fecha), Integer)
+            cantidad, total = func.count(Venta.id), func.sum(Venta.total)
+            filas = {
+                "ventas_mensuales": _reemplazar_resumen(
+                    VentaMensual,
+                    ["mes", "cantidad", "total"],
+                    select(mes, cantidad, total).group_by(mes),
+                ),
+                "ventas_semanales": _reemplazar_resumen(
+                    VentaSemanal,
+                    ["semana_inicio", "anio", "cantidad", "total"],
+                    select(semana, anio, cantidad, total).group_by(semana, anio),
+                ),
+            }
+
+        incrementar_generacion(GENERACION_AGREGADOS)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    logger.info(f"Agregados de ventas refrescados: {filas}")
+    return filas
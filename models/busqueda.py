@@ -0,0 +1,264 @@
+"""Índice de búsqueda de texto completo sobre ventas.
+
+Cada venta se indexa con su ID, el usuario que la registró y los nombres de
+sus productos, en la tabla ``ventas_busqueda``:
+
+* SQLite: tabla virtual FTS5 (``rowid`` = ID de venta) con el tokenizador
+  ``unicode61`` sin diacríticos, de modo que "cafe" encuentra "Café".
+* Postgres: tabla con una columna ``tsvector`` (configuración ``simple``) y
+  un índice GIN.
+
+Las palabras de la búsqueda se combinan con AND y cada una se busca como
+prefijo ("caf" encuentra "Café"). ``registrar_venta`` indexa cada venta en
+la misma transacción; ``reconstruir_indice_busqueda`` recalcula todo.
+
+Si el índice no existe (p. ej. una base creada solo con ``create_all``), la
+búsqueda del listado usa las comparaciones LIKE de
+``models.venta.condiciones_filtro_ventas``.
+"""
+
+import re
+
+from models_alchemy import db
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+TABLA_BUSQUEDA = "ventas_busqueda"
+
+# Disponibilidad del índice por URL de base de datos (se consulta una vez)
+_disponible = {}
+
+
+def _dialecto():
+    return db.session.get_bind().dialect.name
+
+
+def _terminos(consulta):
+    """Palabras de la consulta en minúsculas; solo caracteres de palabra."""
+    return re.findall(r"\w+", (consulta or "").lower())
+
+
+def indice_busqueda_disponible():
+    """Indica si la base de datos actual tiene el índice de búsqueda."""
+    from sqlalchemy import inspect
+
+    bind = db.session.get_bind()
+    clave = str(bind.url)
+    if clave not in _disponible:
+        _disponible[clave] = _dialecto() in ("sqlite", "postgresql") and inspect(
+            bind
+        ).has_table(TABLA_BUSQUEDA)
+    return _disponible[clave]
+
+
+def crear_indice_busqueda():
+    """Crea el índice de búsqueda si no existe. Hace commit.
+
+    Returns:
+        bool: True si el índice quedó disponible
+    """
+    from sqlalchemy import text
+
+    sentencias = {
+        "sqlite": [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLA_BUSQUEDA} USING fts5("
+            "texto, tokenize = 'unicode61 remove_diacritics 2')"
+        ],
+        "postgresql": [
+            f"CREATE TABLE IF NOT EXISTS {TABLA_BUSQUEDA} ("
+            "venta_id INTEGER PRIMARY KEY REFERENCES ventas (id) ON DELETE CASCADE, "
+            "documento TSVECTOR NOT NULL)",
+            f"CREATE INDEX IF NOT EXISTS ix_{TABLA_BUSQUEDA}_documento "
+            f"ON {TABLA_BUSQUEDA} USING gin (documento)",
+        ],
+    }.get(_dialecto())
+    if sentencias is None:
+        return False
+
+    try:
+        for sentencia in sentencias:
+            db.session.execute(text(sentencia))
+        db.session.commit()
+    except Exception as e:
+        # SQLite compilado sin FTS5: se sigue con la búsqueda LIKE
+        db.session.rollback()
+        logger.warning(f"No se pudo crear el índice de búsqueda: {e}")
+        return False
+    finally:
+        _disponible.pop(str(db.session.get_bind().url), None)
+    return indice_busqueda_disponible()
+
+
+def texto_busqueda(venta_id, username, nombres_productos):
+    """Texto indexado de una venta: ID, usuario y nombres de producto."""
+    return " ".join([str(venta_id), username or "", *nombres_productos]).strip()
+
+
+def indexar_venta(venta_id, username, nombres_productos):
+    """Agrega una venta al índice de búsqueda. No hace commit.
+
+    No hace nada si el índice no está disponible.
+    """
+    from sqlalchemy import text
+
+    if not indice_busqueda_disponible():
+        return
+
+    texto = texto_busqueda(venta_id, username, nombres_productos)
+    if _dialecto() == "postgresql":
+        sentencia = (
+            f"INSERT INTO {TABLA_BUSQUEDA} (venta_id, documento) "
+            "VALUES (:id, to_tsvector('simple', :texto)) "
+            "ON CONFLICT (venta_id) DO UPDATE SET documento = EXCLUDED.documento"
+        )
+    else:
+        sentencia = f"INSERT OR REPLACE INTO {TABLA_BUSQUEDA} (rowid, texto) VALUES (:id, :texto)"
+    db.session.execute(text(sentencia), {"id": venta_id, "texto": texto})
+
+
+def reconstruir_indice_busqueda(tamano_lote=5000):
+    """Recalcula el índice de búsqueda de todas las ventas.
+
+    Crea el índice si falta y lo completa por lotes de ``tamano_lote`` IDs,
+    con un commit por lote para no mantener una transacción larga.
+
+    Returns:
+        int: cantidad de ventas indexadas (0 si el índice no está disponible)
+    """
+    from sqlalchemy import String, cast, column, func, insert, literal, select, table
+    from sqlalchemy import text as sql_text
+
+    from models_alchemy import DetalleVenta, Producto, User, Venta
+
+    if not crear_indice_busqueda():
+        return 0
+
+    if _dialecto() == "postgresql":
+        from sqlalchemy.dialects.postgresql import aggregate_order_by
+
+        nombres = func.string_agg(
+            Producto.nombre, aggregate_order_by(literal(" "), DetalleVenta.id)
+        )
+    else:
+        nombres = func.group_concat(Producto.nombre, " ")
+
+    # Mismo texto que ``texto_busqueda``, armado en la base de datos
+    texto = (
+        cast(Venta.id, String)
+        + " "
+        + func.coalesce(User.username, "")
+        + " "
+        + func.coalesce(nombres, "")
+    )
+    if _dialecto() == "postgresql":
+        destino = table(TABLA_BUSQUEDA, column("venta_id"), column("documento"))
+        columnas = ["venta_id", "documento"]
+        texto = func.to_tsvector("simple", texto)
+    else:
+        destino = table(TABLA_BUSQUEDA, column("rowid"), column("texto"))
+        columnas = ["rowid", "texto"]
+
+    db.session.execute(sql_text(f"DELETE FROM {TABLA_BUSQUEDA}"))
+    db.session.commit()
+
+    minimo, maximo = db.session.execute(
+        select(func.min(Venta.id), func.max(Venta.id))
+    ).one()
+    indexadas = 0
+    if minimo is None:
+        return indexadas
+
+    for inicio in range(minimo, maximo + 1, tamano_lote):
+        origen = (
+            select(Venta.id, texto)
+            .outerjoin(User, Venta.usuario_id == User.id)
+            .outerjoin(DetalleVenta, DetalleVenta.venta_id == Venta.id)
+            .outerjoin(Producto, DetalleVenta.producto_id == Producto.id)
+            .where(Venta.id >= inicio, Venta.id < inicio + tamano_lote)
+            .group_by(Venta.id, User.username)
+        )
+        resultado = db.session.execute(insert(destino).from_select(columnas, origen))
+        indexadas += resultado.rowcount
+        db.session.commit()
+
+    logger.info(f"Índice de búsqueda reconstruido: {indexadas} ventas")
+    return indexadas
+
+
+def _consulta_indice(consulta):
+    """Devuelve (tabla, columna id, condición, relevancia) o None sin términos."""
+    from sqlalchemy import column, func, literal_column, table
+
+    terminos = _terminos(consulta)
+    if not terminos:
+        return None
+
+    if _dialecto() == "postgresql":
+        tabla = table(TABLA_BUSQUEDA, column("venta_id"), column("documento"))
+        tsquery = func.to_tsquery("simple", " & ".join(f"{t}:*" for t in terminos))
+        condicion = tabla.c.documento.op("@@")(tsquery)
+        # ts_rank: mayor es mejor
+        relevancia = func.ts_rank(tabla.c.documento, tsquery)
+        return tabla, tabla.c.venta_id, condicion, relevancia.desc()
+
+    tabla = table(TABLA_BUSQUEDA, column("rowid"))
+    # Cada término entre comillas (literal) y con * (prefijo); AND implícito
+    expresion = " ".join(f'"{t}"*' for t in terminos)
+    condicion = literal_column(TABLA_BUSQUEDA).op("MATCH")(expresion)
+    # bm25: menor es mejor
+    relevancia = func.bm25(literal_column(TABLA_BUSQUEDA))
+    return tabla, tabla.c.rowid, condicion, relevancia.asc()
+
+
+def condicion_busqueda(consulta, columna_id):
+    """Condición ``columna_id IN (ventas que coinciden)`` usando el índice.
+
+    Returns:
+        Condición de SQLAlchemy, o None si el índice no está disponible o la
+        consulta no tiene términos indexables (se usa entonces LIKE).
+    """
+    from sqlalchemy import select
+
+    if not indice_busqueda_disponible():
+        return None
+    partes = _consulta_indice(consulta)
+    if partes is None:
+        return None
+    tabla, id_indice, condicion, _ = partes
+    return columna_id.in_(select(id_indice).select_from(tabla).where(condicion))
+
+
+def buscar_ventas(consulta, limite=20):
+    """Devuelve las ventas que coinciden con ``consulta``, ordenadas por relevancia.
+
+    Args:
+        consulta: texto libre (ID, usuario o nombres de producto)
+        limite: cantidad máxima de resultados
+
+    Returns:
+        list: dicts como los de ``models.venta.obtener_ventas``; vacía si el
+        índice no está disponible o la consulta no tiene términos.
+    """
+    from sqlalchemy import desc, select
+
+    from models.venta import _venta_a_dict
+    from models_alchemy import User, Venta
+
+    if not indice_busqueda_disponible():
+        return []
+    partes = _consulta_indice(consulta)
+    if partes is None:
+        return []
+    tabla, id_indice, condicion, orden_relevancia = partes
+
+    stmt = (
+        select(Venta, User.username)
+        .select_from(tabla)
+        .join(Venta, Venta.id == id_indice)
+        .outerjoin(User, Venta.usuario_id == User.id)
+        .where(condicion)
+        .order_by(orden_relevancia, desc(Venta.fecha), desc(Venta.id))
+        .limit(limite)
+    )
+    return [_venta_a_dict(fila) for fila in db.session.execute(stmt).all()]
@@ -0,0 +1,103 @@
+"""Percentiles del total por venta (ticket), mantenidos con t-digest.
+
+Por cada día y cada mes, y por usuario, se guarda un t-digest
+(``services.tdigest``) de ``Venta.total`` en ``digests_ventas``.
+``registrar_venta`` actualiza el digest del día y el del mes del usuario en
+la misma transacción que la venta.
+
+Los percentiles de una ventana se obtienen fusionando los digests de los
+meses completos y de los días de los extremos (uno por usuario, o solo los
+de un usuario), sin ordenar los totales de todas las ventas.
+"""
+
+import json
+from collections import defaultdict
+
+from models.resumen import _actualizar_resumen_serializado, _periodos_de_ventana
+from models_alchemy import DigestVentas, Venta, db
+from services.tdigest import TDigest
+
+# Centroides por digest (~2 KB serializado)
+COMPRESION_DIGEST = 100
+
+CUANTILES_POR_DEFECTO = (0.5, 0.9, 0.99)
+
+
+def acumular_digest_venta(fecha, usuario_id, total):
+    """Suma una venta a los digests del día y del mes del usuario. No hace commit."""
+    for periodo in (fecha.strftime("%Y-%m-%d"), fecha.strftime("%Y-%m")):
+        _actualizar_resumen_serializado(
+            DigestVentas,
+            {"periodo": periodo, "usuario_id": usuario_id or 0},
+            TDigest,
+            lambda: TDigest(COMPRESION_DIGEST),
+            lambda digest: digest.agregar(total),
+        )
+
+
+def reconstruir_digests_ventas(tamano_lote=5000):
+    """Recalcula los digests desde ``ventas``. No hace commit.
+
+    Returns:
+        int: cantidad de digests generados
+    """
+    from sqlalchemy import delete, func, insert, select
+
+    digests = defaultdict(lambda: TDigest(COMPRESION_DIGEST))
+    stmt = select(Venta.fecha, func.coalesce(Venta.usuario_id, 0), Venta.total)
+    filas = db.session.execute(
+        stmt, execution_options={"stream_results": True, "yield_per": tamano_lote}
+    )
+    for fecha, usuario_id, total in filas:
+        digests[(fecha.strftime("%Y-%m-%d"), usuario_id)].agregar(total)
+        digests[(fecha.strftime("%Y-%m"), usuario_id)].agregar(total)
+
+    db.session.execute(delete(DigestVentas))
+    if digests:
+        db.session.execute(
+            insert(DigestVentas),
+            [
+                {
+                    "periodo": periodo,
+                    "usuario_id": usuario_id,
+                    "datos": json.dumps(digest.a_dict()),
+                }
+                for (periodo, usuario_id), digest in digests.items()
+            ],
+        )
+    return len(digests)
+
+
+def obtener_percentiles_ticket(
+    desde=None, hasta=None, usuario_id=None, cuantiles=CUANTILES_POR_DEFECTO
+):
+    """Percentiles aproximados del total por venta en una ventana de días.
+
+    Args:
+        desde: día mínimo inclusivo ("%Y-%m-%d"), None para sin límite
+        hasta: día máximo inclusivo ("%Y-%m-%d"), None para hasta hoy
+        usuario_id: solo ventas de ese usuario (0 para ventas sin usuario)
+        cuantiles: cuantiles a calcular, entre 0 y 1
+
+    Returns:
+        dict: {"cantidad": ventas, "p50": valor, ...}; los percentiles son
+        None si no hay ventas en la ventana.
+
+    Raises:
+        ValueError: ventana inválida (ver ``_periodos_de_ventana``)
+    """
+    from sqlalchemy import select
+
+    claves = _periodos_de_ventana(DigestVentas, desde, hasta)
+    stmt = select(DigestVentas.datos).where(DigestVentas.periodo.in_(claves))
+    if usuario_id is not None:
+        stmt = stmt.where(DigestVentas.usuario_id == usuario_id)
+
+    digest = TDigest(COMPRESION_DIGEST)
+    for datos in db.session.execute(stmt).scalars():
+        digest.fusionar(TDigest.desde_dict(json.loads(datos)))
+
+    resultado = {"cantidad": digest.total}
+    for q in cuantiles:
+        resultado[f"p{q * 100:g}"] = digest.cuantil(q)
+    return resultado
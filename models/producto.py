@@ -1,5 +1,6 @@
 """Modelo de Producto con SQLAlchemy ORM."""
 
+from models.resumen import GENERACION_PRODUCTOS, incrementar_generacion
 from models_alchemy import Producto, db
 
 
@@ -56,6 +57,50 @@ def obtener_producto_por_id(producto_id, conn=None):
     return None
 
 
+def obtener_productos_por_ids(ids):
+    """Carga varios productos con una sola consulta ``WHERE id IN (...)``.
+
+    Returns:
+        dict: {id: Producto} (objetos ORM de la sesión); los IDs que no
+        existen no aparecen.
+    """
+    from sqlalchemy import select
+
+    ids = set(ids)
+    if not ids:
+        return {}
+    stmt = select(Producto).where(Producto.id.in_(ids))
+    return {p.id: p for p in db.session.execute(stmt).scalars()}
+
+
+def descontar_stock(producto_id, cantidad):
+    """Descuenta ``cantidad`` unidades solo si hay stock suficiente. No hace commit.
+
+    Es un único ``UPDATE ... SET stock = stock - :n WHERE id = :id AND
+    stock >= :n``: la comprobación y el descuento ocurren en la base, con la
+    fila bloqueada hasta el commit, así que dos ventas concurrentes no pueden
+    vender las mismas unidades. En Postgres la segunda espera a la primera y
+    vuelve a evaluar el ``WHERE`` con el stock ya descontado; en SQLite el
+    primer ``UPDATE`` toma el lock de escritura de toda la base.
+
+    Quien descuente varios productos en una transacción debe hacerlo en
+    orden de ID, para que dos ventas no se esperen mutuamente.
+
+    Returns:
+        bool: True si se descontó, False si no alcanzaba el stock (o el
+        producto no existe)
+    """
+    from sqlalchemy import update
+
+    stmt = (
+        update(Producto)
+        .where(Producto.id == producto_id, Producto.stock >= cantidad)
+        .values(stock=Producto.stock - cantidad)
+        .execution_options(synchronize_session="fetch")
+    )
+    return db.session.execute(stmt).rowcount == 1
+
+
 def obtener_producto_por_codigo(codigo_barras):
     """Devuelve un producto por su código de barras."""
     from sqlalchemy import select
@@ -87,6 +132,8 @@ def editar_producto(
         producto.stock = stock
         producto.categoria = categoria
         producto.codigo_barras = codigo_barras
+        # El nombre aparece en el top de productos del dashboard
+        incrementar_generacion(GENERACION_PRODUCTOS)
         db.session.commit()
         return True
     except Exception as e:
@@ -101,6 +148,7 @@ def eliminar_producto(producto_id):
         producto = db.session.get(Producto, producto_id)
         if producto:
             db.session.delete(producto)
+            incrementar_generacion(GENERACION_PRODUCTOS)
             db.session.commit()
             return True
         return False
@@ -0,0 +1,434 @@
+"""Resúmenes de ventas mantenidos de forma incremental.
+
+Las tablas de resumen se actualizan dentro de la misma transacción que
+registra la venta, de modo que el dashboard lee unos cientos de filas
+agregadas en lugar de recorrer todo el historial.
+"""
+
+from datetime import date, timedelta
+
+from models_alchemy import (
+    DetalleVenta,
+    Generacion,
+    Producto,
+    User,
+    Venta,
+    VentaDiaria,
+    VentaProductoDiaria,
+    db,
+)
+
+# Formato del período truncado por unidad: (SQLite strftime, Postgres to_char)
+_FORMATOS_PERIODO = {
+    "hour": ("%Y-%m-%d %H", "YYYY-MM-DD HH24"),
+    "day": ("%Y-%m-%d", "YYYY-MM-DD"),
+    "month": ("%Y-%m", "YYYY-MM"),
+}
+
+
+def periodo_de_fecha(columna, unidad="day"):
+    """Expresión SQL que trunca una columna DateTime y la devuelve como texto.
+
+    En Postgres usa ``date_trunc`` y en SQLite ``strftime``, de modo que la
+    agrupación por día o mes se resuelve en la base de datos.
+
+    Args:
+        columna: columna o expresión DateTime (p. ej. ``Venta.fecha``)
+        unidad: "hour" ("%Y-%m-%d %H"), "day" ("%Y-%m-%d") o "month" ("%Y-%m")
+    """
+    from sqlalchemy import func
+
+    formato_sqlite, formato_pg = _FORMATOS_PERIODO[unidad]
+    dialecto = db.session.get_bind().dialect.name
+    if dialecto == "postgresql":
+        return func.to_char(func.date_trunc(unidad, columna), formato_pg)
+    if dialecto == "sqlite":
+        return func.strftime(formato_sqlite, columna)
+    raise NotImplementedError(f"Dialecto no soportado para resúmenes: {dialecto}")
+
+
+# Claves de ``generaciones``: ventas registradas y datos de productos
+GENERACION_VENTAS = "ventas"
+GENERACION_PRODUCTOS = "productos"
+
+
+def _insert_del_dialecto():
+    """``insert`` con ON CONFLICT del dialecto de la sesión (SQLite o Postgres)."""
+    dialecto = db.session.get_bind().dialect.name
+    if dialecto == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialecto == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Dialecto no soportado para resúmenes: {dialecto}")
+    return insert
+
+
+def _upsert(modelo, valores, claves, sumas=(), minimos=(), maximos=()):
+    """INSERT ... ON CONFLICT DO UPDATE acumulando sobre la fila existente.
+
+    Usa el dialecto de la sesión (SQLite o Postgres) para que dos workers que
+    registran ventas del mismo día no choquen con la clave primaria.
+
+    Args:
+        modelo: modelo ORM de la tabla de resumen
+        valores: dict con los valores de la fila nueva, o lista de dicts
+            para varias filas en una sola sentencia (sin claves repetidas)
+        claves: columnas de la clave primaria
+        sumas: columnas que se suman al valor existente
+        minimos: columnas que conservan el menor valor
+        maximos: columnas que conservan el mayor valor
+    """
+    from sqlalchemy import func
+
+    insert = _insert_del_dialecto()
+    if db.session.get_bind().dialect.name == "postgresql":
+        menor, mayor = func.least, func.greatest
+    else:
+        menor, mayor = func.min, func.max
+
+    tabla = modelo.__table__
+    stmt = insert(tabla).values(valores)
+    actualizar = {}
+    for col in sumas:
+        actualizar[col] = tabla.c[col] + stmt.excluded[col]
+    for col in minimos:
+        actualizar[col] = menor(tabla.c[col], stmt.excluded[col])
+    for col in maximos:
+        actualizar[col] = mayor(tabla.c[col], stmt.excluded[col])
+
+    db.session.execute(
+        stmt.on_conflict_do_update(index_elements=list(claves), set_=actualizar)
+    )
+
+
+def _actualizar_resumen_serializado(modelo, claves, clase, crear, actualizar):
+    """Lee, modifica y reescribe un resumen guardado como JSON en ``datos``. No hace commit.
+
+    La fila se crea vacía si no existe (INSERT ... ON CONFLICT DO NOTHING) y
+    se bloquea (``SELECT ... FOR UPDATE`` en Postgres) hasta el commit, como
+    las filas de ``_upsert``, para que dos workers no pisen sus cambios.
+
+    Args:
+        modelo: modelo ORM con columna ``datos``
+        claves: dict con la clave primaria de la fila
+        clase: clase del resumen, con ``a_dict`` y ``desde_dict``
+        crear: función sin argumentos que devuelve un resumen vacío
+        actualizar: función que recibe el resumen y lo modifica
+    """
+    import json
+
+    from sqlalchemy import select, update
+
+    insert = _insert_del_dialecto()
+    db.session.execute(
+        insert(modelo.__table__)
+        .values(**claves, datos=json.dumps(crear().a_dict()))
+        .on_conflict_do_nothing(index_elements=list(claves))
+    )
+
+    condicion = [getattr(modelo, col) == valor for col, valor in claves.items()]
+    datos = db.session.execute(
+        select(modelo.datos).where(*condicion).with_for_update()
+    ).scalar_one()
+    resumen = clase.desde_dict(json.loads(datos))
+    actualizar(resumen)
+    db.session.execute(
+        update(modelo).where(*condicion).values(datos=json.dumps(resumen.a_dict()))
+    )
+
+
+def acumular_venta_diaria(fecha, usuario_id, total):
+    """Suma una venta al resumen diario. No hace commit.
+
+    Args:
+        fecha: fecha de la venta (datetime)
+        usuario_id: ID del usuario o None
+        total: total de la venta
+    """
+    _upsert(
+        VentaDiaria,
+        {
+            "dia": fecha.strftime("%Y-%m-%d"),
+            "usuario_id": usuario_id or 0,
+            "cantidad": 1,
+            "total": total,
+            "minimo": total,
+            "maximo": total,
+        },
+        claves=("dia", "usuario_id"),
+        sumas=("cantidad", "total"),
+        minimos=("minimo",),
+        maximos=("maximo",),
+    )
+
+
+def acumular_ventas_productos(fecha, lineas):
+    """Suma las líneas de una venta al resumen por producto y día. No hace commit.
+
+    Una sola sentencia para todas las líneas; las de un mismo producto se
+    suman antes.
+
+    Args:
+        fecha: fecha de la venta (datetime)
+        lineas: iterable de (producto_id, cantidad, subtotal)
+    """
+    dia = fecha.strftime("%Y-%m-%d")
+    por_producto = {}
+    for producto_id, cantidad, subtotal in lineas:
+        fila = por_producto.setdefault(
+            producto_id,
+            {"dia": dia, "producto_id": producto_id, "unidades": 0, "ingresos": 0},
+        )
+        fila["unidades"] += cantidad
+        fila["ingresos"] += subtotal
+    if not por_producto:
+        return
+
+    _upsert(
+        VentaProductoDiaria,
+        list(por_producto.values()),
+        claves=("dia", "producto_id"),
+        sumas=("unidades", "ingresos"),
+    )
+
+
+def incrementar_generacion(clave):
+    """Incrementa el contador de generación ``clave``. No hace commit.
+
+    Se llama en la misma transacción que modifica los datos, de modo que un
+    cache que guarda la generación con la que calculó su resultado nunca
+    queda vigente para datos que ya cambiaron.
+    """
+    _upsert(
+        Generacion, {"clave": clave, "valor": 1}, claves=("clave",), sumas=("valor",)
+    )
+
+
+def obtener_generaciones(*claves):
+    """Devuelve una tupla con la generación actual de cada clave (0 si no existe)."""
+    from sqlalchemy import select
+
+    stmt = select(Generacion.clave, Generacion.valor).where(
+        Generacion.clave.in_(claves)
+    )
+    valores = dict(db.session.execute(stmt).all())
+    return tuple(valores.get(clave, 0) for clave in claves)
+
+
+# Máximo de claves de período por ventana (meses completos más los días
+# sueltos de los extremos), para acotar el costo de una consulta
+MAX_PERIODOS_VENTANA = 2000
+
+# Último día de una ventana o serie: el mes siguiente debe poder
+# representarse
+ULTIMO_DIA_VENTANA = date(9999, 11, 30)
+
+
+def _periodos_de_ventana(modelo, desde=None, hasta=None):
+    """Claves de período que cubren la ventana de días [desde, hasta].
+
+    Para resúmenes guardados por día ("%Y-%m-%d") y por mes ("%Y-%m") en la
+    columna ``periodo`` de ``modelo``: los meses completos dentro de la
+    ventana se toman del resumen mensual y los días de los extremos, del
+    diario.
+
+    Args:
+        modelo: modelo ORM con columna ``periodo``
+        desde: día mínimo inclusivo ("%Y-%m-%d"); None para desde el primer
+            período guardado
+        hasta: día máximo inclusivo ("%Y-%m-%d"); None para hasta hoy
+
+    Returns:
+        list: claves de período (vacía si no hay nada guardado)
+
+    Raises:
+        ValueError: fecha inválida, ``desde`` posterior a ``hasta`` o más de
+            ``MAX_PERIODOS_VENTANA`` claves
+    """
+    from sqlalchemy import func, select
+
+    hasta = date.fromisoformat(hasta) if hasta else date.today()
+    if desde:
+        dia = date.fromisoformat(desde)
+        if dia > hasta:
+            raise ValueError("La fecha desde no puede ser posterior a hasta")
+    else:
+        primero = db.session.execute(select(func.min(modelo.periodo))).scalar()
+        if primero is None:
+            return []
+        dia = date.fromisoformat(primero if len(primero) == 10 else primero + "-01")
+    hasta = min(hasta, ULTIMO_DIA_VENTANA)
+    if dia > hasta:
+        return []
+
+    # Cota de la cantidad de claves sin recorrer la ventana: un mes por mes
+    # más, a lo sumo, los días sueltos de los dos meses de los extremos
+    meses = (hasta.year - dia.year) * 12 + hasta.month - dia.month + 1
+    if meses + 62 > MAX_PERIODOS_VENTANA:
+        raise ValueError(
+            f"La ventana pedida abarca {meses} meses "
+            f"(máximo {MAX_PERIODOS_VENTANA - 62})"
+        )
+
+    claves = []
+    while dia <= hasta:
+        siguiente_mes = (dia.replace(day=28) + timedelta(days=4)).replace(day=1)
+        if dia.day == 1 and siguiente_mes - timedelta(days=1) <= hasta:
+            claves.append(dia.strftime("%Y-%m"))
+            dia = siguiente_mes
+        else:
+            claves.append(dia.isoformat())
+            dia += timedelta(days=1)
+    return claves
+
+
+def _reemplazar_resumen(modelo, columnas, origen):
+    from sqlalchemy import delete, func, insert, select
+
+    db.session.execute(delete(modelo))
+    db.session.execute(insert(modelo).from_select(columnas, origen))
+    return db.session.execute(select(func.count()).select_from(modelo)).scalar()
+
+
+def reconstruir_resumenes():
+    """Recalcula todas las tablas de resumen desde ``ventas`` y ``detalle_ventas``.
+
+    Returns:
+        dict: {nombre_tabla: filas_generadas}
+    """
+    from sqlalchemy import func, select
+
+    # Importados aquí porque esos módulos usan los helpers de este
+    from models.percentiles import reconstruir_digests_ventas
+    from models.top_productos import reconstruir_sketches_productos
+
+    dia = periodo_de_fecha(Venta.fecha)
+    usuario = func.coalesce(Venta.usuario_id, 0)
+    por_dia = select(
+        dia,
+        usuario,
+        func.count(Venta.id),
+        func.sum(Venta.total),
+        func.min(Venta.total),
+        func.max(Venta.total),
+    ).group_by(dia, usuario)
+    por_producto = (
+        select(
+            dia,
+            DetalleVenta.producto_id,
+            func.sum(DetalleVenta.cantidad),
+            func.sum(DetalleVenta.subtotal),
+        )
+        .join(Venta, DetalleVenta.venta_id == Venta.id)
+        .group_by(dia, DetalleVenta.producto_id)
+    )
+
+    try:
+        filas = {
+            "ventas_diarias": _reemplazar_resumen(
+                VentaDiaria,
+                ["dia", "usuario_id", "cantidad", "total", "minimo", "maximo"],
+                por_dia,
+            ),
+            "ventas_productos_diarias": _reemplazar_resumen(
+                VentaProductoDiaria,
+                ["dia", "producto_id", "unidades", "ingresos"],
+                por_producto,
+            ),
+        }
+        # Se arman desde ``ventas_productos_diarias`` recién recalculada
+        filas["sketches_productos"] = reconstruir_sketches_productos()
+        filas["digests_ventas"] = reconstruir_digests_ventas()
+        incrementar_generacion(GENERACION_VENTAS)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return filas
+
+
+def obtener_ventas_diarias(desde=None, hasta=None):
+    """Devuelve las filas del resumen diario, opcionalmente acotadas por día.
+
+    Args:
+        desde: día mínimo inclusivo ("%Y-%m-%d")
+        hasta: día máximo inclusivo ("%Y-%m-%d")
+    """
+    from sqlalchemy import asc, select
+
+    stmt = select(VentaDiaria).order_by(asc(VentaDiaria.dia))
+    if desde:
+        stmt = stmt.where(VentaDiaria.dia >= desde)
+    if hasta:
+        stmt = stmt.where(VentaDiaria.dia <= hasta)
+    filas = db.session.execute(stmt).scalars().all()
+
+    return [
+        {
+            "dia": f.dia,
+            "usuario_id": f.usuario_id or None,
+            "cantidad": f.cantidad,
+            "total": f.total,
+            "minimo": f.minimo,
+            "maximo": f.maximo,
+        }
+        for f in filas
+    ]
+
+
+def obtener_usuarios_con_ventas():
+    """Devuelve los usernames que registraron al menos una venta, ordenados."""
+    from sqlalchemy import select
+
+    stmt = (
+        select(User.username)
+        .join(VentaDiaria, VentaDiaria.usuario_id == User.id)
+        .distinct()
+        .order_by(User.username)
+    )
+    return list(db.session.execute(stmt).scalars())
+
+
+def obtener_productos_mas_vendidos(top_n=10, desde=None, hasta=None):
+    """Devuelve los productos más vendidos en una ventana de días.
+
+    Una sola consulta agregada sobre ``ventas_productos_diarias``; el rango
+    de días usa la clave primaria ``(dia, producto_id)``.
+
+    Args:
+        top_n: cantidad de productos a devolver
+        desde: día mínimo inclusivo ("%Y-%m-%d"), None para sin límite
+        hasta: día máximo inclusivo ("%Y-%m-%d"), None para sin límite
+
+    Returns:
+        list: dicts con la forma de ``services.ventas_service.productos_mas_vendidos``
+        más ``producto_id``.
+    """
+    from sqlalchemy import desc, func, select
+
+    unidades = func.sum(VentaProductoDiaria.unidades)
+    ingresos = func.sum(VentaProductoDiaria.ingresos)
+    stmt = (
+        select(VentaProductoDiaria.producto_id, Producto.nombre, unidades, ingresos)
+        .join(Producto, VentaProductoDiaria.producto_id == Producto.id)
+        .group_by(VentaProductoDiaria.producto_id, Producto.nombre)
+        .order_by(desc(unidades), VentaProductoDiaria.producto_id)
+        .limit(top_n)
+    )
+    if desde:
+        stmt = stmt.where(VentaProductoDiaria.dia >= desde)
+    if hasta:
+        stmt = stmt.where(VentaProductoDiaria.dia <= hasta)
+
+    return [
+        {
+            "producto_id": producto_id,
+            "nombre": nombre,
+            "cantidad_vendida": cantidad,
+            "ventas_total": total,
+            "precio_promedio": total / cantidad if cantidad else 0,
+        }
+        for producto_id, nombre, cantidad, total in db.session.execute(stmt).all()
+    ]
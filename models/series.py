@@ -0,0 +1,249 @@
+"""Series de ventas por hora, día, semana o mes para los gráficos.
+
+``obtener_serie_ventas`` devuelve arreglos paralelos (períodos, cantidad de
+ventas y total) completos con ceros, listos para Chart.js. Cada consulta
+lee la fuente más chica que alcanza para responderla:
+
+* mes o semana sin filtros: ``models.agregados`` (vistas materializadas en
+  Postgres, por lo que pueden tener el retraso del último refresco);
+* día, o semana y mes filtrados por usuario: el resumen ``ventas_diarias``;
+* hora, o filtro por categoría: ``ventas`` (con ``detalle_ventas`` y
+  ``productos`` para la categoría), usando el índice por fecha.
+
+Con filtro de categoría, ``cantidad`` cuenta las ventas que incluyen algún
+producto de la categoría y ``total`` suma solo los subtotales de esos
+productos.
+"""
+
+from calendar import monthrange
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+
+from models.agregados import fuente_mensual, fuente_semanal
+from models.resumen import ULTIMO_DIA_VENTANA, periodo_de_fecha
+from models_alchemy import DetalleVenta, Producto, Venta, VentaDiaria, db
+
+GRANULARIDADES = ("hour", "day", "week", "month")
+
+# Cantidad de períodos por defecto de cada granularidad
+PERIODOS_POR_DEFECTO = {"hour": 24, "day": 30, "week": 8, "month": 6}
+
+# Máximo de puntos por serie, para acotar el costo de una consulta
+MAX_PUNTOS = 2000
+
+
+def inicio_de_periodo(dia, granularidad):
+    """Primer día del período (día, semana con inicio lunes o mes) de ``dia``."""
+    if granularidad == "week":
+        return dia - timedelta(days=dia.weekday())
+    if granularidad == "month":
+        return dia.replace(day=1)
+    return dia
+
+
+def _periodos(granularidad, desde, hasta):
+    """Claves de todos los períodos entre ``desde`` y ``hasta`` (inclusive)."""
+    if granularidad == "hour":
+        inicio = datetime.combine(desde, time())
+        horas = ((hasta - desde).days + 1) * 24
+        return [
+            (inicio + timedelta(hours=h)).strftime("%Y-%m-%d %H") for h in range(horas)
+        ]
+    if granularidad == "month":
+        claves = []
+        mes = desde.replace(day=1)
+        while mes <= hasta:
+            claves.append(mes.strftime("%Y-%m"))
+            mes = (mes + timedelta(days=32)).replace(day=1)
+        return claves
+    paso = 7 if granularidad == "week" else 1
+    inicio = inicio_de_periodo(desde, granularidad)
+    return [
+        (inicio + timedelta(days=d)).isoformat()
+        for d in range(0, (hasta - inicio).days + 1, paso)
+    ]
+
+
+def _cantidad_periodos(granularidad, desde, hasta):
+    """Cantidad de claves que devolvería ``_periodos``, sin generarlas."""
+    if granularidad == "hour":
+        return ((hasta - desde).days + 1) * 24
+    if granularidad == "month":
+        return (hasta.year - desde.year) * 12 + hasta.month - desde.month + 1
+    paso = 7 if granularidad == "week" else 1
+    return (hasta - inicio_de_periodo(desde, granularidad)).days // paso + 1
+
+
+def desde_para_periodos(granularidad, hasta, periodos=None):
+    """Primer día de una ventana de ``periodos`` períodos que termina en ``hasta``.
+
+    Con granularidad horaria la ventana se redondea a días completos.
+
+    Raises:
+        ValueError: más de ``MAX_PUNTOS`` períodos
+    """
+    periodos = max(periodos or PERIODOS_POR_DEFECTO[granularidad], 1)
+    if periodos > MAX_PUNTOS:
+        raise ValueError(f"Se piden {periodos} períodos (máximo {MAX_PUNTOS})")
+    if granularidad == "hour":
+        return hasta - timedelta(days=(periodos - 1) // 24)
+    if granularidad == "week":
+        return hasta - timedelta(weeks=periodos - 1)
+    if granularidad == "month":
+        indice = hasta.year * 12 + hasta.month - periodos
+        return date(indice // 12, indice % 12 + 1, 1)
+    return hasta - timedelta(days=periodos - 1)
+
+
+def _clave_de_dia(dia_iso, granularidad):
+    """Clave del período al que pertenece un día "%Y-%m-%d"."""
+    if granularidad == "month":
+        return dia_iso[:7]
+    if granularidad == "week":
+        return inicio_de_periodo(date.fromisoformat(dia_iso), "week").isoformat()
+    return dia_iso
+
+
+def _filas_agregados(granularidad, desde, hasta):
+    """(período, cantidad, total) desde los agregados mensuales o semanales."""
+    from sqlalchemy import select
+
+    if granularidad == "month":
+        fuente = fuente_mensual()
+        stmt = select(fuente.c.mes, fuente.c.cantidad, fuente.c.total).where(
+            fuente.c.mes.between(desde.strftime("%Y-%m"), hasta.strftime("%Y-%m"))
+        )
+    else:
+        fuente = fuente_semanal()
+        stmt = select(fuente.c.semana_inicio, fuente.c.cantidad, fuente.c.total).where(
+            fuente.c.semana_inicio.between(desde.isoformat(), hasta.isoformat())
+        )
+    return db.session.execute(stmt).all()
+
+
+def _filas_resumen_diario(desde, hasta, usuario_id):
+    """(día, cantidad, total) desde ``ventas_diarias``."""
+    from sqlalchemy import func, select
+
+    stmt = (
+        select(
+            VentaDiaria.dia, func.sum(VentaDiaria.cantidad), func.sum(VentaDiaria.total)
+        )
+        .where(VentaDiaria.dia.between(desde.isoformat(), hasta.isoformat()))
+        .group_by(VentaDiaria.dia)
+    )
+    if usuario_id is not None:
+        stmt = stmt.where(VentaDiaria.usuario_id == usuario_id)
+    return db.session.execute(stmt).all()
+
+
+def _filas_ventas(unidad, desde, hasta, usuario_id, categoria):
+    """(hora o día, cantidad, total) agrupando directamente ``ventas``."""
+    from sqlalchemy import func, select
+
+    periodo = periodo_de_fecha(Venta.fecha, unidad)
+    if categoria:
+        cantidad = func.count(func.distinct(Venta.id))
+        total = func.sum(DetalleVenta.subtotal)
+    else:
+        cantidad, total = func.count(Venta.id), func.sum(Venta.total)
+
+    stmt = (
+        select(periodo, cantidad, total)
+        .where(
+            Venta.fecha >= datetime.combine(desde, time()),
+            Venta.fecha < datetime.combine(hasta + timedelta(days=1), time()),
+        )
+        .group_by(periodo)
+    )
+    if categoria:
+        stmt = (
+            stmt.join(DetalleVenta, DetalleVenta.venta_id == Venta.id)
+            .join(Producto, DetalleVenta.producto_id == Producto.id)
+            .where(Producto.categoria == categoria)
+        )
+    if usuario_id == 0:
+        stmt = stmt.where(Venta.usuario_id.is_(None))
+    elif usuario_id is not None:
+        stmt = stmt.where(Venta.usuario_id == usuario_id)
+    return db.session.execute(stmt).all()
+
+
+def obtener_serie_ventas(
+    granularidad="day", desde=None, hasta=None, usuario_id=None, categoria=None
+):
+    """Serie de ventas agrupada por período.
+
+    Los extremos se amplían al período completo: con granularidad semanal o
+    mensual ``desde`` se lleva al lunes o al día 1 y ``hasta`` al último día
+    del período, para que el primer y el último punto no queden parciales.
+
+    Args:
+        granularidad: "hour", "day", "week" o "month"
+        desde: primer día (``date``); por defecto ``hasta``
+        hasta: último día (``date``); por defecto hoy
+        usuario_id: solo ventas de ese usuario (0 para ventas sin usuario)
+        categoria: solo productos de esa categoría
+
+    Returns:
+        dict: {"granularidad", "desde", "hasta", "periodos", "cantidad",
+        "total"}, donde ``periodos`` son claves "%Y-%m-%d %H" (hora),
+        "%Y-%m-%d" (día, o lunes de la semana) o "%Y-%m" (mes).
+
+    Raises:
+        ValueError: granularidad desconocida, rango invertido o más de
+            ``MAX_PUNTOS`` períodos
+    """
+    if granularidad not in GRANULARIDADES:
+        raise ValueError(f"Granularidad inválida: {granularidad}")
+    hasta = hasta or date.today()
+    desde = desde or hasta
+    if desde > hasta:
+        raise ValueError("La fecha desde no puede ser posterior a hasta")
+
+    # Los extremos ampliados y el día siguiente a ``hasta`` deben poder
+    # representarse
+    desde = inicio_de_periodo(min(desde, ULTIMO_DIA_VENTANA), granularidad)
+    hasta = min(hasta, ULTIMO_DIA_VENTANA)
+    if granularidad == "week":
+        hasta = inicio_de_periodo(hasta, "week") + timedelta(days=6)
+    elif granularidad == "month":
+        hasta = hasta.replace(day=monthrange(hasta.year, hasta.month)[1])
+
+    # Se rechaza antes de armar la lista: un rango de siglos en horas no
+    # debe generar millones de claves para después descartarlas
+    cantidad = _cantidad_periodos(granularidad, desde, hasta)
+    if cantidad > MAX_PUNTOS:
+        raise ValueError(
+            f"El rango pedido tiene {cantidad} períodos (máximo {MAX_PUNTOS})"
+        )
+    periodos = _periodos(granularidad, desde, hasta)
+
+    if granularidad == "hour":
+        filas = _filas_ventas("hour", desde, hasta, usuario_id, categoria)
+        clave = None
+    elif categoria:
+        filas = _filas_ventas("day", desde, hasta, usuario_id, categoria)
+        clave = granularidad
+    elif usuario_id is not None or granularidad == "day":
+        filas = _filas_resumen_diario(desde, hasta, usuario_id)
+        clave = granularidad
+    else:
+        filas = _filas_agregados(granularidad, desde, hasta)
+        clave = None
+
+    acumulado = defaultdict(lambda: [0, 0])
+    for periodo, cantidad, total in filas:
+        fila = acumulado[_clave_de_dia(periodo, clave) if clave else periodo]
+        fila[0] += cantidad or 0
+        fila[1] += total or 0
+    valores = [acumulado.get(p, (0, 0)) for p in periodos]
+
+    return {
+        "granularidad": granularidad,
+        "desde": desde.isoformat(),
+        "hasta": hasta.isoformat(),
+        "periodos": periodos,
+        "cantidad": [cantidad for cantidad, _ in valores],
+        "total": [total for _, total in valores],
+    }
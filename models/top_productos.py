@@ -0,0 +1,133 @@
+"""Productos más vendidos aproximados, con memoria acotada por período.
+
+Por cada día y cada mes, y por usuario, se guarda un resumen Space-Saving
+(``services.space_saving``) de las unidades vendidas por producto en
+``sketches_productos``. ``registrar_venta`` actualiza el resumen del día y
+el del mes del usuario en la misma transacción que la venta: como con los
+digests de ``models.percentiles``, las cajas no compiten por una única fila
+del mes bloqueada hasta el commit.
+
+Una consulta de "más vendidos" en una ventana fusiona los resúmenes de los
+meses completos y de los días sueltos de los extremos, de todos los
+usuarios: unas decenas de filas de tamaño fijo por usuario, sin importar
+cuántas ventas o productos haya. El error de la fusión sigue acotado por
+unidades_de_la_ventana / CAPACIDAD_SKETCH. Los resultados incluyen el error máximo de cada estimado; para
+cifras exactas está ``models.resumen.obtener_productos_mas_vendidos``.
+"""
+
+import json
+from collections import defaultdict
+
+from models.resumen import _actualizar_resumen_serializado, _periodos_de_ventana
+from models_alchemy import Producto, SketchProductos, VentaProductoDiaria, db
+from services.space_saving import SpaceSaving
+
+# Contadores por resumen: el error de cada estimado es a lo sumo
+# unidades_del_periodo / CAPACIDAD_SKETCH
+CAPACIDAD_SKETCH = 100
+
+
+def acumular_sketch_productos(fecha, usuario_id, unidades_por_producto):
+    """Suma las líneas de una venta a los resúmenes del día y del mes del usuario. No hace commit.
+
+    Args:
+        fecha: fecha de la venta (datetime)
+        usuario_id: ID del usuario o None
+        unidades_por_producto: iterable de (producto_id, cantidad)
+    """
+    lineas = list(unidades_por_producto)
+
+    def sumar_lineas(sketch):
+        for producto_id, cantidad in lineas:
+            sketch.agregar(producto_id, cantidad)
+
+    for periodo in (fecha.strftime("%Y-%m-%d"), fecha.strftime("%Y-%m")):
+        _actualizar_resumen_serializado(
+            SketchProductos,
+            {"periodo": periodo, "usuario_id": usuario_id or 0},
+            SpaceSaving,
+            lambda: SpaceSaving(CAPACIDAD_SKETCH),
+            sumar_lineas,
+        )
+
+
+def reconstruir_sketches_productos():
+    """Recalcula los resúmenes desde ``ventas_productos_diarias``. No hace commit.
+
+    El resumen diario por producto no distingue usuarios: los resúmenes
+    reconstruidos quedan con ``usuario_id`` 0.
+
+    Returns:
+        int: cantidad de resúmenes generados
+    """
+    from sqlalchemy import delete, insert, select
+
+    sketches = defaultdict(lambda: SpaceSaving(CAPACIDAD_SKETCH))
+    stmt = select(
+        VentaProductoDiaria.dia,
+        VentaProductoDiaria.producto_id,
+        VentaProductoDiaria.unidades,
+    ).order_by(VentaProductoDiaria.dia, VentaProductoDiaria.producto_id)
+    for dia, producto_id, unidades in db.session.execute(stmt):
+        sketches[dia].agregar(producto_id, unidades)
+        sketches[dia[:7]].agregar(producto_id, unidades)
+
+    db.session.execute(delete(SketchProductos))
+    if sketches:
+        db.session.execute(
+            insert(SketchProductos),
+            [
+                {
+                    "periodo": periodo,
+                    "usuario_id": 0,
+                    "datos": json.dumps(sketch.a_dict()),
+                }
+                for periodo, sketch in sketches.items()
+            ],
+        )
+    return len(sketches)
+
+
+def obtener_productos_mas_vendidos_aproximado(top_n=10, desde=None, hasta=None):
+    """Productos con más unidades vendidas en una ventana de días, aproximado.
+
+    Args:
+        top_n: cantidad de productos a devolver
+        desde: día mínimo inclusivo ("%Y-%m-%d"), None para sin límite
+        hasta: día máximo inclusivo ("%Y-%m-%d"), None para hasta hoy
+
+    Returns:
+        list: dicts con ``producto_id``, ``nombre``, ``cantidad_vendida``
+        (estimado, nunca menor al real) y ``error`` (el real es al menos
+        ``cantidad_vendida - error``), ordenados por ``cantidad_vendida``.
+
+    Raises:
+        ValueError: ventana inválida (ver ``_periodos_de_ventana``)
+    """
+    from sqlalchemy import select
+
+    claves = _periodos_de_ventana(SketchProductos, desde, hasta)
+    stmt = select(SketchProductos.datos).where(SketchProductos.periodo.in_(claves))
+    sketch = SpaceSaving(CAPACIDAD_SKETCH)
+    for datos in db.session.execute(stmt).scalars():
+        sketch.fusionar(SpaceSaving.desde_dict(json.loads(datos)))
+
+    top = sketch.top(top_n)
+    if not top:
+        return []
+    nombres = dict(
+        db.session.execute(
+            select(Producto.id, Producto.nombre).where(
+                Producto.id.in_([producto_id for producto_id, _, _ in top])
+            )
+        ).all()
+    )
+    return [
+        {
+            "producto_id": producto_id,
+            "nombre": nombres.get(producto_id, f"Producto {producto_id}"),
+            "cantidad_vendida": estimado,
+            "error": error,
+        }
+        for producto_id, estimado, error in top
+    ]
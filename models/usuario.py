@@ -44,3 +44,10 @@ def obtener_usuario_por_id(user_id):
             "rol": usuario.rol,
         }
     return None
+
+
+def obtener_id_usuario(username):
+    """Devuelve el ID del usuario con ese username, o None si no existe."""
+    from sqlalchemy import select
+
+    return db.session.execute(select(User.id).where(User.username == username)).scalar()
@@ -1,110 +1,568 @@
 """Modelo de Venta con SQLAlchemy ORM."""
 
-from datetime import datetime
+import hashlib
+import json
+from collections import defaultdict
+from datetime import datetime, timedelta
 
-from models.producto import obtener_producto_por_id
-from models_alchemy import DetalleVenta, Producto, User, Venta, db
+from models.agregados import acumular_venta_periodos
+from models.busqueda import condicion_busqueda, indexar_venta
+from models.percentiles import acumular_digest_venta
+from models.producto import descontar_stock, obtener_productos_por_ids
+from models.resumen import (
+    GENERACION_VENTAS,
+    acumular_venta_diaria,
+    acumular_ventas_productos,
+    incrementar_generacion,
+)
+from models.top_productos import acumular_sketch_productos
+from models_alchemy import ClaveIdempotencia, DetalleVenta, Producto, User, Venta, db
+from services.escritor_ventas import escritor_activo
 
 
-def registrar_venta(productos_cantidades, usuario_id=None):
+def registrar_venta(productos_cantidades, usuario_id=None, productos=None):
     """Registra una venta con sus detalles y actualiza stock.
 
+    Los productos del carrito se cargan con una sola consulta (o se toman de
+    ``productos`` si el llamador ya los cargó) y la validación y el precio
+    se calculan sobre esa misma foto, sin volver a leerlos por línea. El
+    stock se reserva con ``descontar_stock``, que vuelve a comprobarlo en la
+    base: si otra venta se llevó las unidades entre la lectura y el
+    descuento, la venta se rechaza sin escribir nada.
+
     Args:
         productos_cantidades: lista de dicts [{"id": 1, "cantidad": 2}, ...]
         usuario_id: ID del usuario que realiza la venta
+        productos: dict {id: Producto} de ``obtener_productos_por_ids`` con
+            los productos del carrito (opcional)
 
     Returns:
         tuple: (exito: bool, mensaje: str)
     """
+    exito, mensaje, _ = _registrar_venta(productos_cantidades, usuario_id, productos)
+    return exito, mensaje
+
+
+def registrar_venta_idempotente(productos_cantidades, usuario_id, clave=None):
+    """Registra una venta una sola vez por ``clave`` (generada por el cliente).
+
+    La clave se guarda junto con el resultado en la misma transacción que la
+    venta. Si el cliente reintenta con la misma clave y el mismo carrito
+    (p. ej. tras un corte de red) se devuelve el resultado original sin
+    registrar otra venta; si dos reintentos llegan a la vez, el segundo
+    choca con la clave primaria del primero y también recibe el original.
+
+    Args:
+        productos_cantidades: lista de dicts [{"id": 1, "cantidad": 2}, ...]
+        usuario_id: ID del usuario que realiza la venta
+        clave: clave de idempotencia (hasta 100 caracteres); sin clave la
+            venta se registra sin protección contra reintentos
+
+    Returns:
+        tuple: (estado, datos) donde estado es "creada" o "repetida" (datos
+        es el dict con ``venta_id``, ``fecha``, ``total`` y
+        ``stock_restante``), "conflicto" (la clave ya se usó con otro
+        carrito) o "rechazada" (datos es el mensaje de error).
+    """
+    if clave is None:
+        exito, mensaje, resultado = _registrar_venta(
+            productos_cantidades, usuario_id, None
+        )
+        return ("creada", resultado) if exito else ("rechazada", mensaje)
+
+    huella = _huella_carrito(productos_cantidades)
+    previa = _buscar_clave_idempotencia(usuario_id, clave)
+    if previa is None:
+        exito, mensaje, resultado = _registrar_venta(
+            productos_cantidades, usuario_id, None, (clave, huella)
+        )
+        if exito:
+            return "creada", resultado
+        # Otro reintento con la misma clave pudo ganar la carrera
+        previa = _buscar_clave_idempotencia(usuario_id, clave)
+        if previa is None:
+            return "rechazada", mensaje
+
+    if previa.huella != huella:
+        return "conflicto", "La clave de idempotencia ya se usó con otro carrito."
+    return "repetida", json.loads(previa.respuesta)
+
+
+def _huella_carrito(productos_cantidades):
+    """SHA-256 de las líneas (producto_id, cantidad) del carrito, ordenadas.
+
+    Un reintento equivalente (``"id": "1"`` en lugar de ``1``, claves extra
+    u otro orden de las líneas) da la misma huella.
+    """
     try:
-        # Validación adicional: lista no vacía
-        if not productos_cantidades or len(productos_cantidades) == 0:
-            return False, "La venta debe contener al menos un producto."
+        lineas = sorted(
+            (int(item["id"]), int(item["cantidad"])) for item in productos_cantidades
+        )
+    except (KeyError, ValueError, TypeError):
+        # Carrito inválido: _escribir_venta lo rechaza sin guardar la clave
+        lineas = productos_cantidades
+    return hashlib.sha256(
+        json.dumps(lineas, sort_keys=True, default=str).encode()
+    ).hexdigest()
 
-        total = 0
 
-        # Validar y calcular total
-        for item in productos_cantidades:
-            try:
-                producto_id = int(item["id"])
-                cantidad = int(item["cantidad"])
-            except (KeyError, ValueError, TypeError):
-                return False, "Estructura de datos de productos inválida."
+def _buscar_clave_idempotencia(usuario_id, clave):
+    return db.session.get(ClaveIdempotencia, (usuario_id or 0, clave))
 
-            # Validar cantidad
-            if cantidad <= 0:
-                return False, "La cantidad de cada producto debe ser mayor a 0."
 
-            producto = obtener_producto_por_id(producto_id)
+def purgar_claves_idempotencia(horas, tamano_lote=1000):
+    """Elimina las claves de idempotencia creadas hace más de ``horas``.
 
-            if not producto:
-                return False, f"Producto con ID {producto_id} no encontrado."
+    Se borra por lotes de ``tamano_lote`` claves, con un commit por lote,
+    para no bloquear la tabla mientras la API registra ventas.
 
-            if producto["stock"] < cantidad:
-                return False, (
-                    f"Stock insuficiente para '{producto['nombre']}'. "
-                    f"Disponible: {producto['stock']}, solicitado: {cantidad}"
-                )
+    Returns:
+        int: cantidad de claves eliminadas
+    """
+    from sqlalchemy import delete, select, tuple_
+
+    limite = datetime.now() - timedelta(hours=horas)
+    pk = tuple_(ClaveIdempotencia.usuario_id, ClaveIdempotencia.clave)
+    eliminadas = 0
+    while True:
+        lote = db.session.execute(
+            select(ClaveIdempotencia.usuario_id, ClaveIdempotencia.clave)
+            .where(ClaveIdempotencia.creada < limite)
+            .limit(tamano_lote)
+        ).all()
+        if not lote:
+            return eliminadas
+        db.session.execute(
+            delete(ClaveIdempotencia)
+            .where(pk.in_([tuple(fila) for fila in lote]))
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        eliminadas += len(lote)
+
+
+def _registrar_venta(productos_cantidades, usuario_id, productos, clave=None):
+    """Implementación de ``registrar_venta``.
+
+    ``clave`` es (clave, huella) para guardar la clave de idempotencia con
+    la venta. Si hay un escritor de ventas activo
+    (``services.escritor_ventas``) la venta se le delega y se espera su
+    resultado; ``productos`` se ignora, ya que el escritor usa su propia
+    sesión.
+
+    Returns:
+        tuple: (exito, mensaje, resultado); ``resultado`` es None si falla.
+    """
+    escritor = escritor_activo()
+    if escritor is not None:
+        return escritor.registrar(productos_cantidades, usuario_id, clave)
 
-            total += producto["precio"] * cantidad
+    try:
+        exito, mensaje, resultado = _escribir_venta(
+            productos_cantidades, usuario_id, productos, clave
+        )
+        if exito:
+            db.session.commit()
+        else:
+            db.session.rollback()
+        return exito, mensaje, resultado
+    except Exception as e:
+        db.session.rollback()
+        return False, str(e), None
+
+
+def _escribir_venta(productos_cantidades, usuario_id, productos=None, clave=None):
+    """Valida y escribe una venta en la transacción actual, sin commit.
+
+    Si devuelve ``exito`` False puede haber descontado parte del stock:
+    quien llama debe deshacer la transacción (o el savepoint) completa.
+
+    Returns:
+        tuple: (exito, mensaje, resultado)
+    """
+    from sqlalchemy import insert, select
 
-        # Crear venta
-        fecha = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        venta = Venta(fecha=fecha, total=total, usuario_id=usuario_id)
-        db.session.add(venta)
-        db.session.flush()  # Obtener el ID de la venta
-        venta_id = venta.id
+    # Validación adicional: lista no vacía
+    if not productos_cantidades or len(productos_cantidades) == 0:
+        return False, "La venta debe contener al menos un producto.", None
 
-        # Insertar detalles y actualizar stock
-        for item in productos_cantidades:
+    lineas = []
+    for item in productos_cantidades:
+        try:
             producto_id = int(item["id"])
             cantidad = int(item["cantidad"])
-            producto = obtener_producto_por_id(producto_id)
-            subtotal = producto["precio"] * cantidad
+        except (KeyError, ValueError, TypeError):
+            return False, "Estructura de datos de productos inválida.", None
 
-            # Crear detalle de venta
-            detalle = DetalleVenta(
+        # Validar cantidad
+        if cantidad <= 0:
+            return False, "La cantidad de cada producto debe ser mayor a 0.", None
+        lineas.append((producto_id, cantidad))
+
+    if productos is None:
+        productos = obtener_productos_por_ids(pid for pid, _ in lineas)
+
+    # Validar existencia y stock; las líneas de un mismo producto se suman
+    solicitado = defaultdict(int)
+    for producto_id, cantidad in lineas:
+        if producto_id not in productos:
+            return False, f"Producto con ID {producto_id} no encontrado.", None
+        solicitado[producto_id] += cantidad
+    for producto_id, cantidad in solicitado.items():
+        producto = productos[producto_id]
+        if producto.stock < cantidad:
+            return (
+                False,
+                f"Stock insuficiente para '{producto.nombre}'. "
+                f"Disponible: {producto.stock}, solicitado: {cantidad}",
+                None,
+            )
+
+    detalles = [
+        (producto_id, cantidad, productos[producto_id].precio * cantidad)
+        for producto_id, cantidad in lineas
+    ]
+    total = sum(subtotal for _, _, subtotal in detalles)
+
+    # Reservar stock en la base, en orden de ID. La validación de arriba
+    # es sobre la foto leída; este UPDATE condicional es el que decide.
+    for producto_id, cantidad in sorted(solicitado.items()):
+        if not descontar_stock(producto_id, cantidad):
+            nombre, disponible = db.session.execute(
+                select(Producto.nombre, Producto.stock).where(
+                    Producto.id == producto_id
+                )
+            ).one()
+            return (
+                False,
+                f"Stock insuficiente para '{nombre}'. "
+                f"Disponible: {disponible}, solicitado: {cantidad}",
+                None,
+            )
+
+    # Crear venta
+    fecha = datetime.now().replace(microsecond=0)
+    venta = Venta(fecha=fecha, total=total, usuario_id=usuario_id)
+    db.session.add(venta)
+    db.session.flush()  # Obtener el ID de la venta
+    venta_id = venta.id
+
+    # Insertar detalles: un solo INSERT de varias filas, sin objetos ORM
+    db.session.execute(
+        insert(DetalleVenta),
+        [
+            {
+                "venta_id": venta_id,
+                "producto_id": producto_id,
+                "cantidad": cantidad,
+                "subtotal": subtotal,
+            }
+            for producto_id, cantidad, subtotal in detalles
+        ],
+    )
+
+    # Resúmenes del dashboard, en la misma transacción que la venta
+    acumular_ventas_productos(fecha, detalles)
+    acumular_venta_diaria(fecha, usuario_id, total)
+
+    usuario = db.session.get(User, usuario_id) if usuario_id else None
+    indexar_venta(
+        venta_id,
+        usuario.username if usuario else None,
+        [productos[producto_id].nombre for producto_id, _ in lineas],
+    )
+
+    resultado = {
+        "venta_id": venta_id,
+        "fecha": fecha.isoformat(),
+        "total": total,
+        "stock_restante": {
+            str(producto_id): productos[producto_id].stock
+            for producto_id in sorted(solicitado)
+        },
+    }
+    if clave is not None:
+        db.session.add(
+            ClaveIdempotencia(
+                usuario_id=usuario_id or 0,
+                clave=clave[0],
+                huella=clave[1],
                 venta_id=venta_id,
-                producto_id=producto_id,
-                cantidad=cantidad,
-                subtotal=subtotal,
+                respuesta=json.dumps(resultado),
+                creada=fecha,
             )
-            db.session.add(detalle)
+        )
+        db.session.flush()  # una clave repetida falla aquí y no en el commit
 
-            # Actualizar stock del producto
-            prod_obj = db.session.get(Producto, producto_id)
-            if prod_obj:
-                prod_obj.stock = max(prod_obj.stock - cantidad, 0)
+    # Al final, las filas que comparten muchas ventas (el mes, las
+    # generaciones): quedan bloqueadas hasta el commit y así el bloqueo dura
+    # lo menos posible
+    acumular_sketch_productos(fecha, usuario_id, solicitado.items())
+    acumular_digest_venta(fecha, usuario_id, total)
+    acumular_venta_periodos(fecha, total)
+    incrementar_generacion(GENERACION_VENTAS)
 
-        db.session.commit()
-        return True, "Venta registrada exitosamente."
+    return True, "Venta registrada exitosamente.", resultado
 
-    except Exception as e:
-        db.session.rollback()
-        return False, str(e)
 
+def condiciones_filtro_ventas(
+    search_query="",
+    fecha_desde="",
+    fecha_hasta="",
+    usuario_filtro="",
+    monto_minimo="",
+):
+    """Traduce los filtros del listado de registros a condiciones WHERE.
+
+    Replica la semántica de ``services.ventas_service.filter_ventas``:
+    búsqueda libre por ID, usuario o nombre de producto, rango de fechas
+    inclusivo, usuario por coincidencia parcial y monto mínimo. Los valores
+    inválidos se ignoran igual que en el filtrado en memoria.
 
-def obtener_ventas():
-    """Devuelve todas las ventas con información del usuario."""
+    Si existe el índice de ``models.busqueda``, la búsqueda libre lo usa y
+    compara cada palabra como prefijo en lugar de como subcadena.
+
+    Returns:
+        list: condiciones de SQLAlchemy para usar con ``.where(*condiciones)``
+    """
+    from sqlalchemy import String, cast, exists, or_, select
+    from sqlalchemy.orm import aliased
+
+    condiciones = []
+
+    q = (search_query or "").strip().lower()
+    busqueda_indexada = condicion_busqueda(q, Venta.id) if q else None
+    if busqueda_indexada is not None:
+        # Índice de texto completo (models.busqueda): palabras por prefijo
+        condiciones.append(busqueda_indexada)
+    elif q:
+        # Alias propios para que la subconsulta no se correlacione con una
+        # consulta externa que ya haga JOIN a detalle_ventas/productos.
+        detalle, producto = aliased(DetalleVenta), aliased(Producto)
+        producto_coincide = exists(
+            select(detalle.id)
+            .join(producto, detalle.producto_id == producto.id)
+            .where(
+                detalle.venta_id == Venta.id,
+                producto.nombre.icontains(q, autoescape=True),
+            )
+        )
+        condiciones.append(
+            or_(
+                cast(Venta.id, String).contains(q, autoescape=True),
+                User.username.icontains(q, autoescape=True),
+                producto_coincide,
+            )
+        )
+
+    # Rangos de fecha sobre la columna DateTime indexada: [desde, hasta + 1 día)
+    if fecha_desde:
+        try:
+            desde = datetime.strptime(fecha_desde, "%Y-%m-%d")
+            condiciones.append(Venta.fecha >= desde)
+        except ValueError:
+            pass
+
+    if fecha_hasta:
+        try:
+            hasta = datetime.strptime(fecha_hasta, "%Y-%m-%d") + timedelta(days=1)
+            condiciones.append(Venta.fecha < hasta)
+        except ValueError:
+            pass
+
+    if usuario_filtro:
+        uf = usuario_filtro.strip().lower()
+        condiciones.append(User.username.icontains(uf, autoescape=True))
+
+    if monto_minimo:
+        try:
+            condiciones.append(Venta.total >= float(monto_minimo))
+        except (ValueError, TypeError):
+            pass
+
+    return condiciones
+
+
+def _venta_a_dict(fila):
+    """Convierte una fila (Venta, username) al dict usado por rutas y servicios."""
+    venta, username = fila
+    return {
+        "id": venta.id,
+        "fecha": venta.fecha,
+        "total": venta.total,
+        "usuario_id": venta.usuario_id,
+        "username": username or "-",
+    }
+
+
+def obtener_ventas(limit=None, offset=0, **filtros):
+    """Devuelve las ventas con información del usuario.
+
+    Sin argumentos devuelve todas las ventas. Acepta los mismos filtros que
+    ``condiciones_filtro_ventas`` y una ventana ``limit``/``offset`` que se
+    resuelve en la base de datos.
+    """
     from sqlalchemy import desc, select
 
     stmt = (
         select(Venta, User.username)
         .outerjoin(User, Venta.usuario_id == User.id)
-        .order_by(desc(Venta.fecha))
+        .where(*condiciones_filtro_ventas(**filtros))
+        .order_by(desc(Venta.fecha), desc(Venta.id))
     )
+    if limit is not None:
+        stmt = stmt.limit(limit).offset(offset)
     ventas = db.session.execute(stmt).all()
 
-    return [
-        {
-            "id": v[0].id,
-            "fecha": v[0].fecha,
-            "total": v[0].total,
-            "usuario_id": v[0].usuario_id,
-            "username": v[1] or "-",
-        }
-        for v in ventas
-    ]
+    return [_venta_a_dict(v) for v in ventas]
+
+
+def contar_ventas(limite=None, **filtros):
+    """Cuenta las ventas que cumplen los filtros con un COUNT en la base de datos.
+
+    Con ``limite`` se deja de contar al llegar a ese número, de modo que el
+    costo no crece con el total de ventas.
+    """
+    from sqlalchemy import func, select
+
+    if limite is not None:
+        filas = (
+            select(Venta.id)
+            .outerjoin(User, Venta.usuario_id == User.id)
+            .where(*condiciones_filtro_ventas(**filtros))
+            .limit(limite)
+            .subquery()
+        )
+        return db.session.execute(select(func.count()).select_from(filas)).scalar_one()
+
+    stmt = (
+        select(func.count(Venta.id))
+        .select_from(Venta)
+        .outerjoin(User, Venta.usuario_id == User.id)
+        .where(*condiciones_filtro_ventas(**filtros))
+    )
+    return db.session.execute(stmt).scalar_one()
+
+
+def obtener_pagina_ventas(page=1, per_page=10, **filtros):
+    """Devuelve solo la página solicitada de ventas filtradas.
+
+    Returns:
+        tuple: (ventas, page, per_page, total_items, total_pages), con la misma
+        forma que ``services.ventas_service.paginate``.
+    """
+    from services.ventas_service import calcular_paginacion
+
+    total_items = contar_ventas(**filtros)
+    page, per_page, total_pages = calcular_paginacion(total_items, page, per_page)
+    ventas = obtener_ventas(limit=per_page, offset=(page - 1) * per_page, **filtros)
+    return ventas, page, per_page, total_items, total_pages
+
+
+def obtener_ventas_keyset(despues_de=None, antes_de=None, per_page=10, **filtros):
+    """Devuelve una página de ventas con paginación por clave (seek).
+
+    Las ventas se listan por ``(fecha, id)`` descendente. En lugar de OFFSET
+    se filtra a partir de la posición de la última fila vista, por lo que el
+    costo de una página no depende de su profundidad.
+
+    Args:
+        despues_de: tupla ``(fecha, id)``; devuelve las ventas que siguen a esa
+            posición en el listado (más antiguas)
+        antes_de: tupla ``(fecha, id)``; devuelve las ventas que la preceden
+            (más recientes). Se ignora si se indica ``despues_de``.
+        per_page: tamaño de página
+        **filtros: mismos filtros que ``condiciones_filtro_ventas``
+
+    ``fecha`` es un ``datetime``, como el que devuelve
+    ``services.ventas_service.decodificar_cursor``.
+
+    Returns:
+        tuple: (ventas, hay_mas) donde ``ventas`` está en orden de listado y
+        ``hay_mas`` indica si existen más filas en la dirección recorrida.
+    """
+    from sqlalchemy import asc, desc, select, tuple_
+
+    # Comparación de filas (fecha, id): el motor la resuelve como un rango
+    # sobre ix_ventas_fecha_id en lugar de recorrer el índice desde el inicio
+    posicion = tuple_(Venta.fecha, Venta.id)
+    stmt = (
+        select(Venta, User.username)
+        .outerjoin(User, Venta.usuario_id == User.id)
+        .where(*condiciones_filtro_ventas(**filtros))
+    )
+
+    if despues_de is not None:
+        fecha, venta_id = despues_de
+        stmt = stmt.where(posicion < (fecha, venta_id)).order_by(
+            desc(Venta.fecha), desc(Venta.id)
+        )
+    elif antes_de is not None:
+        fecha, venta_id = antes_de
+        stmt = stmt.where(posicion > (fecha, venta_id)).order_by(
+            asc(Venta.fecha), asc(Venta.id)
+        )
+    else:
+        stmt = stmt.order_by(desc(Venta.fecha), desc(Venta.id))
+
+    # Una fila extra indica si hay otra página sin necesidad de un COUNT
+    filas = db.session.execute(stmt.limit(per_page + 1)).all()
+    hay_mas = len(filas) > per_page
+    filas = filas[:per_page]
+    if despues_de is None and antes_de is not None:
+        filas.reverse()
+
+    return [_venta_a_dict(v) for v in filas], hay_mas
+
+
+def iterar_ventas_exportacion(tamano_lote=1000, **filtros):
+    """Recorre las ventas filtradas para exportar, fila por fila.
+
+    Una sola consulta une ``ventas``, ``usuarios`` y ``detalle_ventas`` y
+    agrega en la base de datos la cantidad de items y los nombres de
+    producto de cada venta. Se ejecuta con ``stream_results`` (cursor del
+    lado del servidor en Postgres) y se consume en lotes de ``tamano_lote``,
+    por lo que la memoria no crece con la cantidad de filas.
+
+    Yields:
+        tuple: (id, fecha, username, cantidad_items, total, productos)
+    """
+    from sqlalchemy import desc, func, literal, select
+
+    if db.session.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import aggregate_order_by
+
+        productos = func.string_agg(
+            Producto.nombre, aggregate_order_by(literal(", "), DetalleVenta.id)
+        )
+    else:
+        productos = func.group_concat(Producto.nombre, ", ")
+
+    stmt = (
+        select(
+            Venta.id,
+            Venta.fecha,
+            User.username,
+            func.coalesce(func.sum(DetalleVenta.cantidad), 0),
+            Venta.total,
+            func.coalesce(productos, ""),
+        )
+        .outerjoin(User, Venta.usuario_id == User.id)
+        .outerjoin(DetalleVenta, DetalleVenta.venta_id == Venta.id)
+        .outerjoin(Producto, DetalleVenta.producto_id == Producto.id)
+        .where(*condiciones_filtro_ventas(**filtros))
+        .group_by(Venta.id, Venta.fecha, User.username, Venta.total)
+        .order_by(desc(Venta.fecha), desc(Venta.id))
+    )
+
+    resultado = db.session.execute(
+        stmt, execution_options={"stream_results": True, "yield_per": tamano_lote}
+    )
+    try:
+        for venta_id, fecha, username, cantidad, total, nombres in resultado:
+            yield venta_id, fecha, username or "-", cantidad, total, nombres
+    finally:
+        resultado.close()
 
 
 def obtener_detalle_venta(venta_id):
@@ -121,9 +579,93 @@ def obtener_detalle_venta(venta_id):
     return [
         {
             "id": d[0].id,
+            "producto_id": d[0].producto_id,
             "nombre": d[1],
             "cantidad": d[0].cantidad,
             "subtotal": d[0].subtotal,
         }
         for d in detalles
     ]
+
+
+def obtener_detalles_ventas(venta_ids, tamano_lote=500):
+    """Devuelve los productos de muchas ventas agrupados por venta.
+
+    Reemplaza llamadas repetidas a ``obtener_detalle_venta``: resuelve los
+    detalles con un JOIN por cada lote de ``tamano_lote`` IDs usando
+    ``IN (...)``, manteniendo cada consulta por debajo del límite de
+    parámetros de SQLite.
+
+    Args:
+        venta_ids: iterable de IDs de venta
+        tamano_lote: cantidad máxima de IDs por consulta
+
+    Returns:
+        dict: {venta_id: [detalle, ...]} con la misma forma de detalle que
+        ``obtener_detalle_venta``. Las ventas sin detalles mapean a ``[]``.
+    """
+    from sqlalchemy import select
+
+    ids = list(dict.fromkeys(venta_ids))
+    detalles_por_venta = {venta_id: [] for venta_id in ids}
+
+    for inicio in range(0, len(ids), tamano_lote):
+        lote = ids[inicio : inicio + tamano_lote]
+        stmt = (
+            select(DetalleVenta, Producto.nombre)
+            .join(Producto, DetalleVenta.producto_id == Producto.id)
+            .where(DetalleVenta.venta_id.in_(lote))
+            .order_by(DetalleVenta.venta_id, DetalleVenta.id)
+        )
+        for d in db.session.execute(stmt).all():
+            detalles_por_venta[d[0].venta_id].append(
+                {
+                    "id": d[0].id,
+                    "producto_id": d[0].producto_id,
+                    "nombre": d[1],
+                    "cantidad": d[0].cantidad,
+                    "subtotal": d[0].subtotal,
+                }
+            )
+
+    return detalles_por_venta
+
+
+def normalizar_fechas_legado(tamano_lote=5000):
+    """Normaliza en SQLite las fechas de ventas guardadas como texto plano.
+
+    Las versiones anteriores guardaban ``fecha`` como "%Y-%m-%d %H:%M:%S".
+    SQLite no cambia el tipo de una columna existente, y el tipo ``DateTime``
+    de SQLAlchemy almacena "%Y-%m-%d %H:%M:%S.%f": sin normalizar, la
+    igualdad con un parámetro datetime (paginación por cursor) fallaría.
+    Se actualiza por lotes de ``tamano_lote`` IDs, con un commit por lote.
+
+    Returns:
+        int: cantidad de ventas actualizadas (0 fuera de SQLite)
+    """
+    from sqlalchemy import func, select, update
+
+    if db.session.get_bind().dialect.name != "sqlite":
+        return 0
+
+    minimo, maximo = db.session.execute(
+        select(func.min(Venta.id), func.max(Venta.id))
+    ).one()
+    if minimo is None:
+        return 0
+
+    columna = Venta.__table__.c.fecha
+    actualizadas = 0
+    for inicio in range(minimo, maximo + 1, tamano_lote):
+        resultado = db.session.execute(
+            update(Venta.__table__)
+            .where(
+                Venta.id >= inicio,
+                Venta.id < inicio + tamano_lote,
+                func.length(columna) == 19,
+            )
+            .values(fecha=func.printf("%s.000000", columna))
+        )
+        db.session.commit()
+        actualizadas += resultado.rowcount
+    return actualizadas
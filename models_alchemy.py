@@ -1,6 +1,30 @@
+from flask import g, has_app_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
 
-db = SQLAlchemy()
+
+class SesionConReplica(Session):
+    """Sesión que envía los SELECT a la réplica de lectura si la vista la pidió.
+
+    ``services.replica_lectura.usar_replica`` deja el engine de la réplica en
+    ``g`` cuando está disponible y al día; las escrituras y los flush siguen
+    yendo siempre a la base principal.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and not self._flushing
+            and getattr(clause, "is_select", False)
+            and has_app_context()
+        ):
+            motor = g.get("kairos_motor_lectura")
+            if motor is not None:
+                return motor
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={"class_": SesionConReplica})
 
 
 class User(db.Model):
@@ -15,25 +39,152 @@ class User(db.Model):
 class Producto(db.Model):
     __tablename__ = "productos"
     id = db.Column(db.Integer, primary_key=True)
-    nombre = db.Column(db.String, nullable=False)
+    nombre = db.Column(db.String, nullable=False, index=True)
     precio = db.Column(db.Float, nullable=False)
     stock = db.Column(db.Integer, nullable=False)
-    categoria = db.Column(db.String, nullable=True)
+    categoria = db.Column(db.String, nullable=True, index=True)
     codigo_barras = db.Column(db.String, unique=True, nullable=True)
 
 
 class Venta(db.Model):
     __tablename__ = "ventas"
+    __table_args__ = (
+        # Orden del listado y paginación por cursor: (fecha, id)
+        db.Index("ix_ventas_fecha_id", "fecha", "id"),
+        # Ventas de un usuario en un rango de fechas (y la FK a usuarios)
+        db.Index("ix_ventas_usuario_id_fecha", "usuario_id", "fecha"),
+    )
     id = db.Column(db.Integer, primary_key=True)
-    fecha = db.Column(db.String, nullable=False)
+    fecha = db.Column(db.DateTime, nullable=False)
     total = db.Column(db.Float, nullable=False)
     usuario_id = db.Column(db.Integer, db.ForeignKey("usuarios.id"), nullable=True)
 
 
 class DetalleVenta(db.Model):
     __tablename__ = "detalle_ventas"
+    __table_args__ = (
+        # Ventas de un producto (y la FK a productos)
+        db.Index("ix_detalle_ventas_producto_id_venta_id", "producto_id", "venta_id"),
+    )
     id = db.Column(db.Integer, primary_key=True)
-    venta_id = db.Column(db.Integer, db.ForeignKey("ventas.id"), nullable=False)
+    venta_id = db.Column(
+        db.Integer, db.ForeignKey("ventas.id"), nullable=False, index=True
+    )
     producto_id = db.Column(db.Integer, db.ForeignKey("productos.id"), nullable=False)
     cantidad = db.Column(db.Integer, nullable=False)
     subtotal = db.Column(db.Float, nullable=False)
+
+
+class VentaDiaria(db.Model):
+    """Resumen de ventas por día y usuario, mantenido al registrar cada venta.
+
+    ``usuario_id`` es 0 para ventas sin usuario, ya que forma parte de la
+    clave primaria y no admite NULL.
+    """
+
+    __tablename__ = "ventas_diarias"
+    dia = db.Column(db.String(10), primary_key=True)
+    usuario_id = db.Column(db.Integer, primary_key=True, default=0)
+    cantidad = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Float, nullable=False, default=0)
+    minimo = db.Column(db.Float, nullable=False)
+    maximo = db.Column(db.Float, nullable=False)
+
+
+class VentaMensual(db.Model):
+    """Ventas por mes ("%Y-%m").
+
+    En SQLite se mantiene al registrar cada venta. En Postgres se usa en su
+    lugar la vista materializada ``ventas_mensuales_mv`` con las mismas
+    columnas (ver ``models.agregados``).
+    """
+
+    __tablename__ = "ventas_mensuales"
+    mes = db.Column(db.String(7), primary_key=True)
+    cantidad = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Float, nullable=False, default=0)
+
+
+class VentaSemanal(db.Model):
+    """Ventas por semana: lunes de la semana ("%Y-%m-%d") y año calendario.
+
+    El año forma parte de la clave porque el dashboard rotula cada semana
+    como "<año calendario>-W<semana ISO>", y una semana que cruza el año
+    se reparte en dos rótulos. Vista ``ventas_semanales_mv`` en Postgres.
+    """
+
+    __tablename__ = "ventas_semanales"
+    semana_inicio = db.Column(db.String(10), primary_key=True)
+    anio = db.Column(db.Integer, primary_key=True)
+    cantidad = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Float, nullable=False, default=0)
+
+
+class Generacion(db.Model):
+    """Contador que se incrementa con cada cambio de un conjunto de datos.
+
+    Permite saber si un resultado calculado (p. ej. el dashboard de
+    registros) sigue vigente comparando un número en lugar de recalcularlo.
+    """
+
+    __tablename__ = "generaciones"
+    clave = db.Column(db.String(50), primary_key=True)
+    valor = db.Column(db.Integer, nullable=False, default=0)
+
+
+class SketchProductos(db.Model):
+    """Resumen Space-Saving de unidades vendidas por producto en un período y usuario.
+
+    ``periodo`` es un día ("%Y-%m-%d") o un mes ("%Y-%m"); ``usuario_id`` es
+    0 para ventas sin usuario y para los resúmenes reconstruidos, que no
+    distinguen usuarios. ``datos`` es el JSON de
+    ``services.space_saving.SpaceSaving.a_dict``.
+    """
+
+    __tablename__ = "sketches_productos"
+    periodo = db.Column(db.String(10), primary_key=True)
+    usuario_id = db.Column(db.Integer, primary_key=True, default=0)
+    datos = db.Column(db.Text, nullable=False)
+
+
+class DigestVentas(db.Model):
+    """t-digest de los totales de venta por período y usuario.
+
+    ``periodo`` es un día ("%Y-%m-%d") o un mes ("%Y-%m"); ``usuario_id`` es
+    0 para ventas sin usuario, como en ``ventas_diarias``. ``datos`` es el
+    JSON de ``services.tdigest.TDigest.a_dict``.
+    """
+
+    __tablename__ = "digests_ventas"
+    periodo = db.Column(db.String(10), primary_key=True)
+    usuario_id = db.Column(db.Integer, primary_key=True, default=0)
+    datos = db.Column(db.Text, nullable=False)
+
+
+class VentaProductoDiaria(db.Model):
+    """Unidades e ingresos por producto y día, mantenido al registrar cada venta."""
+
+    __tablename__ = "ventas_productos_diarias"
+    dia = db.Column(db.String(10), primary_key=True)
+    producto_id = db.Column(db.Integer, primary_key=True)
+    unidades = db.Column(db.Integer, nullable=False, default=0)
+    ingresos = db.Column(db.Float, nullable=False, default=0)
+
+
+class ClaveIdempotencia(db.Model):
+    """Resultado de una venta registrada por la API con una clave de idempotencia.
+
+    La clave la genera el cliente y es única por usuario. ``huella`` es el
+    SHA-256 de las líneas (producto_id, cantidad) del carrito y ``respuesta``
+    el JSON devuelto la primera vez, que se repite tal cual si el cliente
+    reintenta con la misma clave. Las claves se purgan pasadas
+    ``IDEMPOTENCIA_EXPIRACION_HORAS`` desde ``creada``.
+    """
+
+    __tablename__ = "claves_idempotencia"
+    usuario_id = db.Column(db.Integer, primary_key=True)
+    clave = db.Column(db.String(100), primary_key=True)
+    huella = db.Column(db.String(64), nullable=False)
+    venta_id = db.Column(db.Integer, db.ForeignKey("ventas.id"), nullable=False)
+    respuesta = db.Column(db.Text, nullable=False)
+    creada = db.Column(db.DateTime, nullable=False, index=True)
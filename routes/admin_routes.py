@@ -7,6 +7,7 @@ autorización de administrador.
 
 from flask import (
     Blueprint,
+    current_app,
     flash,
     g,
     jsonify,
@@ -24,6 +25,7 @@ from services.admin_service import (
     obtener_usuarios,
     verificar_username_disponible,
 )
+from services.pool_conexiones import estado_pool, metricas_pool
 from utils.decorators import admin_required
 from utils.logging_config import get_logger
 
@@ -133,3 +135,23 @@ def verificar_username(username):
     """Verifica si un username está disponible (AJAX)."""
     disponible = verificar_username_disponible(username, g.usuario["username"])
     return jsonify({"disponible": disponible})
+
+
+@admin_bp.route("/pool", methods=["GET"])
+@admin_required
+def admin_pool():
+    """Configuración, ocupación y métricas de espera del pool de conexiones.
+
+    Cada worker tiene su propio pool: la respuesta es la del worker que
+    atendió el request (``estado.pid``). Si hay réplica de lectura, su pool
+    se informa aparte junto con el último retraso medido.
+    """
+    datos = {"estado": estado_pool(db.engine), "metricas": metricas_pool(db.engine)}
+    replica = current_app.extensions.get("kairos_replica")
+    if replica is not None:
+        datos["replica"] = {
+            **replica.resumen(),
+            "estado": estado_pool(replica.motor),
+            "metricas": metricas_pool(replica.motor),
+        }
+    return jsonify(datos)
@@ -12,6 +12,7 @@ from flask import (
 )
 
 from models.producto import obtener_productos
+from services.replica_lectura import lectura_en_replica
 from services.ventas_service import paginate
 from utils.logging_config import get_logger
 
@@ -45,6 +46,7 @@ def admin_required(f):
 @inventario_bp.route("/")
 @login_required
 @admin_required
+@lectura_en_replica
 def inventario_view():
     logger.info(f"Admin {g.usuario['username']} accedió a inventario")
     productos_list = obtener_productos()
@@ -107,33 +109,16 @@ def inventario_view():
         ]
     )
 
-    # Obtener producto más vendido (de las ventas registradas)
-    from models.venta import obtener_detalle_venta, obtener_ventas
+    # Obtener producto más vendido (resumen por producto, agrupado por producto_id)
+    from models.resumen import obtener_productos_mas_vendidos
 
-    ventas_list = obtener_ventas()
     producto_mas_vendido = None
-    ventas_por_producto = {}
-
-    for venta in ventas_list:
-        detalles = obtener_detalle_venta(venta["id"])
-        for detalle in detalles:
-            producto_id = detalle["id"]
-            cantidad = detalle["cantidad"]
-            ventas_por_producto[producto_id] = (
-                ventas_por_producto.get(producto_id, 0) + cantidad
-            )
-
-    if ventas_por_producto:
-        producto_id_mas_vendido = max(ventas_por_producto, key=ventas_por_producto.get)
-        cantidad_vendida = ventas_por_producto[producto_id_mas_vendido]
-        # Buscar el producto en la lista
-        for p in productos_list:
-            if p["id"] == producto_id_mas_vendido:
-                producto_mas_vendido = {
-                    "nombre": p["nombre"],
-                    "cantidad_vendida": cantidad_vendida,
-                }
-                break
+    top = obtener_productos_mas_vendidos(top_n=1)
+    if top:
+        producto_mas_vendido = {
+            "nombre": top[0]["nombre"],
+            "cantidad_vendida": top[0]["cantidad_vendida"],
+        }
 
     return render_template(
         "inventario.html",
@@ -159,6 +144,7 @@ def inventario_view():
 @inventario_bp.route("/sugerencias")
 @login_required
 @admin_required
+@lectura_en_replica
 def sugerencias_producto():
     q = request.args.get("q", "")
     logger.debug(f"Búsqueda de producto - Admin: {g.usuario['username']}, Query: {q}")
@@ -1,32 +1,65 @@
 """Rutas para el listado y visualización de registros de ventas."""
 
-import csv
-import io
-from datetime import datetime
+import os
+from datetime import date, datetime
 from functools import wraps
 from urllib.parse import urlencode
 
 from flask import (
     Blueprint,
+    Response,
+    current_app,
     flash,
     g,
+    jsonify,
     redirect,
     render_template,
     request,
     send_file,
+    stream_with_context,
     url_for,
 )
 
-from models.venta import obtener_detalle_venta, obtener_ventas
+from models.busqueda import buscar_ventas
+from models.percentiles import obtener_percentiles_ticket
+from models.resumen import (
+    GENERACION_PRODUCTOS,
+    GENERACION_VENTAS,
+    obtener_generaciones,
+    obtener_productos_mas_vendidos,
+    obtener_usuarios_con_ventas,
+    obtener_ventas_diarias,
+)
+from models.series import (
+    GRANULARIDADES,
+    desde_para_periodos,
+    inicio_de_periodo,
+    obtener_serie_ventas,
+)
+from models.top_productos import obtener_productos_mas_vendidos_aproximado
+from models.usuario import obtener_id_usuario
+from models.venta import (
+    contar_ventas,
+    iterar_ventas_exportacion,
+    obtener_detalles_ventas,
+    obtener_ventas,
+    obtener_ventas_keyset,
+)
+from services.cache_service import cache_de_app
+from services.exportacion_service import (
+    ESTADO_LISTO,
+    enviar_exportacion,
+    generar_csv_ventas,
+    obtener_estado_exportacion,
+    ruta_archivo_exportacion,
+)
+from services.replica_lectura import lectura_en_replica
 from services.ventas_service import (
-    estadisticas_del_dia,
-    estadisticas_generales,
-    filter_ventas,
-    paginate,
-    productos_mas_vendidos,
-    usuarios_unicos,
-    ventas_por_mes,
-    ventas_por_semana,
+    calcular_paginacion,
+    codificar_cursor,
+    decodificar_cursor,
+    estadisticas_del_dia_desde_resumen,
+    estadisticas_generales_desde_resumen,
 )
 from utils.logging_config import get_logger
 
@@ -61,16 +94,47 @@ def admin_required(f):
     return decorated
 
 
+def _calcular_dashboard():
+    """Estadísticas y top de productos del dashboard de registros.
+
+    Las series de los gráficos no se calculan aquí: el navegador las pide a
+    ``/registros/api/series`` después de cargar la página.
+    """
+    # Estadísticas desde el resumen diario (unas filas por día y usuario)
+    resumen = obtener_ventas_diarias()
+    return {
+        "estadisticas": estadisticas_del_dia_desde_resumen(resumen),
+        "estadisticas_general": estadisticas_generales_desde_resumen(resumen),
+        "top_productos": obtener_productos_mas_vendidos(top_n=5),
+        "percentiles_ticket": obtener_percentiles_ticket(),
+    }
+
+
+def obtener_dashboard():
+    """Devuelve el payload del dashboard, reutilizándolo mientras no haya cambios.
+
+    La versión combina las generaciones de ventas y productos (que
+    incrementan ``registrar_venta`` y la edición de productos) con la fecha
+    del día, ya que las estadísticas "de hoy" dependen de ella.
+    """
+    if not current_app.config.get("REGISTROS_CACHE_DASHBOARD", True):
+        return _calcular_dashboard()
+    version = obtener_generaciones(GENERACION_VENTAS, GENERACION_PRODUCTOS) + (
+        date.today(),
+    )
+    return cache_de_app(current_app).obtener(
+        "dashboard_registros", version, _calcular_dashboard
+    )
+
+
 @registros_bp.route("/")
 @login_required
 @admin_required
+@lectura_en_replica
 def listado_registros():
     """Lista registros de ventas con filtros avanzados."""
     logger.info(f"Usuario {g.usuario['username']} accedió a listado de registros")
 
-    # Obtener todas las ventas
-    ventas_list = obtener_ventas()
-
     # Obtener parámetros de filtro
     search_query = request.args.get("search", "").strip().lower()
     fecha_desde = request.args.get("fecha_desde", "").strip()
@@ -78,159 +142,363 @@ def listado_registros():
     usuario_filtro = request.args.get("usuario", "").strip()
     monto_minimo = request.args.get("monto_minimo", "").strip()
 
-    # Aplicar filtros (delegado a servicio)
-    ventas_filtradas = filter_ventas(
-        ventas_list,
-        obtener_detalle_venta,
-        search_query=search_query,
-        fecha_desde=fecha_desde,
-        fecha_hasta=fecha_hasta,
-        usuario_filtro=usuario_filtro,
-        monto_minimo=monto_minimo,
-    )
+    filtros = {
+        "search_query": search_query,
+        "fecha_desde": fecha_desde,
+        "fecha_hasta": fecha_hasta,
+        "usuario_filtro": usuario_filtro,
+        "monto_minimo": monto_minimo,
+    }
 
     # Lista única de usuarios para el dropdown
-    usuarios_unicos_list = usuarios_unicos(ventas_list)
-
-    # Estadísticas del día (delegado a servicio)
-    estadisticas = estadisticas_del_dia(ventas_list)
+    usuarios_unicos_list = obtener_usuarios_con_ventas()
 
-    # Estadísticas generales para dashboard
-    estadisticas_general = estadisticas_generales(ventas_list)
-
-    # Datos para gráficos
-    ventas_mensuales = ventas_por_mes(ventas_list, meses_atras=6)
-    ventas_semanales = ventas_por_semana(ventas_list, semanas_atras=8)
-    top_productos = productos_mas_vendidos(ventas_list, obtener_detalle_venta, top_n=5)
+    # Estadísticas y datos para gráficos (cacheados por generación de ventas)
+    dashboard = obtener_dashboard()
+    estadisticas_general = dashboard["estadisticas_general"]
 
     # Fecha actual para el template
     now = datetime.now()
 
-    logger.info(
-        f"Listado de registros - Usuario: {g.usuario['username']}, "
-        f"Total: {len(ventas_list)}, Filtradas: {len(ventas_filtradas)}"
-    )
-
-    # --- Paginación --- (delegado al servicio)
+    # --- Paginación ---
+    # Con pocos resultados se mantienen los enlaces numerados (COUNT +
+    # LIMIT/OFFSET). Con muchos, o si llega un cursor, se pagina por clave
+    # (fecha, id) para que una página profunda cueste lo mismo que la primera.
     page_arg = request.args.get("page", 1)
     per_page_arg = request.args.get("per_page", 10)
-    ventas_pagina, page, per_page, total_items, total_pages = paginate(
-        ventas_filtradas, page=page_arg, per_page=per_page_arg
+    cursor_despues = decodificar_cursor(request.args.get("after", ""))
+    cursor_antes = decodificar_cursor(request.args.get("before", ""))
+    umbral_paginacion = current_app.config.get("REGISTROS_UMBRAL_PAGINACION", 1000)
+
+    # Las páginas por cursor no repiten el COUNT completo: el total de la
+    # primera página viaja en los enlaces (``total``). Sin él, se cuenta
+    # hasta el umbral y se muestra como cota inferior.
+    total_aproximado = False
+    if cursor_despues is not None or cursor_antes is not None:
+        usar_keyset = True
+        total_items = request.args.get("total", type=int)
+        if total_items is None or total_items < 0:
+            total_items = contar_ventas(limite=umbral_paginacion + 1, **filtros)
+            total_aproximado = total_items > umbral_paginacion
+    else:
+        total_items = contar_ventas(**filtros)
+        usar_keyset = total_items > umbral_paginacion
+    cursor_siguiente = cursor_anterior = None
+
+    if usar_keyset:
+        _, per_page, total_pages = calcular_paginacion(total_items, 1, per_page_arg)
+        page = None
+        ventas_pagina, hay_mas = obtener_ventas_keyset(
+            despues_de=cursor_despues,
+            antes_de=cursor_antes,
+            per_page=per_page,
+            **filtros,
+        )
+        if cursor_antes is not None and cursor_despues is None:
+            hay_siguiente, hay_anterior = True, hay_mas
+        else:
+            hay_siguiente, hay_anterior = hay_mas, cursor_despues is not None
+        if ventas_pagina and hay_siguiente:
+            cursor_siguiente = codificar_cursor(ventas_pagina[-1])
+        if ventas_pagina and hay_anterior:
+            cursor_anterior = codificar_cursor(ventas_pagina[0])
+    else:
+        page, per_page, total_pages = calcular_paginacion(
+            total_items, page_arg, per_page_arg
+        )
+        ventas_pagina = obtener_ventas(
+            limit=per_page, offset=(page - 1) * per_page, **filtros
+        )
+
+    logger.info(
+        f"Listado de registros - Usuario: {g.usuario['username']}, "
+        f"Total: {estadisticas_general['total_ventas']}, Filtradas: {total_items}"
     )
 
     # Query params para mantener filtros en los links de paginación
     query_params = request.args.to_dict()
 
-    # Construir query string sin los parámetros de paginación (page, per_page)
+    # Construir query string sin los parámetros de paginación
     qp_no_page = {
-        k: v for k, v in query_params.items() if k not in ("page", "per_page")
+        k: v
+        for k, v in query_params.items()
+        if k not in ("page", "per_page", "after", "before", "total")
     }
+    if usar_keyset and not total_aproximado:
+        qp_no_page["total"] = total_items
     query_string = urlencode(qp_no_page)
 
     return render_template(
         "registros.html",
         ventas=ventas_pagina,
-        ventas_total=ventas_list,
-        obtener_detalle_venta=obtener_detalle_venta,
+        total_ventas=estadisticas_general["total_ventas"],
+        detalles_por_venta=obtener_detalles_ventas(v["id"] for v in ventas_pagina),
         search_query=search_query,
         fecha_desde=fecha_desde,
         fecha_hasta=fecha_hasta,
         usuario_filtro=usuario_filtro,
         monto_minimo=monto_minimo,
         usuarios_unicos=usuarios_unicos_list,
-        estadisticas=estadisticas,
+        estadisticas=dashboard["estadisticas"],
         estadisticas_general=estadisticas_general,
-        ventas_mensuales=ventas_mensuales,
-        ventas_semanales=ventas_semanales,
-        top_productos=top_productos,
+        top_productos=dashboard["top_productos"],
+        percentiles_ticket=dashboard["percentiles_ticket"],
         now=now,
         # Paginación
         page=page,
         per_page=per_page,
         total_pages=total_pages,
         total_items=total_items,
+        total_aproximado=total_aproximado,
+        usar_keyset=usar_keyset,
+        cursor_siguiente=cursor_siguiente,
+        cursor_anterior=cursor_anterior,
         query_params=query_params,
         query_string=query_string,
     )
 
 
+def _filtros_exportacion(data):
+    """Lee los filtros de exportación del cuerpo JSON enviado por el dashboard."""
+    return {
+        "search_query": str(data.get("search", "")).strip().lower(),
+        "fecha_desde": str(data.get("fecha_desde", "")).strip(),
+        "fecha_hasta": str(data.get("fecha_hasta", "")).strip(),
+        "usuario_filtro": str(data.get("usuario", "")).strip(),
+        "monto_minimo": str(data.get("monto_minimo", "")).strip(),
+    }
+
+
 @registros_bp.route("/exportar-csv", methods=["POST"])
 @login_required
 @admin_required
+@lectura_en_replica
 def exportar_csv():
     """Exporta registros de ventas filtrados a CSV."""
     logger.info(f"Usuario {g.usuario['username']} inició exportación a CSV")
 
-    # Obtener todas las ventas
-    ventas_list = obtener_ventas()
-
     # Obtener parámetros de filtro del request JSON
-    data = request.get_json() or {}
-    search_query = data.get("search", "").strip().lower()
-    fecha_desde = data.get("fecha_desde", "").strip()
-    fecha_hasta = data.get("fecha_hasta", "").strip()
-    usuario_filtro = data.get("usuario", "").strip()
-    monto_minimo = data.get("monto_minimo", "").strip()
-
-    # Aplicar filtros
-    ventas_filtradas = filter_ventas(
-        ventas_list,
-        obtener_detalle_venta,
-        search_query=search_query,
-        fecha_desde=fecha_desde,
-        fecha_hasta=fecha_hasta,
-        usuario_filtro=usuario_filtro,
-        monto_minimo=monto_minimo,
-    )
+    filtros = _filtros_exportacion(request.get_json(silent=True) or {})
+    username = g.usuario["username"]
 
-    logger.info(
-        f"CSV - Usuario: {g.usuario['username']}, "
-        f"Total: {len(ventas_list)}, Exportadas: {len(ventas_filtradas)}"
-    )
+    def generar():
+        # Una consulta con cursor del lado del servidor; cada bloque se envía
+        # al cliente apenas se escribe, sin acumular el archivo en memoria.
+        exportadas = 0
+
+        def contar(filas):
+            nonlocal exportadas
+            for fila in filas:
+                exportadas += 1
+                yield fila
 
-    # Crear CSV en memoria
-    csv_buffer = io.StringIO()
-    writer = csv.writer(csv_buffer, lineterminator="\n")
-
-    # Headers
-    headers = [
-        "ID Venta",
-        "Fecha",
-        "Usuario",
-        "Cantidad Items",
-        "Total (₲)",
-        "Productos",
-    ]
-    writer.writerow(headers)
-
-    # Filas de datos
-    for venta in ventas_filtradas:
-        detalles = obtener_detalle_venta(venta["id"])
-        productos = ", ".join([d.get("nombre", "N/A") for d in detalles])
-        cantidad_items = sum([d.get("cantidad", 0) for d in detalles])
-
-        row = [
-            venta.get("id", ""),
-            venta.get("fecha", ""),
-            venta.get("username", ""),
-            cantidad_items,
-            venta.get("total", ""),
-            productos,
-        ]
-        writer.writerow(row)
-
-    # Convertir StringIO a BytesIO
-    csv_buffer.seek(0)
-    bytes_buffer = io.BytesIO(csv_buffer.getvalue().encode("utf-8-sig"))
-    bytes_buffer.seek(0)
+        yield from generar_csv_ventas(contar(iterar_ventas_exportacion(**filtros)))
+        logger.info(f"CSV - Usuario: {username}, Exportadas: {exportadas}")
 
     # Generar nombre de archivo con fecha/filtros
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     filename = f"registros_ventas_{timestamp}.csv"
 
+    return Response(
+        stream_with_context(generar()),
+        mimetype="text/csv; charset=utf-8",
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+
+@registros_bp.route("/exportaciones", methods=["POST"])
+@login_required
+@admin_required
+def crear_exportacion():
+    """Encola una exportación CSV en segundo plano y devuelve el ID del trabajo."""
+    filtros = _filtros_exportacion(request.get_json(silent=True) or {})
+    estado = enviar_exportacion(
+        current_app._get_current_object(), filtros, g.usuario["username"]
+    )
+    return jsonify(_estado_exportacion_json(estado)), 202
+
+
+@registros_bp.route("/exportaciones/<job_id>")
+@login_required
+@admin_required
+def estado_exportacion(job_id):
+    """Devuelve el progreso de una exportación (filas escritas y porcentaje)."""
+    estado = obtener_estado_exportacion(current_app, job_id)
+    if estado is None:
+        return jsonify({"error": "Exportación no encontrada o vencida."}), 404
+    return jsonify(_estado_exportacion_json(estado))
+
+
+@registros_bp.route("/exportaciones/<job_id>/descarga")
+@login_required
+@admin_required
+def descargar_exportacion(job_id):
+    """Descarga el CSV de una exportación terminada."""
+    ruta = ruta_archivo_exportacion(current_app, job_id)
+    if ruta is None:
+        return jsonify({"error": "Exportación no disponible."}), 404
+
+    logger.info(f"Usuario {g.usuario['username']} descargó exportación {job_id}")
+    fecha = datetime.fromtimestamp(os.path.getmtime(ruta)).strftime("%Y%m%d_%H%M%S")
     return send_file(
-        bytes_buffer,
+        ruta,
         mimetype="text/csv; charset=utf-8",
         as_attachment=True,
-        download_name=filename,
+        download_name=f"registros_ventas_{fecha}.csv",
+    )
+
+
+def _estado_exportacion_json(estado):
+    datos = {
+        k: estado[k] for k in ("id", "estado", "filas", "total", "porcentaje", "error")
+    }
+    datos["estado_url"] = url_for("registros.estado_exportacion", job_id=estado["id"])
+    if estado["estado"] == ESTADO_LISTO:
+        datos["descarga_url"] = url_for(
+            "registros.descargar_exportacion", job_id=estado["id"]
+        )
+    return datos
+
+
+@registros_bp.route("/api/buscar")
+@login_required
+@admin_required
+@lectura_en_replica
+def api_buscar():
+    """Búsqueda rápida de ventas por ID, usuario o producto, por relevancia."""
+    consulta = request.args.get("q", "").strip()
+    limite = min(max(request.args.get("limit", 20, type=int), 1), 100)
+    ventas = buscar_ventas(consulta, limite=limite)
+    return jsonify(
+        {
+            "q": consulta,
+            "resultados": [
+                dict(v, fecha=v["fecha"].strftime("%Y-%m-%d %H:%M:%S")) for v in ventas
+            ],
+        }
+    )
+
+
+@registros_bp.route("/api/series")
+@login_required
+@admin_required
+@lectura_en_replica
+def api_series():
+    """Serie de ventas para los gráficos del dashboard.
+
+    Parámetros: ``granularidad`` (hour, day, week o month; por defecto day),
+    ``desde`` y ``hasta`` ("%Y-%m-%d") o, en lugar de ``desde``, la cantidad
+    de ``periodos`` hasta ``hasta``; opcionalmente ``usuario`` (username) y
+    ``categoria``.
+    """
+    granularidad = request.args.get("granularidad", "day").strip()
+    if granularidad not in GRANULARIDADES:
+        return jsonify({"error": f"Granularidad inválida: {granularidad}"}), 400
+
+    try:
+        hasta_arg = request.args.get("hasta", "").strip()
+        desde_arg = request.args.get("desde", "").strip()
+        hasta = date.fromisoformat(hasta_arg) if hasta_arg else date.today()
+        desde = date.fromisoformat(desde_arg) if desde_arg else None
+    except ValueError:
+        return jsonify({"error": "Fechas inválidas, use AAAA-MM-DD"}), 400
+    if desde is None:
+        try:
+            desde = desde_para_periodos(
+                granularidad, hasta, request.args.get("periodos", type=int)
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+    usuario_id = None
+    username = request.args.get("usuario", "").strip()
+    if username:
+        usuario_id = obtener_id_usuario(username)
+        if usuario_id is None:
+            return jsonify({"error": f"Usuario desconocido: {username}"}), 400
+
+    try:
+        serie = obtener_serie_ventas(
+            granularidad,
+            desde,
+            hasta,
+            usuario_id=usuario_id,
+            categoria=request.args.get("categoria", "").strip() or None,
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(serie)
+
+
+@registros_bp.route("/api/percentiles")
+@login_required
+@admin_required
+@lectura_en_replica
+def api_percentiles():
+    """Percentiles del total por venta (p50, p90, p99) en una ventana.
+
+    Parámetros opcionales: ``desde`` y ``hasta`` ("%Y-%m-%d") y ``usuario``
+    (username).
+    """
+    desde = request.args.get("desde", "").strip() or None
+    hasta = request.args.get("hasta", "").strip() or None
+    try:
+        for valor in (desde, hasta):
+            if valor:
+                date.fromisoformat(valor)
+    except ValueError:
+        return jsonify({"error": "Fechas inválidas, use AAAA-MM-DD"}), 400
+
+    usuario_id = None
+    username = request.args.get("usuario", "").strip()
+    if username:
+        usuario_id = obtener_id_usuario(username)
+        if usuario_id is None:
+            return jsonify({"error": f"Usuario desconocido: {username}"}), 400
+
+    try:
+        percentiles = obtener_percentiles_ticket(desde, hasta, usuario_id=usuario_id)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(dict(percentiles, desde=desde, hasta=hasta))
+
+
+# Ventanas de ``/api/top-productos``: granularidad cuyo período actual se usa
+_VENTANAS_TOP = {"hoy": "day", "semana": "week", "mes": "month", "todo": None}
+
+
+@registros_bp.route("/api/top-productos")
+@login_required
+@admin_required
+@lectura_en_replica
+def api_top_productos():
+    """Productos más vendidos (aproximado, con error máximo) para widgets en vivo.
+
+    Parámetros: ``ventana`` (hoy, semana, mes o todo; por defecto todo) o
+    ``desde``/``hasta`` ("%Y-%m-%d"), y ``n`` (1 a 50, por defecto 5).
+    """
+    ventana = request.args.get("ventana", "todo").strip()
+    if ventana not in _VENTANAS_TOP:
+        return jsonify({"error": f"Ventana inválida: {ventana}"}), 400
+
+    desde = request.args.get("desde", "").strip() or None
+    hasta = request.args.get("hasta", "").strip() or None
+    try:
+        for valor in (desde, hasta):
+            if valor:
+                date.fromisoformat(valor)
+    except ValueError:
+        return jsonify({"error": "Fechas inválidas, use AAAA-MM-DD"}), 400
+    if desde is None and _VENTANAS_TOP[ventana]:
+        desde = inicio_de_periodo(date.today(), _VENTANAS_TOP[ventana]).isoformat()
+
+    top_n = min(max(request.args.get("n", 5, type=int), 1), 50)
+    try:
+        productos = obtener_productos_mas_vendidos_aproximado(
+            top_n=top_n, desde=desde, hasta=hasta
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(
+        {"ventana": ventana, "desde": desde, "hasta": hasta, "productos": productos}
     )
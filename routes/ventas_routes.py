@@ -12,8 +12,12 @@ from flask import (
     url_for,
 )
 
-from models.producto import obtener_producto_por_codigo, obtener_productos
-from models.venta import registrar_venta
+from models.producto import (
+    obtener_producto_por_codigo,
+    obtener_productos,
+    obtener_productos_por_ids,
+)
+from models.venta import registrar_venta, registrar_venta_idempotente
 from utils.logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -63,7 +67,7 @@ def agregar_venta_view():
                 return redirect(url_for("ventas.agregar_venta_view"))
 
             try:
-                producto_id = int(item["id"])
+                int(item["id"])
                 cantidad = int(item["cantidad"])
             except (ValueError, TypeError):
                 flash(
@@ -79,26 +83,34 @@ def agregar_venta_view():
                 )
                 return redirect(url_for("ventas.agregar_venta_view"))
 
-            # Validación 5: Producto existe
-            from models.producto import obtener_producto_por_id
+        # Todos los productos del carrito en una sola consulta; registrar_venta
+        # valida y calcula precios sobre esta misma foto
+        productos = obtener_productos_por_ids(
+            int(item["id"]) for item in productos_cantidades
+        )
+
+        for item in productos_cantidades:
+            producto_id = int(item["id"])
+            cantidad = int(item["cantidad"])
 
-            producto = obtener_producto_por_id(producto_id)
+            # Validación 5: Producto existe
+            producto = productos.get(producto_id)
             if not producto:
                 flash(f"Error: el producto con ID {producto_id} no existe.", "error")
                 return redirect(url_for("ventas.agregar_venta_view"))
 
             # Validación 6: Stock disponible
-            if producto["stock"] < cantidad:
+            if producto.stock < cantidad:
                 flash(
-                    f"Stock insuficiente para '{producto['nombre']}'. "
-                    f"Disponible: {producto['stock']}, solicitado: {cantidad}",
+                    f"Stock insuficiente para '{producto.nombre}'. "
+                    f"Disponible: {producto.stock}, solicitado: {cantidad}",
                     "error",
                 )
                 return redirect(url_for("ventas.agregar_venta_view"))
 
         # Si todas las validaciones pasaron, registrar venta
         exito, mensaje = registrar_venta(
-            productos_cantidades, usuario_id=g.usuario["id"]
+            productos_cantidades, usuario_id=g.usuario["id"], productos=productos
         )
 
         if exito:
@@ -118,6 +130,58 @@ def agregar_venta_view():
     return render_template("agregar_venta.html")
 
 
+@ventas_bp.route("/api/ventas", methods=["POST"])
+@login_required
+def api_registrar_venta():
+    """Registra una venta desde un carrito JSON y devuelve el resultado.
+
+    Cuerpo: {"productos": [{"id": 1, "cantidad": 2}, ...]}. El encabezado
+    opcional ``Idempotency-Key`` (generado por el cliente, p. ej. un UUID
+    por venta) hace que un reintento con la misma clave devuelva la venta
+    original en lugar de registrar otra, durante
+    ``IDEMPOTENCIA_EXPIRACION_HORAS``.
+
+    Respuestas: 201 con {"venta_id", "fecha", "total", "stock_restante"};
+    200 con el mismo cuerpo si es un reintento; 400 si el pedido está mal
+    formado, 409 si la clave ya se usó con otro carrito y 422 si la venta
+    se rechaza (producto inexistente, stock insuficiente, etc.).
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get("productos"), list):
+        return jsonify({"error": 'Se espera {"productos": [{"id", "cantidad"}]}'}), 400
+    productos_cantidades = data["productos"]
+    if not all(isinstance(item, dict) for item in productos_cantidades):
+        return jsonify({"error": "Estructura de datos de productos inválida."}), 400
+
+    clave = request.headers.get("Idempotency-Key", "").strip()
+    if len(clave) > 100:
+        return jsonify({"error": "Idempotency-Key admite hasta 100 caracteres"}), 400
+
+    estado, datos = registrar_venta_idempotente(
+        productos_cantidades, g.usuario["id"], clave or None
+    )
+
+    if estado == "creada":
+        logger.info(
+            f"Venta registrada por API - Usuario: {g.usuario['username']}, "
+            f"Venta: {datos['venta_id']}, Productos: {len(productos_cantidades)}"
+        )
+        return jsonify(datos), 201
+    if estado == "repetida":
+        logger.info(
+            f"Reintento de venta por API - Usuario: {g.usuario['username']}, "
+            f"Venta: {datos['venta_id']}"
+        )
+        return jsonify(datos), 200
+    if estado == "conflicto":
+        return jsonify({"error": datos}), 409
+    logger.error(
+        f"Fallo al registrar venta por API para usuario {g.usuario['username']}: "
+        f"{datos}"
+    )
+    return jsonify({"error": datos}), 422
+
+
 @ventas_bp.route("/buscar/<codigo_barras>")
 @login_required
 def buscar_producto(codigo_barras):
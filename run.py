@@ -46,9 +46,75 @@ def init_database(app):
         db_path = DATA_DIR / "kairos.db"
         print(f"📁 Ubicación: {db_path}")
         print(f"📁 Existe archivo: {db_path.exists()}")
+
+        # Los resúmenes de productos ahora son por usuario: la tabla anterior
+        # (solo por período) se descarta y se reconstruye más abajo
+        from sqlalchemy import inspect, text
+
+        inspector = inspect(db.engine)
+        if inspector.has_table("sketches_productos") and "usuario_id" not in {
+            c["name"] for c in inspector.get_columns("sketches_productos")
+        }:
+            from models_alchemy import SketchProductos
+
+            SketchProductos.__table__.drop(db.engine)
+
         db.create_all()
         print("✅ Tablas creadas/verificadas")
 
+        # create_all no agrega índices a tablas que ya existían: en una BD de
+        # una versión anterior se crean aquí los que faltan (equivale a la
+        # migración a8d3f6b2e914 para la versión de escritorio)
+        for tabla in db.metadata.sorted_tables:
+            for indice in tabla.indexes:
+                indice.create(db.engine, checkfirst=True)
+        with db.engine.begin() as conn:
+            conn.execute(text("DROP INDEX IF EXISTS ix_ventas_fecha"))
+        print("✅ Índices creados/verificados")
+
+        # Fechas de ventas guardadas como texto por versiones anteriores
+        from models.venta import normalizar_fechas_legado
+
+        normalizadas = normalizar_fechas_legado()
+        if normalizadas:
+            print(f"🕒 Fechas de ventas normalizadas: {normalizadas}")
+
+        # Poblar resúmenes de ventas si la tabla se acaba de crear sobre una BD
+        # con historial (actualización desde una versión anterior)
+        from models.agregados import refrescar_agregados
+        from models.resumen import reconstruir_resumenes
+        from models_alchemy import (
+            DigestVentas,
+            SketchProductos,
+            Venta,
+            VentaDiaria,
+            VentaMensual,
+            VentaProductoDiaria,
+        )
+
+        resumen_vacio = (
+            db.session.query(VentaDiaria).first() is None
+            or db.session.query(VentaProductoDiaria).first() is None
+            or db.session.query(VentaMensual).first() is None
+            or db.session.query(SketchProductos).first() is None
+            or db.session.query(DigestVentas).first() is None
+        )
+        if resumen_vacio and db.session.query(Venta).first() is not None:
+            print("📈 Reconstruyendo resúmenes de ventas...")
+            reconstruir_resumenes()
+            refrescar_agregados()
+            print("✅ Resúmenes de ventas reconstruidos")
+
+        # Índice de búsqueda de texto completo (FTS5)
+        from models.busqueda import (
+            indice_busqueda_disponible,
+            reconstruir_indice_busqueda,
+        )
+
+        if not indice_busqueda_disponible():
+            print("🔎 Creando índice de búsqueda de ventas...")
+            print(f"✅ Ventas indexadas: {reconstruir_indice_busqueda()}")
+
         # Crear usuario admin si no existe
         print("🔍 Buscando usuario admin...")
         admin_exists = db.session.query(User).filter_by(username="admin").first()
@@ -0,0 +1,67 @@
+"""
+Cache en memoria de resultados versionados.
+
+Cada entrada guarda el valor calculado junto con la versión de los datos con
+que se calculó (p. ej. los contadores de ``generaciones``). Mientras la
+versión actual coincida se devuelve el valor guardado; si cambió, se
+recalcula. No hay expiración por tiempo: la invalidación depende solo de la
+versión, por lo que un valor devuelto nunca corresponde a datos viejos.
+
+El cache es por proceso. Con varios workers de gunicorn cada uno calcula
+una vez por versión y luego sirve desde memoria.
+"""
+
+import threading
+
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class CacheVersionada:
+    """Valores calculados por clave, válidos mientras no cambie la versión."""
+
+    def __init__(self):
+        self._entradas = {}
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, clave, version, calcular):
+        """Devuelve el valor de ``clave`` para ``version``.
+
+        Args:
+            clave: identificador del valor (p. ej. "dashboard_registros")
+            version: valor comparable que cambia cuando cambian los datos
+            calcular: función sin argumentos que produce el valor
+
+        Returns:
+            El valor guardado si la versión coincide, o el recién calculado.
+        """
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None and entrada[0] == version:
+                self.aciertos += 1
+                return entrada[1]
+            self.fallos += 1
+
+        # Se calcula fuera del lock; dos cálculos simultáneos de la misma
+        # versión producen el mismo valor.
+        valor = calcular()
+        with self._lock:
+            self._entradas[clave] = (version, valor)
+        logger.debug(f"Cache '{clave}' recalculada para la versión {version}")
+        return valor
+
+    def invalidar(self, clave=None):
+        """Descarta una entrada, o todas si ``clave`` es None."""
+        with self._lock:
+            if clave is None:
+                self._entradas.clear()
+            else:
+                self._entradas.pop(clave, None)
+
+
+def cache_de_app(app):
+    """Devuelve la ``CacheVersionada`` de la aplicación, creándola si falta."""
+    return app.extensions.setdefault("kairos_cache", CacheVersionada())
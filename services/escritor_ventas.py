@@ -0,0 +1,182 @@
+"""
+Escritor único de ventas con commit agrupado (SQLite).
+
+Con varias terminales vendiendo a la vez sobre SQLite, cada venta compite
+por el lock de escritura de la base ("database is locked") y paga su propio
+fsync al confirmar. Con ``VENTAS_ESCRITOR_UNICO`` activado,
+``registrar_venta`` no escribe desde el hilo del request: encola la venta y
+espera su resultado. Un único hilo escritor junta las ventas que llegan
+dentro de ``VENTAS_ESCRITOR_VENTANA_MS`` (hasta ``VENTAS_ESCRITOR_MAX_LOTE``),
+registra cada una en su propio savepoint y las confirma todas con un solo
+``COMMIT``. Una venta rechazada (sin stock, producto inexistente) deshace
+solo su savepoint; si falla el commit, fallan todas las del lote.
+
+El escritor es por proceso: está pensado para la versión de escritorio y
+las instalaciones chicas (un proceso con varios hilos). En Postgres no se
+inicia, ya que las filas se bloquean de a una y no hay un lock global.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FuturoVencido
+
+from flask import current_app, has_app_context
+
+from models_alchemy import db
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+_CLAVE_EXTENSION = "kairos_escritor_ventas"
+
+
+class EscritorVentas:
+    """Hilo que registra las ventas encoladas, agrupando varias por commit."""
+
+    def __init__(self, app, ventana_ms=5, max_lote=50, espera_maxima=30):
+        self.app = app
+        self.ventana = ventana_ms / 1000
+        self.max_lote = max_lote
+        self.espera_maxima = espera_maxima
+        self.lotes = 0
+        self.ventas = 0
+        self._cola = queue.Queue()
+        self._hilo = None
+
+    def iniciar(self):
+        self._hilo = threading.Thread(
+            target=self._ciclo, name="kairos-escritor-ventas", daemon=True
+        )
+        self._hilo.start()
+        return self
+
+    def detener(self, timeout=5):
+        """Procesa las ventas ya encoladas y termina el hilo."""
+        self._cola.put(None)
+        if self._hilo is not None:
+            self._hilo.join(timeout)
+
+    def registrar(self, productos_cantidades, usuario_id, clave=None):
+        """Encola una venta y espera a que se confirme o se rechace.
+
+        Si vence la espera y la venta sigue en la cola, se cancela para que
+        no se registre después de informar el error. Si el escritor ya la
+        estaba procesando, se espera su resultado.
+
+        Returns:
+            tuple: (exito, mensaje, resultado), como ``models.venta._registrar_venta``
+        """
+        futuro = Future()
+        self._cola.put((productos_cantidades, usuario_id, clave, futuro))
+        try:
+            return futuro.result(timeout=self.espera_maxima)
+        except FuturoVencido:
+            if futuro.cancel():
+                return False, "Tiempo de espera agotado al registrar la venta.", None
+            return futuro.result()
+
+    def _ciclo(self):
+        detener = False
+        while not detener:
+            pedido = self._cola.get()
+            if pedido is None:
+                break
+            lote = [pedido]
+            limite = time.monotonic() + self.ventana
+            while len(lote) < self.max_lote:
+                try:
+                    pedido = self._cola.get(timeout=max(limite - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if pedido is None:
+                    detener = True
+                    break
+                lote.append(pedido)
+            self._procesar(lote)
+
+    def _procesar(self, lote):
+        from models.venta import _escribir_venta
+
+        # Las ventas canceladas por vencer su espera no se registran; las
+        # demás pasan a "en proceso" y ya no se pueden cancelar
+        lote = [p for p in lote if p[3].set_running_or_notify_cancel()]
+        if not lote:
+            return
+
+        with self.app.app_context():
+            try:
+                # Sin BEGIN explícito, pysqlite deja que el primer SAVEPOINT
+                # abra la transacción y su RELEASE la confirme: habría un
+                # commit por venta. IMMEDIATE toma el lock de escritura ya.
+                conexion = db.session.connection()
+                if not conexion.connection.driver_connection.in_transaction:
+                    conexion.exec_driver_sql("BEGIN IMMEDIATE")
+
+                resultados = []
+                for productos_cantidades, usuario_id, clave, _ in lote:
+                    savepoint = db.session.begin_nested()
+                    try:
+                        resultado = _escribir_venta(
+                            productos_cantidades, usuario_id, None, clave
+                        )
+                    except Exception as e:
+                        resultado = (False, str(e), None)
+                    if resultado[0]:
+                        savepoint.commit()
+                    else:
+                        savepoint.rollback()
+                    resultados.append(resultado)
+                db.session.commit()
+            except Exception as e:
+                logger.error(f"Error al confirmar un lote de {len(lote)} ventas: {e}")
+                db.session.rollback()
+                resultados = [(False, str(e), None)] * len(lote)
+            finally:
+                db.session.remove()
+
+        self.lotes += 1
+        self.ventas += len(lote)
+        for (*_, futuro), resultado in zip(lote, resultados):
+            futuro.set_result(resultado)
+
+
+def escritor_activo():
+    """El escritor de la app actual, o None si las ventas se escriben en el request."""
+    if not has_app_context():
+        return None
+    return current_app.extensions.get(_CLAVE_EXTENSION)
+
+
+def iniciar_escritor_ventas(app, forzar=False):
+    """Inicia el escritor único si está configurado y la base es SQLite.
+
+    Args:
+        forzar: iniciarlo aunque ``VENTAS_ESCRITOR_UNICO`` esté desactivado
+            o la app esté en modo testing
+
+    Returns:
+        EscritorVentas o None si no se inició
+    """
+    if not forzar and (not app.config.get("VENTAS_ESCRITOR_UNICO") or app.testing):
+        return None
+    with app.app_context():
+        if db.engine.dialect.name != "sqlite":
+            return None
+
+    escritor = EscritorVentas(
+        app,
+        ventana_ms=app.config.get("VENTAS_ESCRITOR_VENTANA_MS", 5),
+        max_lote=app.config.get("VENTAS_ESCRITOR_MAX_LOTE", 50),
+    ).iniciar()
+    app.extensions[_CLAVE_EXTENSION] = escritor
+    logger.info("Ventas registradas por el escritor único (commit agrupado)")
+    return escritor
+
+
+def detener_escritor_ventas(app):
+    """Detiene el escritor de ``app``; las ventas vuelven a escribirse en el request."""
+    escritor = app.extensions.pop(_CLAVE_EXTENSION, None)
+    if escritor is not None:
+        escritor.detener()
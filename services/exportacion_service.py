@@ -0,0 +1,246 @@
+"""
+Servicio de exportación de registros de ventas.
+
+Genera el CSV de ventas de forma incremental, en bloques de bytes, para
+que la exportación pueda enviarse como respuesta en streaming sin armar
+el archivo completo en memoria, y ejecuta exportaciones grandes como
+trabajos en segundo plano con progreso y descarga posterior.
+"""
+
+import csv
+import io
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+ENCABEZADOS_CSV = [
+    "ID Venta",
+    "Fecha",
+    "Usuario",
+    "Cantidad Items",
+    "Total (₲)",
+    "Productos",
+]
+
+
+def generar_csv_ventas(filas, filas_por_bloque=500):
+    """Convierte filas de exportación en bloques de bytes CSV (UTF-8 con BOM).
+
+    Args:
+        filas: iterable de tuplas (id, fecha, usuario, cantidad_items, total,
+            productos), como las de ``models.venta.iterar_ventas_exportacion``
+        filas_por_bloque: cantidad de filas por bloque emitido
+
+    Yields:
+        bytes: bloques del archivo CSV; el primero incluye BOM y encabezados
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(ENCABEZADOS_CSV)
+    pendientes = 0
+    primero = True
+
+    for fila in filas:
+        writer.writerow(fila)
+        pendientes += 1
+        if pendientes >= filas_por_bloque:
+            yield buffer.getvalue().encode("utf-8-sig" if primero else "utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            pendientes = 0
+            primero = False
+
+    yield buffer.getvalue().encode("utf-8-sig" if primero else "utf-8")
+
+
+# ---------------------------------------------------------------------------
+# Exportaciones en segundo plano
+#
+# Cada trabajo se ejecuta en un pool de hilos acotado y deja en el directorio
+# de spool dos archivos: <id>.json con el estado/progreso y <id>.csv con el
+# resultado. Como el estado vive en disco, cualquier worker de gunicorn puede
+# responder el sondeo de progreso y servir la descarga.
+# ---------------------------------------------------------------------------
+
+ESTADO_PENDIENTE = "pendiente"
+ESTADO_EN_PROCESO = "en_proceso"
+ESTADO_LISTO = "listo"
+ESTADO_ERROR = "error"
+
+_PATRON_ID = re.compile(r"^[0-9a-f]{32}$")
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _obtener_executor(max_workers):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="kairos-export"
+            )
+        return _executor
+
+
+def directorio_exportaciones(app):
+    """Devuelve (y crea si falta) el directorio de spool de exportaciones."""
+    base = os.environ.get("KAIROS_DATA_DIR") or os.getcwd()
+    directorio = app.config.get("EXPORTACIONES_DIR") or os.path.join(
+        base, "exportaciones"
+    )
+    os.makedirs(directorio, exist_ok=True)
+    return directorio
+
+
+def _rutas(directorio, job_id):
+    base = os.path.join(directorio, job_id)
+    return base + ".json", base + ".csv"
+
+
+def _guardar_estado(directorio, estado):
+    ruta_json, _ = _rutas(directorio, estado["id"])
+    temporal = ruta_json + ".tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(estado, f)
+    os.replace(temporal, ruta_json)
+
+
+def limpiar_exportaciones_vencidas(app):
+    """Elimina los archivos de trabajos más antiguos que la expiración configurada.
+
+    Returns:
+        int: cantidad de archivos eliminados
+    """
+    directorio = directorio_exportaciones(app)
+    vencimiento = time.time() - 60 * app.config.get(
+        "EXPORTACIONES_EXPIRACION_MINUTOS", 60
+    )
+    eliminados = 0
+    for nombre in os.listdir(directorio):
+        ruta = os.path.join(directorio, nombre)
+        try:
+            if os.path.getmtime(ruta) < vencimiento:
+                os.remove(ruta)
+                eliminados += 1
+        except OSError:
+            continue
+    return eliminados
+
+
+def _ejecutar_exportacion(app, estado, filtros, filas_por_actualizacion):
+    from models.venta import contar_ventas, iterar_ventas_exportacion
+    from services.replica_lectura import usar_replica
+
+    directorio = directorio_exportaciones(app)
+    _, ruta_csv = _rutas(directorio, estado["id"])
+    parcial = ruta_csv + ".part"
+
+    with app.app_context():
+        try:
+            usar_replica()
+            estado.update(estado=ESTADO_EN_PROCESO, total=contar_ventas(**filtros))
+            _guardar_estado(directorio, estado)
+
+            def con_progreso(filas):
+                for fila in filas:
+                    yield fila
+                    estado["filas"] += 1
+                    if estado["filas"] % filas_por_actualizacion == 0:
+                        _guardar_estado(directorio, estado)
+
+            with open(parcial, "wb") as f:
+                for bloque in generar_csv_ventas(
+                    con_progreso(iterar_ventas_exportacion(**filtros))
+                ):
+                    f.write(bloque)
+            os.replace(parcial, ruta_csv)
+
+            estado.update(estado=ESTADO_LISTO, finalizado=time.time())
+            _guardar_estado(directorio, estado)
+            logger.info(
+                f"Exportación {estado['id']} lista - Usuario: {estado['usuario']}, "
+                f"Filas: {estado['filas']}"
+            )
+        except Exception as e:
+            logger.error(f"Error en exportación {estado['id']}: {e}")
+            estado.update(estado=ESTADO_ERROR, error=str(e))
+            _guardar_estado(directorio, estado)
+            if os.path.exists(parcial):
+                os.remove(parcial)
+
+
+def enviar_exportacion(app, filtros, username):
+    """Encola una exportación CSV y devuelve el estado inicial del trabajo.
+
+    Args:
+        app: aplicación Flask (el trabajo corre en su propio app context)
+        filtros: dict con los filtros de ``condiciones_filtro_ventas``
+        username: usuario que solicita la exportación
+
+    Returns:
+        dict: estado del trabajo (ver ``obtener_estado_exportacion``)
+    """
+    limpiar_exportaciones_vencidas(app)
+
+    estado = {
+        "id": uuid.uuid4().hex,
+        "usuario": username,
+        "estado": ESTADO_PENDIENTE,
+        "filas": 0,
+        "total": None,
+        "creado": time.time(),
+        "finalizado": None,
+        "error": None,
+    }
+    _guardar_estado(directorio_exportaciones(app), estado)
+
+    executor = _obtener_executor(app.config.get("EXPORTACIONES_MAX_WORKERS", 2))
+    executor.submit(
+        _ejecutar_exportacion,
+        app,
+        dict(estado),
+        dict(filtros),
+        app.config.get("EXPORTACIONES_FILAS_POR_ACTUALIZACION", 1000),
+    )
+    logger.info(f"Exportación {estado['id']} encolada - Usuario: {username}")
+    return _con_porcentaje(estado)
+
+
+def _con_porcentaje(estado):
+    total = estado.get("total")
+    if estado["estado"] == ESTADO_LISTO:
+        porcentaje = 100.0
+    elif total:
+        porcentaje = min(round(100.0 * estado["filas"] / total, 1), 99.9)
+    else:
+        porcentaje = 0.0
+    return dict(estado, porcentaje=porcentaje)
+
+
+def obtener_estado_exportacion(app, job_id):
+    """Devuelve el estado y progreso de un trabajo, o None si no existe o venció."""
+    if not _PATRON_ID.match(job_id or ""):
+        return None
+    ruta_json, _ = _rutas(directorio_exportaciones(app), job_id)
+    try:
+        with open(ruta_json, encoding="utf-8") as f:
+            return _con_porcentaje(json.load(f))
+    except (OSError, ValueError):
+        return None
+
+
+def ruta_archivo_exportacion(app, job_id):
+    """Devuelve la ruta del CSV de un trabajo terminado, o None si no está listo."""
+    estado = obtener_estado_exportacion(app, job_id)
+    if not estado or estado["estado"] != ESTADO_LISTO:
+        return None
+    _, ruta_csv = _rutas(directorio_exportaciones(app), job_id)
+    return ruta_csv if os.path.exists(ruta_csv) else None
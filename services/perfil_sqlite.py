@@ -0,0 +1,136 @@
+"""
+Perfil de rendimiento de SQLite, aplicado a cada conexión nueva.
+
+Con los valores por defecto SQLite usa journal de rollback con
+``synchronous=FULL`` (varios fsync por commit), no espera si la base está
+bloqueada y guarda ~2 MB de páginas en caché. ``aplicar_perfil_sqlite``
+registra un evento ``connect`` en el engine que ejecuta en cada conexión:
+
+* ``journal_mode=WAL``: los lectores no bloquean al escritor ni al revés;
+* ``synchronous=NORMAL``: en WAL sigue siendo a prueba de cortes de
+  proceso, y solo un corte de luz puede perder los últimos commits;
+* ``busy_timeout``: espera al lock en lugar de fallar con
+  "database is locked";
+* ``cache_size``, ``mmap_size`` y ``temp_store=MEMORY``: más páginas en
+  memoria y tablas temporales (ORDER BY, GROUP BY) fuera del disco.
+
+Cada valor sale de la configuración (``SQLITE_*``) y ``SQLITE_OPTIMIZAR``
+en false deja los valores de SQLite. Además, un hilo ejecuta
+``wal_checkpoint(TRUNCATE)`` cada ``SQLITE_WAL_CHECKPOINT_SEGUNDOS`` para
+que el archivo ``-wal`` no crezca tras una ráfaga de ventas. Entre
+checkpoints, las últimas ventas están solo en ``kairos.db-wal``: los
+respaldos (``ACTUALIZAR_KAIROS.bat``) usan la API de backup de SQLite en
+lugar de copiar ``kairos.db``.
+"""
+
+import threading
+
+from models_alchemy import db
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+_JOURNAL_MODES = {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"}
+_SYNCHRONOUS = {"OFF", "NORMAL", "FULL", "EXTRA"}
+_TEMP_STORE = {"DEFAULT", "FILE", "MEMORY"}
+
+
+def pragmas_del_perfil(config):
+    """Lista de sentencias PRAGMA según la configuración, en orden de aplicación.
+
+    Raises:
+        ValueError: algún valor de la configuración no es válido
+    """
+    if not config.get("SQLITE_OPTIMIZAR", True):
+        return []
+
+    def opcion(clave, permitidos):
+        valor = str(config.get(clave) or "").upper()
+        if valor and valor not in permitidos:
+            raise ValueError(f"{clave} inválido: {valor}")
+        return valor
+
+    pragmas = []
+    journal_mode = opcion("SQLITE_JOURNAL_MODE", _JOURNAL_MODES)
+    if journal_mode:
+        pragmas.append(f"PRAGMA journal_mode={journal_mode}")
+    synchronous = opcion("SQLITE_SYNCHRONOUS", _SYNCHRONOUS)
+    if synchronous:
+        pragmas.append(f"PRAGMA synchronous={synchronous}")
+    if config.get("SQLITE_BUSY_TIMEOUT_MS") is not None:
+        pragmas.append(f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT_MS'])}")
+    if config.get("SQLITE_CACHE_SIZE_KB"):
+        # Negativo: tamaño en KiB en lugar de cantidad de páginas
+        pragmas.append(f"PRAGMA cache_size=-{int(config['SQLITE_CACHE_SIZE_KB'])}")
+    if config.get("SQLITE_MMAP_SIZE_MB") is not None:
+        mmap_bytes = int(config["SQLITE_MMAP_SIZE_MB"]) * 1024 * 1024
+        pragmas.append(f"PRAGMA mmap_size={mmap_bytes}")
+    temp_store = opcion("SQLITE_TEMP_STORE", _TEMP_STORE)
+    if temp_store:
+        pragmas.append(f"PRAGMA temp_store={temp_store}")
+    return pragmas
+
+
+def aplicar_perfil_sqlite(app):
+    """Registra el perfil en el engine de ``app`` e inicia el checkpoint periódico.
+
+    No hace nada si la base no es SQLite. Se debe llamar antes de abrir
+    conexiones; las que ya estén en el pool se descartan para que las
+    nuevas tomen el perfil.
+
+    Returns:
+        list: sentencias PRAGMA que se aplican a cada conexión
+    """
+    from sqlalchemy import event
+
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != "sqlite":
+        return []
+
+    pragmas = pragmas_del_perfil(app.config)
+    if not pragmas:
+        return []
+
+    def al_conectar(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+    event.listen(engine, "connect", al_conectar)
+    engine.dispose()
+    logger.info(f"Perfil SQLite: {', '.join(p[7:] for p in pragmas)}")
+
+    segundos = app.config.get("SQLITE_WAL_CHECKPOINT_SEGUNDOS", 0)
+    if (
+        segundos > 0
+        and not app.testing
+        and "PRAGMA journal_mode=WAL" in pragmas
+        and engine.url.database not in (None, "", ":memory:")
+    ):
+        _iniciar_checkpoint_periodico(app, engine, segundos)
+    return pragmas
+
+
+def _iniciar_checkpoint_periodico(app, engine, segundos):
+    detener = threading.Event()
+
+    def ciclo():
+        while not detener.wait(segundos):
+            try:
+                with engine.connect() as conexion:
+                    ocupado, paginas, _ = conexion.exec_driver_sql(
+                        "PRAGMA wal_checkpoint(TRUNCATE)"
+                    ).one()
+                if ocupado:
+                    logger.debug(f"Checkpoint WAL incompleto ({paginas} páginas)")
+            except Exception as e:
+                logger.error(f"Error en el checkpoint WAL: {e}")
+
+    hilo = threading.Thread(target=ciclo, name="kairos-wal-checkpoint", daemon=True)
+    hilo.start()
+    app.extensions["kairos_wal_checkpoint"] = detener
+    return detener
@@ -0,0 +1,175 @@
+"""
+Pool de conexiones configurable y con métricas (Postgres).
+
+Sin opciones, cada worker de gunicorn usa el pool por defecto de
+SQLAlchemy (5 conexiones + 10 de overflow, sin ``pre_ping`` ni reciclado),
+y no hay forma de saber si los requests esperan por una conexión.
+``configurar_pool`` arma ``SQLALCHEMY_ENGINE_OPTIONS`` desde la
+configuración (``DB_POOL_*``) con ``QueuePoolMedido``, un ``QueuePool`` que
+registra cuánto tarda cada checkout y cuántas veces el pool estaba agotado
+(todas las conexiones en uso y sin overflow disponible) o venció el
+``pool_timeout``.
+
+Cada pool lleva sus propias métricas (la base principal y la réplica de
+lectura se informan por separado) y, como el pool, son por proceso: cada
+worker informa las suyas en ``/admin/pool``.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+
+class MetricasPool:
+    """Contadores de checkouts y de esperas del pool, seguros entre hilos."""
+
+    def __init__(self, muestras=1000):
+        self._lock = threading.Lock()
+        self._muestras = muestras
+        self.reiniciar()
+
+    def reiniciar(self):
+        with self._lock:
+            self.checkouts = 0
+            self.agotamientos = 0
+            self.timeouts = 0
+            self.espera_total = 0.0
+            self.espera_maxima = 0.0
+            self._esperas = deque(maxlen=self._muestras)
+
+    def registrar_checkout(self, espera, agotado):
+        with self._lock:
+            self.checkouts += 1
+            self.agotamientos += agotado
+            self.espera_total += espera
+            self.espera_maxima = max(self.espera_maxima, espera)
+            self._esperas.append(espera)
+
+    def registrar_timeout(self, espera):
+        with self._lock:
+            self.timeouts += 1
+            self.agotamientos += 1
+            self.espera_maxima = max(self.espera_maxima, espera)
+
+    def resumen(self):
+        """Métricas acumuladas; los percentiles son de los últimos checkouts."""
+        with self._lock:
+            esperas = sorted(self._esperas)
+            promedio = self.espera_total / self.checkouts if self.checkouts else 0.0
+
+            def percentil(q):
+                if not esperas:
+                    return 0.0
+                return esperas[min(int(q * len(esperas)), len(esperas) - 1)]
+
+            return {
+                "checkouts": self.checkouts,
+                "agotamientos": self.agotamientos,
+                "timeouts": self.timeouts,
+                "espera_promedio_ms": round(promedio * 1000, 3),
+                "espera_maxima_ms": round(self.espera_maxima * 1000, 3),
+                "espera_p50_ms": round(percentil(0.5) * 1000, 3),
+                "espera_p95_ms": round(percentil(0.95) * 1000, 3),
+                "espera_p99_ms": round(percentil(0.99) * 1000, 3),
+            }
+
+
+_anidado = threading.local()
+
+
+class QueuePoolMedido(QueuePool):
+    """``QueuePool`` que registra en ``self.metricas`` la espera de cada checkout."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metricas = MetricasPool()
+
+    def recreate(self):
+        # engine.dispose() reemplaza el pool: las métricas se conservan
+        nuevo = super().recreate()
+        nuevo.metricas = self.metricas
+        return nuevo
+
+    def _do_get(self):
+        # QueuePool._do_get se llama a sí mismo al reintentar: solo se mide
+        # la llamada externa
+        if getattr(_anidado, "activo", False):
+            return super()._do_get()
+
+        agotado = (
+            self._max_overflow > -1
+            and self._overflow >= self._max_overflow
+            and self._pool.empty()
+        )
+        _anidado.activo = True
+        inicio = time.perf_counter()
+        try:
+            conexion = super()._do_get()
+        except exc.TimeoutError:
+            self.metricas.registrar_timeout(time.perf_counter() - inicio)
+            raise
+        finally:
+            _anidado.activo = False
+        self.metricas.registrar_checkout(time.perf_counter() - inicio, agotado)
+        return conexion
+
+
+def opciones_pool(config):
+    """Opciones de ``create_engine`` para el pool según la configuración."""
+    return {
+        "poolclass": QueuePoolMedido,
+        "pool_size": config.get("DB_POOL_SIZE", 5),
+        "max_overflow": config.get("DB_MAX_OVERFLOW", 10),
+        "pool_timeout": config.get("DB_POOL_TIMEOUT", 30),
+        "pool_recycle": config.get("DB_POOL_RECYCLE", 1800),
+        "pool_pre_ping": config.get("DB_POOL_PRE_PING", True),
+    }
+
+
+def configurar_pool(app):
+    """Agrega las opciones del pool a ``SQLALCHEMY_ENGINE_OPTIONS`` en Postgres.
+
+    Se debe llamar antes de ``db.init_app``. Las opciones que ya estén en
+    ``SQLALCHEMY_ENGINE_OPTIONS`` tienen prioridad.
+
+    Returns:
+        dict: opciones agregadas ({} si la base no es Postgres)
+    """
+    uri = app.config.get("SQLALCHEMY_DATABASE_URI")
+    if not uri or make_url(uri).get_backend_name() != "postgresql":
+        return {}
+    opciones = opciones_pool(app.config)
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        **opciones,
+        **app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}),
+    }
+    return opciones
+
+
+def metricas_pool(engine):
+    """Resumen de las métricas del pool de ``engine``, o None si no se mide."""
+    metricas = getattr(engine.pool, "metricas", None)
+    return metricas.resumen() if metricas is not None else None
+
+
+def estado_pool(engine):
+    """Ocupación actual del pool de ``engine`` en este proceso."""
+    pool = engine.pool
+    estado = {"pid": os.getpid(), "clase": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        estado.update(
+            tamano=pool.size(),
+            en_uso=pool.checkedout(),
+            libres=pool.checkedin(),
+            overflow=pool.overflow(),
+            max_overflow=pool._max_overflow,
+            timeout=pool.timeout(),
+            recycle=pool._recycle,
+            pre_ping=pool._pre_ping,
+        )
+    return estado
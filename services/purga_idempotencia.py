@@ -0,0 +1,53 @@
+"""
+Purga periódica de las claves de idempotencia vencidas de la API de ventas.
+
+Cada proceso inicia un hilo que, cada ``IDEMPOTENCIA_PURGA_MINUTOS``
+minutos, llama a ``models.venta.purgar_claves_idempotencia`` con
+``IDEMPOTENCIA_EXPIRACION_HORAS``. Así el borrado por lotes (y sus commits)
+no se hace dentro del request de una venta. Si varios workers purgan a la
+vez, el segundo no encuentra nada que borrar.
+"""
+
+import threading
+
+from models_alchemy import db
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def iniciar_purga_periodica(app):
+    """Inicia el hilo de purga si corresponde.
+
+    Returns:
+        threading.Event para detener el hilo, o None si no se inició
+    """
+    minutos = app.config.get("IDEMPOTENCIA_PURGA_MINUTOS", 0)
+    if minutos <= 0 or app.testing:
+        return None
+
+    from models.venta import purgar_claves_idempotencia
+
+    horas = app.config.get("IDEMPOTENCIA_EXPIRACION_HORAS", 24)
+    detener = threading.Event()
+
+    def ciclo():
+        while not detener.wait(minutos * 60):
+            with app.app_context():
+                try:
+                    eliminadas = purgar_claves_idempotencia(horas)
+                    if eliminadas:
+                        logger.info(
+                            f"Claves de idempotencia vencidas eliminadas: {eliminadas}"
+                        )
+                except Exception as e:
+                    db.session.rollback()
+                    logger.error(f"Error al purgar claves de idempotencia: {e}")
+                finally:
+                    db.session.remove()
+
+    hilo = threading.Thread(target=ciclo, name="kairos-purga-idempotencia", daemon=True)
+    hilo.start()
+    app.extensions["kairos_purga_idempotencia"] = detener
+    logger.info(f"Purga de claves de idempotencia cada {minutos} min")
+    return detener
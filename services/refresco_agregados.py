@@ -0,0 +1,53 @@
+"""
+Refresco periódico de las vistas materializadas de ventas (Postgres).
+
+Cada worker de gunicorn inicia un hilo que, cada
+``AGREGADOS_REFRESCO_MINUTOS`` minutos, llama a
+``models.agregados.refrescar_agregados(solo_si_libre=True)``. El advisory
+lock de ese refresco hace que, en cada ciclo, solo uno de los workers
+ejecute el ``REFRESH`` y el resto lo omita.
+
+En SQLite no se inicia: las tablas mensual y semanal se actualizan con
+cada venta.
+"""
+
+import threading
+
+from models_alchemy import db
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def iniciar_refresco_periodico(app):
+    """Inicia el hilo de refresco si corresponde.
+
+    Returns:
+        threading.Event para detener el hilo, o None si no se inició
+    """
+    minutos = app.config.get("AGREGADOS_REFRESCO_MINUTOS", 0)
+    if minutos <= 0 or app.testing:
+        return None
+    with app.app_context():
+        if db.engine.dialect.name != "postgresql":
+            return None
+
+    from models.agregados import refrescar_agregados
+
+    detener = threading.Event()
+
+    def ciclo():
+        while not detener.wait(minutos * 60):
+            with app.app_context():
+                try:
+                    refrescar_agregados(solo_si_libre=True)
+                except Exception as e:
+                    logger.error(f"Error al refrescar agregados de ventas: {e}")
+                finally:
+                    db.session.remove()
+
+    hilo = threading.Thread(target=ciclo, name="kairos-refresco-agregados", daemon=True)
+    hilo.start()
+    app.extensions["kairos_refresco_agregados"] = detener
+    logger.info(f"Refresco de agregados de ventas cada {minutos} min")
+    return detener
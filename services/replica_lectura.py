@@ -0,0 +1,245 @@
+"""
+Réplica de lectura para los reportes (registros, inventario y exportaciones).
+
+El dashboard de registros, el inventario y la exportación CSV hacen
+consultas pesadas sobre la misma base que registra las ventas. Con
+``DATABASE_REPLICA_URL`` configurada, ``configurar_replica`` crea un engine
+para la réplica y las vistas marcadas con ``@lectura_en_replica`` envían sus
+SELECT a ese engine (ver ``models_alchemy.SesionConReplica``). No se usa
+``SQLALCHEMY_BINDS``: ``db.create_all`` y las migraciones no deben tocar la
+réplica.
+
+Antes de usar la réplica se mide su retraso. En Postgres es cero si el
+standby ya aplicó el WAL que tenía la principal al medir y, si no, el
+tiempo desde la última transacción que aplicó; un standby sin el receptor
+de WAL transmitiendo no se usa. Con la copia SQLite de prueba es la
+antigüedad de la venta más vieja que está en la base principal y todavía
+no llegó a la réplica. Si supera ``REPLICA_TOLERANCIA_SEGUNDOS`` o la
+réplica no responde, las lecturas van a la base principal. La verificación
+corre en un hilo aparte, como mucho cada ``REPLICA_VERIFICACION_SEGUNDOS``
+por proceso, para que una réplica que no responde no demore los requests.
+
+La réplica debe ser del mismo motor que la base principal (una réplica de
+streaming de Postgres o, para pruebas, una copia del archivo SQLite).
+"""
+
+import threading
+import time
+from datetime import datetime
+from functools import wraps
+
+from flask import current_app, g
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError, SQLAlchemyError
+
+from models_alchemy import Venta, db
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def medir_retraso(motor_replica, motor_primario):
+    """Segundos de retraso de la réplica respecto de la base principal.
+
+    En Postgres se usa el estado de la replicación del standby, que cubre
+    cualquier cambio (ventas, productos, usuarios). En SQLite, que solo se
+    usa como réplica de prueba (una copia del archivo), se mide la venta más
+    vieja que está en la principal y no en la réplica.
+
+    Raises:
+        SQLAlchemyError: la réplica o la base principal no responden, la
+            réplica de Postgres no es un standby o no está recibiendo WAL
+    """
+    if motor_replica.dialect.name == "postgresql":
+        return _retraso_standby_postgres(motor_replica, motor_primario)
+    return _retraso_por_ventas(motor_replica, motor_primario)
+
+
+def _retraso_standby_postgres(motor_replica, motor_primario):
+    from sqlalchemy import text
+
+    # Posición del WAL de la principal antes de consultar la réplica: si la
+    # réplica ya la aplicó, estaba al día en ese momento
+    with motor_primario.connect() as conexion:
+        lsn_primario = conexion.execute(text("SELECT pg_current_wal_lsn()")).scalar()
+
+    with motor_replica.connect() as conexion:
+        en_recuperacion, receptor, al_dia, segundos = conexion.execute(
+            text(
+                """
+                SELECT pg_is_in_recovery(),
+                       (SELECT status FROM pg_stat_wal_receiver),
+                       pg_last_wal_replay_lsn() >= CAST(:lsn AS pg_lsn),
+                       EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+                """
+            ),
+            {"lsn": lsn_primario},
+        ).one()
+    if not en_recuperacion:
+        raise DBAPIError(
+            "pg_is_in_recovery()", {}, Exception("la réplica no es un standby")
+        )
+    # Sin receptor transmitiendo, la réplica no recibe cambios nuevos aunque
+    # haya aplicado todo lo que recibió
+    if receptor != "streaming":
+        raise DBAPIError(
+            "pg_stat_wal_receiver",
+            {},
+            Exception(f"el receptor de WAL no está transmitiendo ({receptor})"),
+        )
+    if al_dia:
+        return 0.0
+    return max(float(segundos), 0.0) if segundos is not None else float("inf")
+
+
+def _retraso_por_ventas(motor_replica, motor_primario):
+    from sqlalchemy import func, select
+
+    # Por ID y no por fecha: dos ventas pueden compartir la misma fecha
+    with motor_replica.connect() as conexion:
+        ultima_replicada = conexion.execute(select(func.max(Venta.id))).scalar()
+
+    stmt = select(func.min(Venta.fecha))
+    if ultima_replicada is not None:
+        stmt = stmt.where(Venta.id > ultima_replicada)
+    with motor_primario.connect() as conexion:
+        pendiente = conexion.execute(stmt).scalar()
+
+    if pendiente is None:
+        return 0.0
+    return max((datetime.now() - pendiente).total_seconds(), 0.0)
+
+
+class EstadoReplica:
+    """Engine de la réplica y la decisión de usarla, con la última verificación.
+
+    ``utilizable`` nunca mide desde el request: devuelve la última decisión
+    y, si venció, lanza la medición en un hilo aparte. Hasta la primera
+    medición las lecturas van a la base principal.
+    """
+
+    def __init__(self, motor, tolerancia, intervalo):
+        self.motor = motor
+        self.tolerancia = tolerancia
+        self.intervalo = intervalo
+        self.disponible = False
+        self.retraso = None
+        self.error = None
+        self._vence = 0.0
+        self._verificando = False
+        self._lock = threading.Lock()
+
+    def utilizable(self, motor_primario):
+        with self._lock:
+            ahora = time.monotonic()
+            if ahora >= self._vence and not self._verificando:
+                self._verificando = True
+                self._vence = ahora + self.intervalo
+                threading.Thread(
+                    target=self.verificar,
+                    args=(motor_primario,),
+                    name="kairos-replica-retraso",
+                    daemon=True,
+                ).start()
+            return self.disponible
+
+    def verificar(self, motor_primario):
+        """Mide el retraso de la réplica y actualiza la decisión."""
+        anterior = self.disponible
+        try:
+            retraso = medir_retraso(self.motor, motor_primario)
+            self.retraso, self.error = retraso, None
+            self.disponible = retraso <= self.tolerancia
+        except SQLAlchemyError as e:
+            self.retraso, self.error = None, str(e)
+            self.disponible = False
+        finally:
+            with self._lock:
+                self._verificando = False
+
+        if self.disponible != anterior:
+            if self.disponible:
+                logger.info(f"Réplica de lectura en uso (retraso {self.retraso:.1f}s)")
+            elif self.error:
+                logger.warning(
+                    f"Réplica no disponible, se lee la principal: {self.error}"
+                )
+            else:
+                logger.warning(
+                    f"Réplica atrasada {self.retraso:.1f}s "
+                    f"(tolerancia {self.tolerancia:g}s), se lee la principal"
+                )
+        return self.disponible
+
+    def resumen(self):
+        return {
+            "disponible": self.disponible,
+            "retraso_segundos": self.retraso,
+            "tolerancia_segundos": self.tolerancia,
+            "error": self.error,
+        }
+
+
+def configurar_replica(app):
+    """Crea el engine de la réplica si hay ``DATABASE_REPLICA_URL``.
+
+    Usa las mismas ``SQLALCHEMY_ENGINE_OPTIONS`` que la base principal (p. ej.
+    las del pool), por lo que se debe llamar después de ``configurar_pool``.
+
+    Returns:
+        bool: True si se configuró una réplica
+
+    Raises:
+        ValueError: la réplica es de otro motor que la base principal
+    """
+    url = app.config.get("DATABASE_REPLICA_URL")
+    if not url:
+        return False
+
+    principal = make_url(app.config["SQLALCHEMY_DATABASE_URI"]).get_backend_name()
+    if make_url(url).get_backend_name() != principal:
+        raise ValueError(
+            f"DATABASE_REPLICA_URL debe ser de {principal}, igual que la principal"
+        )
+
+    opciones = dict(app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}))
+    if principal == "postgresql":
+        # Una réplica caída no debe dejar colgadas las conexiones de los
+        # reportes ni la verificación hasta el timeout de TCP
+        opciones["connect_args"] = {
+            "connect_timeout": app.config.get("REPLICA_TIMEOUT_CONEXION_SEGUNDOS", 3),
+            **opciones.get("connect_args", {}),
+        }
+    app.extensions["kairos_replica"] = EstadoReplica(
+        create_engine(url, **opciones),
+        tolerancia=app.config.get("REPLICA_TOLERANCIA_SEGUNDOS", 30),
+        intervalo=app.config.get("REPLICA_VERIFICACION_SEGUNDOS", 5),
+    )
+    return True
+
+
+def usar_replica():
+    """Envía a la réplica los SELECT del app context actual, si está al día.
+
+    Returns:
+        bool: True si las lecturas irán a la réplica
+    """
+    estado = current_app.extensions.get("kairos_replica")
+    if estado is None:
+        return False
+    if not estado.utilizable(db.engine):
+        return False
+    g.kairos_motor_lectura = estado.motor
+    return True
+
+
+def lectura_en_replica(f):
+    """Decorador para vistas de solo lectura que toleran datos algo atrasados."""
+
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        usar_replica()
+        return f(*args, **kwargs)
+
+    return decorated
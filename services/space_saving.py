@@ -0,0 +1,92 @@
+"""
+Elementos más frecuentes de un flujo con memoria acotada (Space-Saving).
+
+``SpaceSaving`` guarda como máximo ``capacidad`` contadores. Cuando llega un
+elemento nuevo y no hay lugar, reemplaza al contador más chico y hereda su
+valor como error. Para cada elemento contado se cumple
+
+    estimado - error <= real <= estimado
+
+y un elemento sin contador vendió a lo sumo ``umbral`` unidades, que en un
+flujo sin fusiones es como mucho ``total / capacidad``.
+
+Dos resúmenes se fusionan sumando contadores (Cafaro et al.); un elemento
+ausente en uno de ellos aporta el ``umbral`` de ese resumen como estimado y
+como error. Así, "los más vendidos del mes" se responde fusionando los
+resúmenes de cada día sin volver a recorrer las ventas.
+"""
+
+CAPACIDAD_POR_DEFECTO = 100
+
+
+class SpaceSaving:
+    """Resumen de los elementos más frecuentes con a lo sumo ``capacidad`` contadores."""
+
+    def __init__(self, capacidad=CAPACIDAD_POR_DEFECTO):
+        if capacidad < 1:
+            raise ValueError("La capacidad debe ser al menos 1")
+        self.capacidad = capacidad
+        self.contadores = {}  # clave -> [estimado, error]
+        self.total = 0
+        self.umbral = 0
+
+    def __len__(self):
+        return len(self.contadores)
+
+    def agregar(self, clave, peso=1):
+        """Cuenta ``peso`` ocurrencias de ``clave``."""
+        self.total += peso
+        contador = self.contadores.get(clave)
+        if contador is not None:
+            contador[0] += peso
+        elif len(self.contadores) < self.capacidad:
+            self.contadores[clave] = [self.umbral + peso, self.umbral]
+        else:
+            # O(capacidad) por reemplazo; con capacidades de unos cientos es
+            # más barato que mantener una estructura ordenada.
+            menor = min(self.contadores, key=lambda k: self.contadores[k][0])
+            minimo = self.contadores.pop(menor)[0]
+            self.umbral = max(self.umbral, minimo)
+            self.contadores[clave] = [minimo + peso, minimo]
+        return self
+
+    def fusionar(self, otro):
+        """Suma ``otro`` a este resumen y conserva los ``capacidad`` mayores."""
+        combinados = {}
+        for clave in self.contadores.keys() | otro.contadores.keys():
+            propio = self.contadores.get(clave, (self.umbral, self.umbral))
+            ajeno = otro.contadores.get(clave, (otro.umbral, otro.umbral))
+            combinados[clave] = [propio[0] + ajeno[0], propio[1] + ajeno[1]]
+
+        umbral = self.umbral + otro.umbral
+        ordenados = sorted(combinados.items(), key=lambda kv: -kv[1][0])
+        for _, (estimado, _) in ordenados[self.capacidad :]:
+            umbral = max(umbral, estimado)
+
+        self.contadores = dict(ordenados[: self.capacidad])
+        self.total += otro.total
+        self.umbral = umbral
+        return self
+
+    def top(self, n=10):
+        """Los ``n`` elementos con mayor estimado: [(clave, estimado, error), ...]."""
+        ordenados = sorted(self.contadores.items(), key=lambda kv: (-kv[1][0], kv[0]))
+        return [(clave, est, err) for clave, (est, err) in ordenados[:n]]
+
+    def a_dict(self):
+        """Representación serializable a JSON."""
+        return {
+            "capacidad": self.capacidad,
+            "total": self.total,
+            "umbral": self.umbral,
+            "contadores": [[k, e, err] for k, (e, err) in self.contadores.items()],
+        }
+
+    @classmethod
+    def desde_dict(cls, datos):
+        """Reconstruye un resumen guardado con ``a_dict``."""
+        resumen = cls(datos["capacidad"])
+        resumen.total = datos["total"]
+        resumen.umbral = datos["umbral"]
+        resumen.contadores = {k: [e, err] for k, e, err in datos["contadores"]}
+        return resumen
@@ -0,0 +1,182 @@
+"""
+Motor vectorizado de estadísticas de ventas.
+
+Alternativa a las funciones puras de ``services.ventas_service``: las ventas
+se cargan una sola vez en arreglos columnares de NumPy (fechas
+``datetime64[D]``, totales ``float64`` y usuarios como códigos ``int32``) y
+cada estadística se calcula con máscaras y agrupaciones vectorizadas
+(``np.unique`` + ``np.bincount``) en lugar de recorrer listas de dicts y
+llamar a ``strptime`` por fila.
+
+Los métodos devuelven exactamente las mismas estructuras que las funciones
+equivalentes del servicio, con tipos nativos de Python para que las
+plantillas y ``tojson`` funcionen sin cambios.
+"""
+
+from collections import defaultdict
+from datetime import date
+
+import numpy as np
+
+from services.ventas_service import (
+    _inicio_meses,
+    _inicio_semanas,
+    _serie_mensual,
+    _serie_semanal,
+    estadisticas_generales,
+)
+
+
+def _a_datetime64(fechas):
+    """Convierte date/datetime o 'YYYY-MM-DD...' a datetime64[D]; las inválidas quedan NaT."""
+    fechas = list(fechas)
+    if all(isinstance(f, date) for f in fechas):
+        # Columna DateTime nativa: conversión directa sin pasar por texto
+        return np.array(fechas, dtype="datetime64[D]")
+    dias = [str(t)[:10] for t in fechas]
+    try:
+        return np.array(dias, dtype="datetime64[D]")
+    except ValueError:
+        resultado = np.empty(len(dias), dtype="datetime64[D]")
+        for i, dia in enumerate(dias):
+            try:
+                resultado[i] = np.datetime64(date.fromisoformat(dia), "D")
+            except ValueError:
+                resultado[i] = np.datetime64("NaT")
+        return resultado
+
+
+class VentasColumnar:
+    """Ventas en formato columnar para calcular estadísticas del dashboard."""
+
+    def __init__(self, fechas, totales, usuarios):
+        """
+        Args:
+            fechas: iterable de datetime/date (o texto "%Y-%m-%d %H:%M:%S")
+            totales: iterable de totales
+            usuarios: iterable de usernames (None o "" para ventas sin usuario)
+        """
+        self.dias = _a_datetime64(fechas)
+        self.totales = np.asarray(totales, dtype=np.float64)
+        nombres = np.asarray([u or "" for u in usuarios], dtype=object)
+        if len(nombres):
+            self.nombres_usuario, codigos = np.unique(nombres, return_inverse=True)
+        else:
+            self.nombres_usuario, codigos = np.array([], dtype=object), []
+        self.codigos_usuario = np.asarray(codigos, dtype=np.int32)
+
+    @classmethod
+    def desde_ventas(cls, ventas):
+        """Construye el motor a partir de la lista de dicts de ``obtener_ventas``."""
+        return cls(
+            [v.get("fecha", "") for v in ventas],
+            [v.get("total", 0) for v in ventas],
+            [v.get("username") for v in ventas],
+        )
+
+    @classmethod
+    def desde_db(cls):
+        """Carga fecha, total y usuario de todas las ventas con una sola consulta."""
+        from sqlalchemy import select
+
+        from models_alchemy import User, Venta, db
+
+        stmt = select(Venta.fecha, Venta.total, User.username).outerjoin(
+            User, Venta.usuario_id == User.id
+        )
+        filas = db.session.execute(stmt).all()
+        if not filas:
+            return cls([], [], [])
+        fechas, totales, usuarios = zip(*filas)
+        return cls(fechas, totales, [u or "-" for u in usuarios])
+
+    def __len__(self):
+        return len(self.totales)
+
+    def _validas(self):
+        return ~np.isnat(self.dias)
+
+    def usuarios_unicos(self):
+        # np.unique ya devuelve los nombres ordenados
+        return [str(n) for n in self.nombres_usuario.tolist() if n]
+
+    def estadisticas_del_dia(self, target_date=None):
+        if target_date is None:
+            target_date = date.today()
+
+        mascara = self.dias == np.datetime64(target_date, "D")
+        totales_hoy = self.totales[mascara]
+        cantidad = int(totales_hoy.size)
+        total = float(totales_hoy.sum()) if cantidad else 0
+        mayor = float(totales_hoy.max()) if cantidad else 0
+
+        return {
+            "cantidad_ventas_hoy": cantidad,
+            "total_recaudado_hoy": total,
+            "venta_mas_grande_hoy": mayor,
+            "promedio_por_venta_hoy": total / cantidad if cantidad else 0,
+        }
+
+    def estadisticas_generales(self):
+        if not len(self):
+            return estadisticas_generales([])
+
+        total = float(self.totales.sum())
+        return {
+            "total_ventas": len(self),
+            "total_recaudado": total,
+            "venta_promedio": total / len(self),
+            "venta_mas_grande": float(self.totales.max()),
+            "venta_mas_pequena": float(self.totales.min()),
+            "dias_con_ventas": int(np.unique(self.dias[self._validas()]).size),
+        }
+
+    def _agrupar(self, codigos, mascara):
+        """Devuelve (claves_unicas, cantidades, totales) agrupando por ``codigos``."""
+        claves, inversa = np.unique(codigos[mascara], return_inverse=True)
+        cantidades = np.bincount(inversa, minlength=claves.size)
+        sumas = np.bincount(
+            inversa, weights=self.totales[mascara], minlength=claves.size
+        )
+        return claves, cantidades, sumas
+
+    def ventas_por_mes(self, meses_atras=12):
+        inicio = _inicio_meses(meses_atras)
+        mascara = self._validas() & (self.dias >= np.datetime64(inicio, "D"))
+
+        meses, cantidades, sumas = self._agrupar(
+            self.dias.astype("datetime64[M]"), mascara
+        )
+        ventas_mensuales = {
+            str(mes): {"cantidad": int(c), "total": float(t)}
+            for mes, c, t in zip(meses, cantidades, sumas)
+        }
+        return _serie_mensual(ventas_mensuales, inicio, meses_atras)
+
+    def ventas_por_semana(self, semanas_atras=12):
+        inicio = _inicio_semanas(semanas_atras)
+        mascara = self._validas() & (self.dias >= np.datetime64(inicio, "D"))
+
+        # El servicio usa como clave "<año calendario>-W<semana ISO>", así que
+        # una semana que cruza el año se reparte en dos claves. Se agrupa por
+        # (lunes de la semana, si el día cae en el año siguiente al del lunes).
+        numeros = self.dias.astype(np.int64)
+        lunes = numeros - (numeros + 3) % 7  # 1970-01-01 fue jueves
+        anio = self.dias.astype("datetime64[Y]").astype(np.int64)
+        anio_lunes = lunes.astype("datetime64[D]").astype("datetime64[Y]")
+        cruza_anio = anio != anio_lunes.astype(np.int64)
+        codigos = lunes * 2 + cruza_anio
+
+        claves, cantidades, sumas = self._agrupar(codigos, mascara)
+        # Distintos grupos pueden compartir clave (p. ej. "2025-W01" para el
+        # 1 de enero de 2025 y para el 29 de diciembre de 2025), como en el
+        # servicio, por lo que se acumula por clave.
+        ventas_semanales = defaultdict(lambda: {"cantidad": 0, "total": 0})
+        for codigo, c, t in zip(claves.tolist(), cantidades, sumas):
+            dia_lunes = date.fromordinal(date(1970, 1, 1).toordinal() + codigo // 2)
+            semana_key = (
+                f"{dia_lunes.year + codigo % 2}-W{dia_lunes.isocalendar()[1]:02d}"
+            )
+            ventas_semanales[semana_key]["cantidad"] += int(c)
+            ventas_semanales[semana_key]["total"] += float(t)
+        return _serie_semanal(ventas_semanales, inicio, semanas_atras)
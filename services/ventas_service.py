@@ -1,11 +1,33 @@
+import base64
+import json
 from collections import Counter, defaultdict
 from datetime import date, datetime, timedelta
 from math import ceil
 
 
+def _detalles_de(detalles_por_venta, venta_id):
+    """Obtiene los detalles de una venta desde un mapping o una función legacy."""
+    if callable(detalles_por_venta):
+        return detalles_por_venta(venta_id)
+    return detalles_por_venta.get(venta_id, [])
+
+
+def _dia_venta(venta):
+    """Devuelve el ``date`` de una venta.
+
+    ``fecha`` es un ``datetime`` cuando viene de la base de datos; también se
+    acepta el texto "%Y-%m-%d %H:%M:%S". Lanza ValueError/KeyError si falta
+    o es inválida.
+    """
+    fecha = venta["fecha"]
+    if isinstance(fecha, datetime):
+        return fecha.date()
+    return datetime.strptime(str(fecha)[:10], "%Y-%m-%d").date()
+
+
 def filter_ventas(
     ventas,
-    obtener_detalle_fn,
+    detalles_por_venta,
     search_query="",
     fecha_desde="",
     fecha_hasta="",
@@ -16,7 +38,9 @@ def filter_ventas(
 
     Args:
         ventas: lista de dicts de ventas
-        obtener_detalle_fn: función que recibe venta_id y devuelve detalles
+        detalles_por_venta: dict {venta_id: [detalles]} como el que devuelve
+            ``models.venta.obtener_detalles_ventas``. Por compatibilidad
+            también acepta una función que recibe venta_id y devuelve detalles.
     """
     ventas_filtradas = ventas
 
@@ -28,31 +52,26 @@ def filter_ventas(
             if q in str(v["id"]).lower()
             or q in v.get("username", "").lower()
             or any(
-                q in d.get("nombre", "").lower() for d in obtener_detalle_fn(v["id"])
+                q in d.get("nombre", "").lower()
+                for d in _detalles_de(detalles_por_venta, v["id"])
             )
         ]
 
     # Rangos de fecha
     if fecha_desde:
         try:
-            fecha_desde_obj = datetime.strptime(fecha_desde, "%Y-%m-%d")
+            fecha_desde_obj = datetime.strptime(fecha_desde, "%Y-%m-%d").date()
             ventas_filtradas = [
-                v
-                for v in ventas_filtradas
-                if datetime.strptime(str(v["fecha"])[:10], "%Y-%m-%d")
-                >= fecha_desde_obj
+                v for v in ventas_filtradas if _dia_venta(v) >= fecha_desde_obj
             ]
         except ValueError:
             pass
 
     if fecha_hasta:
         try:
-            fecha_hasta_obj = datetime.strptime(fecha_hasta, "%Y-%m-%d")
+            fecha_hasta_obj = datetime.strptime(fecha_hasta, "%Y-%m-%d").date()
             ventas_filtradas = [
-                v
-                for v in ventas_filtradas
-                if datetime.strptime(str(v["fecha"])[:10], "%Y-%m-%d")
-                <= fecha_hasta_obj
+                v for v in ventas_filtradas if _dia_venta(v) <= fecha_hasta_obj
             ]
         except ValueError:
             pass
@@ -75,7 +94,12 @@ def filter_ventas(
     return ventas_filtradas
 
 
-def paginate(ventas, page=1, per_page=10):
+def calcular_paginacion(total_items, page=1, per_page=10):
+    """Normaliza page/per_page contra el total de elementos.
+
+    Returns:
+        tuple: (page, per_page, total_pages)
+    """
     try:
         page = int(page)
         if page < 1:
@@ -90,17 +114,46 @@ def paginate(ventas, page=1, per_page=10):
     except (ValueError, TypeError):
         per_page = 10
 
-    total_items = len(ventas)
     total_pages = ceil(total_items / per_page) if total_items > 0 else 1
 
     if page > total_pages:
         page = total_pages
 
+    return page, per_page, total_pages
+
+
+def paginate(ventas, page=1, per_page=10):
+    total_items = len(ventas)
+    page, per_page, total_pages = calcular_paginacion(total_items, page, per_page)
+
     start = (page - 1) * per_page
     end = start + per_page
     return ventas[start:end], page, per_page, total_items, total_pages
 
 
+def codificar_cursor(venta):
+    """Genera un token opaco con la posición ``(fecha, id)`` de una venta.
+
+    La fecha se serializa en ISO 8601 para conservar los microsegundos.
+    """
+    fecha = venta["fecha"]
+    fecha = fecha.isoformat(sep=" ") if isinstance(fecha, datetime) else str(fecha)
+    crudo = json.dumps([fecha, int(venta["id"])], separators=(",", ":"))
+    return base64.urlsafe_b64encode(crudo.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor(token):
+    """Devuelve la tupla ``(fecha: datetime, id)`` de un token, o None si es inválido."""
+    if not token:
+        return None
+    try:
+        relleno = "=" * (-len(token) % 4)
+        fecha, venta_id = json.loads(base64.urlsafe_b64decode(token + relleno))
+        return datetime.fromisoformat(fecha), int(venta_id)
+    except (ValueError, TypeError):
+        return None
+
+
 def usuarios_unicos(ventas):
     return sorted({v.get("username", "-") for v in ventas if v.get("username")})
 
@@ -109,11 +162,7 @@ def estadisticas_del_dia(ventas, target_date=None):
     if target_date is None:
         target_date = date.today()
 
-    ventas_hoy = [
-        v
-        for v in ventas
-        if datetime.strptime(str(v["fecha"])[:10], "%Y-%m-%d").date() == target_date
-    ]
+    ventas_hoy = [v for v in ventas if _dia_venta(v) == target_date]
 
     total = sum(v.get("total", 0) for v in ventas_hoy)
     cantidad = len(ventas_hoy)
@@ -128,24 +177,13 @@ def estadisticas_del_dia(ventas, target_date=None):
     }
 
 
-def ventas_por_mes(ventas, meses_atras=12):
-    """Devuelve ventas agrupadas por mes para los últimos N meses."""
+def _inicio_meses(meses_atras):
     hoy = date.today()
-    inicio = hoy.replace(day=1) - timedelta(days=30 * (meses_atras - 1))
-
-    ventas_mensuales = defaultdict(lambda: {"cantidad": 0, "total": 0})
+    return hoy.replace(day=1) - timedelta(days=30 * (meses_atras - 1))
 
-    for venta in ventas:
-        try:
-            fecha_venta = datetime.strptime(str(venta["fecha"])[:10], "%Y-%m-%d").date()
-            if fecha_venta >= inicio:
-                mes_key = fecha_venta.strftime("%Y-%m")
-                ventas_mensuales[mes_key]["cantidad"] += 1
-                ventas_mensuales[mes_key]["total"] += venta.get("total", 0)
-        except (ValueError, KeyError):
-            continue
 
-    # Completar meses faltantes con ceros
+def _serie_mensual(ventas_mensuales, inicio, meses_atras):
+    """Completa meses faltantes con ceros y devuelve la serie ordenada."""
     resultado = []
     for i in range(meses_atras):
         mes_actual = (inicio + timedelta(days=30 * i)).replace(day=1)
@@ -164,32 +202,23 @@ def ventas_por_mes(ventas, meses_atras=12):
     return resultado
 
 
-def ventas_por_semana(ventas, semanas_atras=12):
-    """Devuelve ventas agrupadas por semana para las últimas N semanas."""
+def _inicio_semanas(semanas_atras):
     hoy = date.today()
     inicio = hoy - timedelta(weeks=semanas_atras - 1)
 
     # Ajustar al inicio de semana (lunes)
-    inicio = inicio - timedelta(days=inicio.weekday())
+    return inicio - timedelta(days=inicio.weekday())
 
-    ventas_semanales = defaultdict(lambda: {"cantidad": 0, "total": 0})
 
-    for venta in ventas:
-        try:
-            fecha_venta = datetime.strptime(str(venta["fecha"])[:10], "%Y-%m-%d").date()
-            if fecha_venta >= inicio:
-                # Calcular semana del año
-                semana_key = f"{fecha_venta.year}-W{fecha_venta.isocalendar()[1]:02d}"
-                ventas_semanales[semana_key]["cantidad"] += 1
-                ventas_semanales[semana_key]["total"] += venta.get("total", 0)
-        except (ValueError, KeyError):
-            continue
+def _clave_semana(fecha):
+    return f"{fecha.year}-W{fecha.isocalendar()[1]:02d}"
 
-    # Completar semanas faltantes con ceros
+
+def _serie_semanal(ventas_semanales, inicio, semanas_atras):
+    """Completa semanas faltantes con ceros y devuelve la serie ordenada."""
     resultado = []
     for i in range(semanas_atras):
-        semana_actual = inicio + timedelta(weeks=i)
-        semana_key = f"{semana_actual.year}-W{semana_actual.isocalendar()[1]:02d}"
+        semana_key = _clave_semana(inicio + timedelta(weeks=i))
         if semana_key in ventas_semanales:
             resultado.append(
                 {
@@ -204,13 +233,58 @@ def ventas_por_semana(ventas, semanas_atras=12):
     return resultado
 
 
-def productos_mas_vendidos(ventas, obtener_detalle_fn, top_n=10):
-    """Devuelve los productos más vendidos con sus estadísticas."""
+def ventas_por_mes(ventas, meses_atras=12):
+    """Devuelve ventas agrupadas por mes para los últimos N meses."""
+    inicio = _inicio_meses(meses_atras)
+
+    ventas_mensuales = defaultdict(lambda: {"cantidad": 0, "total": 0})
+
+    for venta in ventas:
+        try:
+            fecha_venta = _dia_venta(venta)
+            if fecha_venta >= inicio:
+                mes_key = fecha_venta.strftime("%Y-%m")
+                ventas_mensuales[mes_key]["cantidad"] += 1
+                ventas_mensuales[mes_key]["total"] += venta.get("total", 0)
+        except (ValueError, KeyError):
+            continue
+
+    return _serie_mensual(ventas_mensuales, inicio, meses_atras)
+
+
+def ventas_por_semana(ventas, semanas_atras=12):
+    """Devuelve ventas agrupadas por semana para las últimas N semanas."""
+    inicio = _inicio_semanas(semanas_atras)
+
+    ventas_semanales = defaultdict(lambda: {"cantidad": 0, "total": 0})
+
+    for venta in ventas:
+        try:
+            fecha_venta = _dia_venta(venta)
+            if fecha_venta >= inicio:
+                # Calcular semana del año
+                semana_key = _clave_semana(fecha_venta)
+                ventas_semanales[semana_key]["cantidad"] += 1
+                ventas_semanales[semana_key]["total"] += venta.get("total", 0)
+        except (ValueError, KeyError):
+            continue
+
+    return _serie_semanal(ventas_semanales, inicio, semanas_atras)
+
+
+def productos_mas_vendidos(ventas, detalles_por_venta, top_n=10):
+    """Devuelve los productos más vendidos con sus estadísticas.
+
+    Args:
+        ventas: lista de dicts de ventas
+        detalles_por_venta: dict {venta_id: [detalles]} (o función legacy)
+        top_n: cantidad de productos a devolver
+    """
     contador_productos = Counter()
     productos_info = {}
 
     for venta in ventas:
-        detalles = obtener_detalle_fn(venta["id"])
+        detalles = _detalles_de(detalles_por_venta, venta["id"])
         for detalle in detalles:
             nombre = detalle.get("nombre", "Desconocido")
             cantidad = detalle.get("cantidad", 0)
@@ -266,8 +340,7 @@ def estadisticas_generales(ventas):
 
     for v in ventas:
         try:
-            fecha = datetime.strptime(str(v["fecha"])[:10], "%Y-%m-%d").date()
-            fechas.append(fecha)
+            fechas.append(_dia_venta(v))
         except (ValueError, KeyError):
             continue
 
@@ -281,3 +354,47 @@ def estadisticas_generales(ventas):
         "venta_mas_pequena": min(totales) if totales else 0,
         "dias_con_ventas": dias_unicos,
     }
+
+
+# ---------------------------------------------------------------------------
+# Estadísticas desde el resumen diario (models.resumen.obtener_ventas_diarias)
+#
+# Cada fila es {"dia", "usuario_id", "cantidad", "total", "minimo", "maximo"}.
+# Devuelven exactamente las mismas formas que las funciones sobre ventas.
+# ---------------------------------------------------------------------------
+
+
+def estadisticas_del_dia_desde_resumen(resumen, target_date=None):
+    if target_date is None:
+        target_date = date.today()
+    dia = target_date.strftime("%Y-%m-%d")
+
+    filas_hoy = [r for r in resumen if r["dia"] == dia]
+
+    total = sum(r["total"] for r in filas_hoy)
+    cantidad = sum(r["cantidad"] for r in filas_hoy)
+    mayor = max((r["maximo"] for r in filas_hoy), default=0)
+    promedio = total / cantidad if cantidad else 0
+
+    return {
+        "cantidad_ventas_hoy": cantidad,
+        "total_recaudado_hoy": total,
+        "venta_mas_grande_hoy": mayor,
+        "promedio_por_venta_hoy": promedio,
+    }
+
+
+def estadisticas_generales_desde_resumen(resumen):
+    cantidad = sum(r["cantidad"] for r in resumen)
+    if not cantidad:
+        return estadisticas_generales([])
+
+    total = sum(r["total"] for r in resumen)
+    return {
+        "total_ventas": cantidad,
+        "total_recaudado": total,
+        "venta_promedio": total / cantidad,
+        "venta_mas_grande": max(r["maximo"] for r in resumen),
+        "venta_mas_pequena": min(r["minimo"] for r in resumen),
+        "dias_con_ventas": len({r["dia"] for r in resumen}),
+    }
@@ -13,16 +13,21 @@ from routes.admin_routes import admin_bp  # noqa: E402
 from routes.auth_routes import auth_bp  # noqa: E402
 from routes.inventario_routes import inventario_bp  # noqa: E402
 from routes.productos_routes import productos_bp  # noqa: E402
+from routes.registros_routes import registros_bp  # noqa: E402
 from routes.ventas_routes import ventas_bp  # noqa: E402
+from services.replica_lectura import configurar_replica  # noqa: E402
 from utils.error_handlers import register_error_handlers  # noqa: E402
 from utils.logging_config import setup_logging  # noqa: E402
 
 
-def create_test_app(tmp_path):
+def create_test_app(tmp_path, database_uri=None, **config):
     """Crea una app de Flask para testing con una DB SQLite temporal.
 
     Registra blueprints, handlers y configura logging para replicar
-    el entorno mínimo necesario en tests.
+    el entorno mínimo necesario en tests. ``database_uri`` permite usar
+    otra base de datos (p. ej. Postgres) en lugar del archivo temporal, y
+    ``config`` se aplica antes de crear los engines (p. ej.
+    ``DATABASE_REPLICA_URL``).
     """
     app = Flask(
         __name__,
@@ -31,9 +36,10 @@ def create_test_app(tmp_path):
     )
 
     db_file = tmp_path / "test_kairos.db"
-    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_file}"
+    app.config["SQLALCHEMY_DATABASE_URI"] = database_uri or f"sqlite:///{db_file}"
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
     app.secret_key = "test-secret"
+    app.config.update(config)
 
     # Configurar logging (crea logs/)
     try:
@@ -48,9 +54,11 @@ def create_test_app(tmp_path):
     app.register_blueprint(productos_bp)
     app.register_blueprint(inventario_bp)
     app.register_blueprint(admin_bp)
+    app.register_blueprint(registros_bp)
 
     register_error_handlers(app)
 
+    configurar_replica(app)
     _db.init_app(app)
     with app.app_context():
         _db.create_all()
@@ -0,0 +1,62 @@
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+
+from models.agregados import refrescar_agregados
+from models.producto import agregar_producto, obtener_productos
+from models.venta import registrar_venta
+from models_alchemy import Venta, VentaMensual, VentaSemanal
+from models_alchemy import db as _db
+
+
+def _filas(modelo, *orden):
+    from sqlalchemy import select
+
+    stmt = select(modelo.__table__).order_by(*orden)
+    return [tuple(f) for f in _db.session.execute(stmt).all()]
+
+
+def test_refresco_equivale_al_calculo_sobre_ventas(app):
+    with app.app_context():
+        hoy = date.today()
+        # Historial de ~14 meses, incluido el cruce de año
+        meses, semanas = defaultdict(lambda: [0, 0.0]), defaultdict(lambda: [0, 0.0])
+        for i in range(120):
+            fecha = datetime.combine(hoy - timedelta(days=(i * 37) % 420), time(i % 24))
+            _db.session.add(Venta(fecha=fecha, total=float(10 + i)))
+            lunes = fecha.date() - timedelta(days=fecha.weekday())
+            for fila in (
+                meses[fecha.strftime("%Y-%m")],
+                semanas[(lunes.isoformat(), fecha.year)],
+            ):
+                fila[0] += 1
+                fila[1] += 10 + i
+        _db.session.commit()
+
+        filas = refrescar_agregados()
+        assert filas == {
+            "ventas_mensuales": len(meses),
+            "ventas_semanales": len(semanas),
+        }
+        assert _filas(VentaMensual, VentaMensual.mes) == [
+            (mes, *meses[mes]) for mes in sorted(meses)
+        ]
+        assert _filas(VentaSemanal, VentaSemanal.semana_inicio, VentaSemanal.anio) == [
+            (*clave, *semanas[clave]) for clave in sorted(semanas)
+        ]
+
+
+def test_ventas_nuevas_actualizan_las_tablas_de_sqlite(app):
+    with app.app_context():
+        agregar_producto("Pan", 50.0, 100, "Panadería", "P1")
+        producto_id = obtener_productos()[0]["id"]
+        for cantidad in (1, 2, 3):
+            assert registrar_venta([{"id": producto_id, "cantidad": cantidad}])[0]
+
+        mes = date.today().strftime("%Y-%m")
+        assert _filas(VentaMensual, VentaMensual.mes) == [(mes, 3, 300.0)]
+        incrementales = _filas(VentaSemanal, VentaSemanal.semana_inicio)
+
+        # Un refresco completo produce el mismo contenido
+        refrescar_agregados()
+        assert _filas(VentaMensual, VentaMensual.mes) == [(mes, 3, 300.0)]
+        assert _filas(VentaSemanal, VentaSemanal.semana_inicio) == incrementales
@@ -0,0 +1,208 @@
+from flask import g
+from sqlalchemy import func, select
+
+from models.producto import agregar_producto, obtener_productos
+from models.venta import purgar_claves_idempotencia, registrar_venta_idempotente
+from models_alchemy import ClaveIdempotencia, User, Venta
+from models_alchemy import db as _db
+
+
+def _preparar(app):
+    """Crea un cajero y dos productos; devuelve (usuario_id, [ids])."""
+    with app.app_context():
+        cajero = User(username="caja1", password="x", rol="usuario")
+        _db.session.add(cajero)
+        _db.session.commit()
+        agregar_producto("Pan", 10.0, 5, "Panadería", "API-001")
+        agregar_producto("Leche", 25.0, 8, "Lácteos", "API-002")
+        return cajero.id, [p["id"] for p in obtener_productos()]
+
+
+def _contar_ventas():
+    return _db.session.execute(select(func.count(Venta.id))).scalar_one()
+
+
+def test_reintento_con_la_misma_clave_devuelve_la_venta_original(app):
+    usuario_id, (pan, leche) = _preparar(app)
+    carrito = [{"id": pan, "cantidad": 2}, {"id": leche, "cantidad": 1}]
+
+    with app.app_context():
+        estado, venta = registrar_venta_idempotente(carrito, usuario_id, "clave-1")
+        assert estado == "creada"
+        assert venta["total"] == 45.0
+        assert venta["stock_restante"] == {str(pan): 3, str(leche): 7}
+
+        estado, repetida = registrar_venta_idempotente(carrito, usuario_id, "clave-1")
+        assert estado == "repetida"
+        assert repetida == venta
+        assert _contar_ventas() == 1
+
+        # La misma clave con otro carrito no se acepta
+        otro = [{"id": pan, "cantidad": 1}]
+        estado, mensaje = registrar_venta_idempotente(otro, usuario_id, "clave-1")
+        assert estado == "conflicto"
+
+        # Las claves son por usuario; sin clave cada llamada es una venta nueva
+        assert registrar_venta_idempotente(otro, None, "clave-1")[0] == "creada"
+        assert registrar_venta_idempotente(otro, usuario_id)[0] == "creada"
+        assert registrar_venta_idempotente(otro, usuario_id)[0] == "creada"
+        assert _contar_ventas() == 4
+
+
+def test_reintento_equivalente_no_es_conflicto(app):
+    usuario_id, (pan, leche) = _preparar(app)
+    carrito = [{"id": pan, "cantidad": 2}, {"id": leche, "cantidad": 1}]
+    # IDs como texto, claves extra y otro orden: es el mismo carrito
+    equivalente = [
+        {"id": str(leche), "cantidad": "1", "nombre": "Leche"},
+        {"id": pan, "cantidad": 2, "precio": 10.0},
+    ]
+
+    with app.app_context():
+        estado, venta = registrar_venta_idempotente(carrito, usuario_id, "k")
+        assert estado == "creada"
+        assert registrar_venta_idempotente(equivalente, usuario_id, "k") == (
+            "repetida",
+            venta,
+        )
+        assert _contar_ventas() == 1
+
+
+def test_claves_vencidas_se_purgan(app):
+    from datetime import datetime, timedelta
+
+    usuario_id, (pan, _) = _preparar(app)
+    carrito = [{"id": pan, "cantidad": 1}]
+
+    with app.app_context():
+        for clave in ("vieja", "nueva"):
+            assert (
+                registrar_venta_idempotente(carrito, usuario_id, clave)[0] == "creada"
+            )
+        vieja = _db.session.get(ClaveIdempotencia, (usuario_id, "vieja"))
+        vieja.creada = datetime.now() - timedelta(hours=25)
+        _db.session.commit()
+
+        assert purgar_claves_idempotencia(24, tamano_lote=1) == 1
+        assert _db.session.get(ClaveIdempotencia, (usuario_id, "nueva")) is not None
+
+        # Pasada la expiración, la misma clave registra una venta nueva
+        assert registrar_venta_idempotente(carrito, usuario_id, "vieja")[0] == "creada"
+        assert (
+            registrar_venta_idempotente(carrito, usuario_id, "nueva")[0] == "repetida"
+        )
+        assert _contar_ventas() == 3
+
+
+def test_venta_rechazada_no_consume_la_clave(app):
+    usuario_id, (pan, _) = _preparar(app)
+
+    with app.app_context():
+        carrito = [{"id": pan, "cantidad": 50}]
+        estado, mensaje = registrar_venta_idempotente(carrito, usuario_id, "k")
+        assert estado == "rechazada"
+        assert mensaje.startswith("Stock insuficiente")
+
+        carrito = [{"id": pan, "cantidad": 5}]
+        assert registrar_venta_idempotente(carrito, usuario_id, "k")[0] == "creada"
+
+
+def test_api_ventas(app):
+    usuario_id, (pan, leche) = _preparar(app)
+
+    @app.before_request
+    def cargar_usuario():
+        g.usuario = {"id": usuario_id, "username": "caja1", "rol": "usuario"}
+
+    client = app.test_client()
+    cuerpo = {"productos": [{"id": pan, "cantidad": 1}, {"id": leche, "cantidad": 2}]}
+    encabezados = {"Idempotency-Key": "6f1c2a90-uuid"}
+
+    r = client.post("/ventas/api/ventas", json=cuerpo, headers=encabezados)
+    assert r.status_code == 201
+    assert r.json["total"] == 60.0
+    assert r.json["stock_restante"] == {str(pan): 4, str(leche): 6}
+
+    reintento = client.post("/ventas/api/ventas", json=cuerpo, headers=encabezados)
+    assert reintento.status_code == 200
+    assert reintento.json == r.json
+
+    otro = {"productos": [{"id": pan, "cantidad": 1}]}
+    r = client.post("/ventas/api/ventas", json=otro, headers=encabezados)
+    assert r.status_code == 409
+
+    r = client.post(
+        "/ventas/api/ventas", json={"productos": [{"id": pan, "cantidad": 9}]}
+    )
+    assert r.status_code == 422
+    assert "Stock insuficiente" in r.json["error"]
+
+    assert client.post("/ventas/api/ventas", data="no es json").status_code == 400
+    assert client.post("/ventas/api/ventas", json=[1, 2]).status_code == 400
+    r = client.post(
+        "/ventas/api/ventas", json=otro, headers={"Idempotency-Key": "x" * 101}
+    )
+    assert r.status_code == 400
+
+    with app.app_context():
+        assert _contar_ventas() == 1
+
+
+def test_reintentos_simultaneos_registran_una_sola_venta(app, monkeypatch):
+    import models.venta as modulo_venta
+
+    usuario_id, (pan, _) = _preparar(app)
+    carrito = [{"id": pan, "cantidad": 1}]
+
+    with app.app_context():
+        original = registrar_venta_idempotente(carrito, usuario_id, "doble")[1]
+
+        # El segundo reintento no ve la clave al empezar (llegó mientras el
+        # primero estaba en curso): debe chocar con ella al guardar
+        buscar = modulo_venta._buscar_clave_idempotencia
+        llamadas = []
+
+        def buscar_tarde(*args):
+            llamadas.append(args)
+            return None if len(llamadas) == 1 else buscar(*args)
+
+        monkeypatch.setattr(modulo_venta, "_buscar_clave_idempotencia", buscar_tarde)
+        estado, datos = registrar_venta_idempotente(carrito, usuario_id, "doble")
+
+        assert estado == "repetida"
+        assert datos == original
+        assert _contar_ventas() == 1
+        assert obtener_productos()[0]["stock"] == 4
+
+
+def test_purga_periodica_de_claves_vencidas(app):
+    from datetime import datetime, timedelta
+
+    from services.purga_idempotencia import iniciar_purga_periodica
+
+    # En testing el hilo no se inicia
+    assert iniciar_purga_periodica(app) is None
+
+    usuario_id, (pan, _) = _preparar(app)
+    carrito = [{"id": pan, "cantidad": 1}]
+    with app.app_context():
+        assert registrar_venta_idempotente(carrito, usuario_id, "k")[0] == "creada"
+        clave = _db.session.get(ClaveIdempotencia, (usuario_id, "k"))
+        clave.creada = datetime.now() - timedelta(hours=25)
+        _db.session.commit()
+
+    app.testing = False
+    app.config["IDEMPOTENCIA_PURGA_MINUTOS"] = 0.001
+    detener = iniciar_purga_periodica(app)
+    try:
+        for _ in range(100):
+            with app.app_context():
+                if _db.session.get(ClaveIdempotencia, (usuario_id, "k")) is None:
+                    break
+                _db.session.remove()
+            detener.wait(0.05)
+        else:
+            raise AssertionError("la clave vencida no se purgó")
+    finally:
+        detener.set()
+        app.testing = True
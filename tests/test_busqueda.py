@@ -0,0 +1,83 @@
+from models.busqueda import (
+    buscar_ventas,
+    crear_indice_busqueda,
+    indice_busqueda_disponible,
+    reconstruir_indice_busqueda,
+)
+from models.producto import agregar_producto, obtener_productos
+from models.venta import contar_ventas, obtener_ventas, registrar_venta
+from models_alchemy import User
+from models_alchemy import db as _db
+
+
+def _sembrar():
+    _db.session.add_all(
+        [
+            User(username="ana", password="x", rol="admin"),
+            User(username="beto", password="x", rol="usuario"),
+        ]
+    )
+    _db.session.commit()
+    for i, nombre in enumerate(
+        ["Pan", "Pan dulce", "Pan rallado", "Café 100%", "Leche"]
+    ):
+        agregar_producto(nombre, 100.0, 100, "General", f"C{i}")
+    ids = {p["nombre"]: p["id"] for p in obtener_productos()}
+
+    ventas = [
+        (1, ["Pan", "Pan dulce", "Pan rallado"]),
+        (2, ["Pan", "Café 100%"]),
+        (1, ["Leche"]),
+        (None, ["Café 100%", "Leche"]),
+    ]
+    for usuario_id, nombres in ventas:
+        exito, mensaje = registrar_venta(
+            [{"id": ids[n], "cantidad": 1} for n in nombres], usuario_id=usuario_id
+        )
+        assert exito, mensaje
+
+
+def _ids(ventas):
+    return sorted(v["id"] for v in ventas)
+
+
+def test_sin_indice_se_usa_la_busqueda_like(app):
+    with app.app_context():
+        _sembrar()
+        assert not indice_busqueda_disponible()
+        assert _ids(obtener_ventas(search_query="café")) == [2, 4]
+        assert buscar_ventas("café") == []
+
+
+def test_busqueda_indexada_por_producto_usuario_e_id(app):
+    with app.app_context():
+        _sembrar()
+        assert crear_indice_busqueda()
+        assert reconstruir_indice_busqueda(tamano_lote=2) == 4
+
+        # Prefijos, sin distinguir mayúsculas ni acentos
+        assert _ids(obtener_ventas(search_query="cafe")) == [2, 4]
+        assert _ids(obtener_ventas(search_query="CAF")) == [2, 4]
+        assert _ids(obtener_ventas(search_query="beto")) == [2]
+        assert _ids(obtener_ventas(search_query="ana leche")) == [3]
+        assert _ids(obtener_ventas(search_query="3")) == [3]
+        assert contar_ventas(search_query="pan") == 2
+        # Sin palabras indexables se vuelve a LIKE
+        assert _ids(obtener_ventas(search_query="%")) == [2, 4]
+
+        # Las ventas nuevas se indexan al registrarlas
+        leche = next(p["id"] for p in obtener_productos() if p["nombre"] == "Leche")
+        assert registrar_venta([{"id": leche, "cantidad": 2}], usuario_id=2)[0]
+        assert _ids(obtener_ventas(search_query="beto leche")) == [5]
+
+
+def test_buscar_ventas_ordena_por_relevancia_y_limita(app):
+    with app.app_context():
+        _sembrar()
+        reconstruir_indice_busqueda()
+
+        resultados = buscar_ventas("pan")
+        assert [v["id"] for v in resultados] == [1, 2]
+        assert resultados[0]["username"] == "ana"
+        assert [v["id"] for v in buscar_ventas("pan", limite=1)] == [1]
+        assert buscar_ventas("   ") == []
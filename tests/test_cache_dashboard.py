@@ -0,0 +1,59 @@
+from models.producto import agregar_producto, editar_producto, obtener_productos
+from models.resumen import (
+    GENERACION_PRODUCTOS,
+    GENERACION_VENTAS,
+    obtener_generaciones,
+    reconstruir_resumenes,
+)
+from models.venta import registrar_venta
+from routes.registros_routes import obtener_dashboard
+from services.cache_service import CacheVersionada, cache_de_app
+
+
+def test_cache_versionada_recalcula_solo_al_cambiar_la_version():
+    cache = CacheVersionada()
+    llamadas = []
+
+    def calcular():
+        llamadas.append(1)
+        return len(llamadas)
+
+    assert cache.obtener("x", 1, calcular) == 1
+    assert cache.obtener("x", 1, calcular) == 1
+    assert cache.obtener("x", 2, calcular) == 2
+    assert cache.obtener("y", 2, calcular) == 3
+    cache.invalidar("x")
+    assert cache.obtener("x", 2, calcular) == 4
+    assert (cache.aciertos, cache.fallos) == (1, 4)
+
+
+def test_dashboard_se_reutiliza_hasta_la_siguiente_venta(app):
+    with app.app_context():
+        agregar_producto("Pan", 50.0, 100, "Panadería", "P1")
+        producto_id = obtener_productos()[0]["id"]
+        assert obtener_generaciones(GENERACION_VENTAS, "otra") == (0, 0)
+
+        cache = cache_de_app(app)
+        vacio = obtener_dashboard()
+        assert obtener_dashboard() is vacio
+        assert vacio["estadisticas_general"]["total_ventas"] == 0
+
+        assert registrar_venta([{"id": producto_id, "cantidad": 2}])[0]
+        assert obtener_generaciones(GENERACION_VENTAS) == (1,)
+        con_venta = obtener_dashboard()
+        assert con_venta is not vacio
+        assert con_venta["estadisticas_general"]["total_ventas"] == 1
+        assert con_venta["top_productos"][0]["nombre"] == "Pan"
+        assert obtener_dashboard() is con_venta
+
+        # Renombrar el producto cambia el top sin que haya ventas nuevas
+        editar_producto(producto_id, "Pan casero", 50.0, 98, "Panadería", "P1")
+        assert obtener_generaciones(GENERACION_PRODUCTOS) == (1,)
+        assert obtener_dashboard()["top_productos"][0]["nombre"] == "Pan casero"
+
+        reconstruir_resumenes()
+        assert obtener_generaciones(GENERACION_VENTAS) == (2,)
+        assert (cache.aciertos, cache.fallos) == (2, 3)
+
+        app.config["REGISTROS_CACHE_DASHBOARD"] = False
+        assert obtener_dashboard() is not obtener_dashboard()
@@ -0,0 +1,152 @@
+"""Ventas concurrentes sobre un mismo producto.
+
+Varios procesos (como los workers de gunicorn) venden a la vez el mismo
+producto con poco stock. Sin importar cómo se intercalen, las unidades
+vendidas deben coincidir con las descontadas y el stock nunca puede quedar
+negativo ni venderse de más.
+
+Para correrlo también contra Postgres:
+    KAIROS_TEST_POSTGRES_URL=postgresql://... pytest tests/test_concurrencia_stock.py -s
+"""
+
+import multiprocessing
+import os
+import time
+
+import pytest
+from sqlalchemy import func, select, update
+
+from models.producto import obtener_productos_por_ids
+from models.venta import registrar_venta
+from models_alchemy import DetalleVenta, Producto, Venta
+from models_alchemy import db as _db
+from tests.conftest import create_test_app
+
+PROCESOS = 4
+INTENTOS_POR_PROCESO = 40
+STOCK_INICIAL = 60
+
+
+@pytest.fixture(params=["sqlite", "postgresql"])
+def base_concurrente(request, tmp_path):
+    """URI de una base con un único producto de stock ``STOCK_INICIAL``."""
+    if request.param == "sqlite":
+        uri = f"sqlite:///{tmp_path / 'concurrencia.db'}"
+    else:
+        uri = os.environ.get("KAIROS_TEST_POSTGRES_URL")
+        if not uri:
+            pytest.skip("KAIROS_TEST_POSTGRES_URL no configurada")
+
+    app = create_test_app(tmp_path, database_uri=uri)
+    with app.app_context():
+        producto = Producto(
+            nombre="Oferta", precio=10.0, stock=STOCK_INICIAL, codigo_barras="OF-1"
+        )
+        _db.session.add(producto)
+        _db.session.commit()
+        producto_id = producto.id
+        _db.session.remove()
+
+    yield app, uri, producto_id
+
+    if request.param != "sqlite":
+        with app.app_context():
+            _db.drop_all()
+
+
+def _vender(uri, ruta_tmp, producto_id, largada, resultados):
+    """Proceso hijo: intenta ``INTENTOS_POR_PROCESO`` ventas de una unidad."""
+    app = create_test_app(ruta_tmp, database_uri=uri)
+    exitos = rechazos = errores = 0
+    with app.app_context():
+        largada.wait()
+        for _ in range(INTENTOS_POR_PROCESO):
+            exito, mensaje = registrar_venta([{"id": producto_id, "cantidad": 1}])
+            if exito:
+                exitos += 1
+            elif mensaje.startswith("Stock insuficiente"):
+                rechazos += 1
+            else:
+                # p. ej. "database is locked" en SQLite: la venta no se hizo
+                errores += 1
+    resultados.put((exitos, rechazos, errores))
+
+
+def test_ventas_concurrentes_no_venden_de_mas(base_concurrente, tmp_path):
+    if "fork" not in multiprocessing.get_all_start_methods():
+        pytest.skip("requiere multiprocessing con fork")
+    app, uri, producto_id = base_concurrente
+
+    contexto = multiprocessing.get_context("fork")
+    largada = contexto.Event()
+    resultados = contexto.Queue()
+    procesos = [
+        contexto.Process(
+            target=_vender, args=(uri, tmp_path, producto_id, largada, resultados)
+        )
+        for _ in range(PROCESOS)
+    ]
+    for proceso in procesos:
+        proceso.start()
+    inicio = time.perf_counter()
+    largada.set()
+    conteos = [resultados.get(timeout=120) for _ in procesos]
+    duracion = time.perf_counter() - inicio
+    for proceso in procesos:
+        proceso.join(timeout=30)
+        assert proceso.exitcode == 0
+
+    exitos = sum(c[0] for c in conteos)
+    rechazos = sum(c[1] for c in conteos)
+    errores = sum(c[2] for c in conteos)
+    print(
+        f"\n{PROCESOS} procesos, {PROCESOS * INTENTOS_POR_PROCESO} intentos: "
+        f"{exitos} ventas, {rechazos} sin stock, {errores} errores en "
+        f"{duracion:.2f}s ({exitos / duracion:.0f} ventas/s)"
+    )
+
+    with app.app_context():
+        stock = _db.session.get(Producto, producto_id).stock
+        vendidas = _db.session.execute(
+            select(func.coalesce(func.sum(DetalleVenta.cantidad), 0)).where(
+                DetalleVenta.producto_id == producto_id
+            )
+        ).scalar_one()
+        ventas = _db.session.execute(select(func.count(Venta.id))).scalar_one()
+
+    assert stock >= 0
+    assert vendidas == exitos == ventas
+    assert stock == STOCK_INICIAL - exitos
+    # Hay más intentos que stock: si alguna venta se rechazó por stock, todo
+    # el stock tuvo que venderse
+    assert exitos <= STOCK_INICIAL
+    if rechazos:
+        assert stock == 0
+
+
+def test_registrar_venta_rechaza_si_el_stock_cambio_tras_la_lectura(app):
+    with app.app_context():
+        _db.session.add(
+            Producto(nombre="Último", precio=5.0, stock=3, codigo_barras="ULT-1")
+        )
+        _db.session.commit()
+        producto_id = _db.session.execute(select(Producto.id)).scalar_one()
+
+        # Foto leída antes de que otra caja venda dos unidades
+        productos = obtener_productos_por_ids([producto_id])
+        with _db.engine.begin() as otra_caja:
+            otra_caja.execute(
+                update(Producto)
+                .where(Producto.id == producto_id)
+                .values(stock=Producto.stock - 2)
+            )
+
+        exito, mensaje = registrar_venta(
+            [{"id": producto_id, "cantidad": 2}], productos=productos
+        )
+        assert exito is False
+        assert (
+            mensaje == "Stock insuficiente para 'Último'. Disponible: 1, solicitado: 2"
+        )
+        assert _db.session.get(Producto, producto_id).stock == 1
+        assert _db.session.execute(select(func.count(Venta.id))).scalar_one() == 0
@@ -0,0 +1,139 @@
+import threading
+import time
+
+import pytest
+from sqlalchemy import func, select
+
+from models.producto import agregar_producto, obtener_productos
+from models.venta import registrar_venta, registrar_venta_idempotente
+from models_alchemy import Venta
+from models_alchemy import db as _db
+from services.escritor_ventas import detener_escritor_ventas, iniciar_escritor_ventas
+
+
+@pytest.fixture
+def escritor(app):
+    # Ventana amplia para que las ventas concurrentes del test caigan juntas
+    app.config["VENTAS_ESCRITOR_VENTANA_MS"] = 50
+    escritor = iniciar_escritor_ventas(app, forzar=True)
+    yield escritor
+    detener_escritor_ventas(app)
+
+
+def _en_paralelo(app, funciones):
+    """Ejecuta cada función en su hilo (con app context) y devuelve sus resultados."""
+    largada = threading.Barrier(len(funciones))
+    resultados = [None] * len(funciones)
+
+    def correr(i, funcion):
+        with app.app_context():
+            largada.wait()
+            resultados[i] = funcion()
+            _db.session.remove()
+
+    hilos = [
+        threading.Thread(target=correr, args=(i, f)) for i, f in enumerate(funciones)
+    ]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join(timeout=30)
+    return resultados
+
+
+def test_escritor_agrupa_ventas_y_aisla_las_rechazadas(app, escritor):
+    with app.app_context():
+        agregar_producto("Pan", 10.0, 15, "Panadería", "ESC-001")
+        pid = obtener_productos()[0]["id"]
+
+    funciones = [
+        lambda: registrar_venta([{"id": pid, "cantidad": 1}]) for _ in range(20)
+    ]
+    funciones.append(lambda: registrar_venta([{"id": 999, "cantidad": 1}]))
+    resultados = _en_paralelo(app, funciones)
+
+    exitos = [r for r in resultados if r[0]]
+    assert len(exitos) == 15
+    assert all(m.startswith("Stock insuficiente") for e, m in resultados[:20] if not e)
+    assert resultados[-1] == (False, "Producto con ID 999 no encontrado.")
+
+    # Varias ventas por commit
+    assert escritor.ventas == 21
+    assert escritor.lotes < escritor.ventas
+
+    with app.app_context():
+        assert obtener_productos()[0]["stock"] == 0
+        assert _db.session.execute(select(func.count(Venta.id))).scalar_one() == 15
+
+
+def test_escritor_respeta_claves_de_idempotencia(app, escritor):
+    with app.app_context():
+        agregar_producto("Leche", 25.0, 10, "Lácteos", "ESC-002")
+        pid = obtener_productos()[0]["id"]
+
+    carrito = [{"id": pid, "cantidad": 2}]
+    resultados = _en_paralelo(
+        app,
+        [lambda: registrar_venta_idempotente(carrito, None, "misma") for _ in range(4)],
+    )
+
+    estados = sorted(estado for estado, _ in resultados)
+    assert estados == ["creada", "repetida", "repetida", "repetida"]
+    assert len({datos["venta_id"] for _, datos in resultados}) == 1
+    with app.app_context():
+        assert obtener_productos()[0]["stock"] == 8
+
+
+def test_sin_escritor_las_ventas_se_escriben_en_el_request(app):
+    with app.app_context():
+        agregar_producto("Yerba", 30.0, 5, "Almacén", "ESC-003")
+        pid = obtener_productos()[0]["id"]
+        assert iniciar_escritor_ventas(app) is None  # desactivado por defecto
+        assert registrar_venta([{"id": pid, "cantidad": 1}])[0] is True
+
+
+def test_venta_vencida_en_la_cola_no_se_registra(app, escritor, monkeypatch):
+    import models.venta
+
+    with app.app_context():
+        agregar_producto("Yerba", 30.0, 10, "Almacén", "ESC-003")
+        pid = obtener_productos()[0]["id"]
+
+    # La primera venta tarda más que la espera máxima y retiene al escritor
+    escritura_original = models.venta._escribir_venta
+    en_proceso = threading.Event()
+
+    def escritura_lenta(*args, **kwargs):
+        en_proceso.set()
+        time.sleep(1.0)
+        return escritura_original(*args, **kwargs)
+
+    monkeypatch.setattr(models.venta, "_escribir_venta", escritura_lenta)
+    escritor.espera_maxima = 0.3
+    carrito = [{"id": pid, "cantidad": 1}]
+
+    primera = []
+    hilo = threading.Thread(
+        target=lambda: primera.append(
+            _en_paralelo(app, [lambda: registrar_venta(carrito)])
+        )
+    )
+    hilo.start()
+    assert en_proceso.wait(5)
+
+    # La segunda vence mientras espera en la cola: se informa el error y se
+    # cancela, así que no se registra después
+    with app.app_context():
+        assert registrar_venta(carrito) == (
+            False,
+            "Tiempo de espera agotado al registrar la venta.",
+        )
+    hilo.join(10)
+
+    # La primera ya estaba en proceso al vencer su espera: se informa su resultado
+    assert primera[0][0][0] is True
+
+    detener_escritor_ventas(app)
+    with app.app_context():
+        assert _db.session.execute(select(func.count(Venta.id))).scalar_one() == 1
+        assert obtener_productos()[0]["stock"] == 9
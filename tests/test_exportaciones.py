@@ -0,0 +1,167 @@
+import os
+import time
+from datetime import datetime
+
+from models_alchemy import Venta
+from models_alchemy import db as _db
+from services.exportacion_service import (
+    ESTADO_LISTO,
+    enviar_exportacion,
+    limpiar_exportaciones_vencidas,
+    obtener_estado_exportacion,
+    ruta_archivo_exportacion,
+)
+
+
+def _esperar(app, job_id, timeout=10):
+    limite = time.time() + timeout
+    while time.time() < limite:
+        estado = obtener_estado_exportacion(app, job_id)
+        if estado["estado"] in (ESTADO_LISTO, "error"):
+            return estado
+        time.sleep(0.05)
+    raise AssertionError("La exportación no terminó a tiempo")
+
+
+def test_exportacion_en_segundo_plano(app, tmp_path):
+    app.config["EXPORTACIONES_DIR"] = str(tmp_path / "spool")
+    app.config["EXPORTACIONES_FILAS_POR_ACTUALIZACION"] = 3
+    with app.app_context():
+        for i in range(10):
+            _db.session.add(Venta(fecha=datetime(2024, 5, i + 1, 10), total=i))
+        _db.session.commit()
+
+    inicial = enviar_exportacion(app, {"monto_minimo": "4"}, "admin")
+    assert inicial["estado"] == "pendiente"
+
+    estado = _esperar(app, inicial["id"])
+    assert estado["estado"] == ESTADO_LISTO
+    assert estado["filas"] == estado["total"] == 6
+    assert estado["porcentaje"] == 100.0
+
+    ruta = ruta_archivo_exportacion(app, inicial["id"])
+    with open(ruta, encoding="utf-8-sig") as f:
+        lineas = f.read().splitlines()
+    assert lineas[0].startswith("ID Venta,")
+    assert [linea.split(",")[0] for linea in lineas[1:]] == [
+        "10",
+        "9",
+        "8",
+        "7",
+        "6",
+        "5",
+    ]
+
+
+def test_exportacion_id_invalido_y_expiracion(app, tmp_path):
+    spool = tmp_path / "spool"
+    app.config["EXPORTACIONES_DIR"] = str(spool)
+    app.config["EXPORTACIONES_EXPIRACION_MINUTOS"] = 5
+
+    assert obtener_estado_exportacion(app, "../../etc/passwd") is None
+    assert obtener_estado_exportacion(app, "0" * 32) is None
+
+    estado = enviar_exportacion(app, {}, "admin")
+    _esperar(app, estado["id"])
+    viejo = time.time() - 600
+    for nombre in os.listdir(spool):
+        os.utime(spool / nombre, (viejo, viejo))
+
+    assert limpiar_exportaciones_vencidas(app) == 2
+    assert obtener_estado_exportacion(app, estado["id"]) is None
+
+
+def test_rutas_de_exportacion(app, tmp_path):
+    from flask import g
+
+    app.config["EXPORTACIONES_DIR"] = str(tmp_path / "spool")
+
+    @app.before_request
+    def cargar_usuario():
+        g.usuario = {"id": 1, "username": "admin", "rol": "admin"}
+
+    with app.app_context():
+        for i in range(5):
+            _db.session.add(Venta(fecha=datetime(2024, 5, i + 1, 10), total=i))
+        _db.session.commit()
+    client = app.test_client()
+
+    r = client.post("/registros/exportaciones", json={"monto_minimo": "2"})
+    assert r.status_code == 202
+    job_id = r.json["id"]
+    assert r.json["estado"] == "pendiente"
+    assert r.json["estado_url"] == f"/registros/exportaciones/{job_id}"
+    assert "descarga_url" not in r.json
+
+    _esperar(app, job_id)
+    r = client.get(f"/registros/exportaciones/{job_id}")
+    assert r.status_code == 200
+    assert (r.json["estado"], r.json["filas"], r.json["porcentaje"]) == (
+        ESTADO_LISTO,
+        3,
+        100.0,
+    )
+
+    r = client.get(r.json["descarga_url"])
+    assert r.status_code == 200
+    assert r.mimetype == "text/csv"
+    assert "attachment" in r.headers["Content-Disposition"]
+    lineas = r.data.decode("utf-8-sig").splitlines()
+    assert [linea.split(",")[0] for linea in lineas[1:]] == ["5", "4", "3"]
+    r.close()
+
+    desconocido = "0" * 32
+    assert client.get(f"/registros/exportaciones/{desconocido}").status_code == 404
+    r = client.get(f"/registros/exportaciones/{desconocido}/descarga")
+    assert r.status_code == 404
+    assert client.get("/registros/exportaciones/..%2Fx").status_code == 404
+
+
+def test_descarga_de_exportacion_sin_terminar(app, tmp_path, monkeypatch):
+    import threading
+
+    from flask import g
+
+    import services.exportacion_service as exportacion_service
+
+    app.config["EXPORTACIONES_DIR"] = str(tmp_path / "spool")
+
+    @app.before_request
+    def cargar_usuario():
+        g.usuario = {"id": 1, "username": "admin", "rol": "admin"}
+
+    # El trabajo queda pendiente hasta que el test lo libera
+    liberar = threading.Event()
+    ejecutar = exportacion_service._ejecutar_exportacion
+
+    def ejecutar_despues(*args):
+        liberar.wait(10)
+        ejecutar(*args)
+
+    monkeypatch.setattr(exportacion_service, "_ejecutar_exportacion", ejecutar_despues)
+    client = app.test_client()
+
+    job_id = client.post("/registros/exportaciones", json={}).json["id"]
+    try:
+        r = client.get(f"/registros/exportaciones/{job_id}")
+        assert (r.status_code, r.json["estado"]) == (200, "pendiente")
+        assert "descarga_url" not in r.json
+        r = client.get(f"/registros/exportaciones/{job_id}/descarga")
+        assert r.status_code == 404
+    finally:
+        liberar.set()
+
+    _esperar(app, job_id)
+    assert client.get(f"/registros/exportaciones/{job_id}/descarga").status_code == 200
+
+
+def test_rutas_de_exportacion_solo_admin(app):
+    from flask import g
+
+    @app.before_request
+    def cargar_usuario():
+        g.usuario = {"id": 2, "username": "caja1", "rol": "usuario"}
+
+    client = app.test_client()
+    assert client.post("/registros/exportaciones", json={}).status_code == 302
+    assert client.get(f"/registros/exportaciones/{'0' * 32}").status_code == 302
@@ -0,0 +1,133 @@
+import random
+from datetime import date, datetime, time
+
+import numpy as np
+import pytest
+
+from models.percentiles import obtener_percentiles_ticket
+from models.producto import agregar_producto, obtener_productos
+from models.resumen import reconstruir_resumenes
+from models.venta import registrar_venta
+from models_alchemy import User, Venta
+from models_alchemy import db as _db
+from services.tdigest import TDigest
+
+
+def _rango_relativo(valores_ordenados, estimado):
+    """Fracción de valores menores o iguales al estimado."""
+    return np.searchsorted(valores_ordenados, estimado, side="right") / len(
+        valores_ordenados
+    )
+
+
+def test_pocos_valores_dan_cuantiles_exactos():
+    valores = [random.Random(3).randint(1, 500) * 1000 for _ in range(40)]
+    digest = TDigest()
+    for v in valores:
+        digest.agregar(v)
+    for q in (0, 0.1, 0.5, 0.9, 0.99, 1):
+        assert digest.cuantil(q) == pytest.approx(np.percentile(valores, q * 100))
+    assert TDigest().cuantil(0.5) is None
+
+
+def test_error_de_rango_acotado_y_colas_precisas():
+    rnd = random.Random(7)
+    valores = [rnd.lognormvariate(10, 1) for _ in range(50_000)]
+    digest = TDigest()
+    for v in valores:
+        digest.agregar(v)
+
+    ordenados = np.sort(valores)
+    assert len(digest.centroides) <= 100
+    for q in (0.01, 0.1, 0.5, 0.9, 0.99, 0.999):
+        assert _rango_relativo(ordenados, digest.cuantil(q)) == pytest.approx(
+            q, abs=max(0.005, q * (1 - q) * 0.05)
+        )
+    assert (digest.cuantil(0), digest.cuantil(1)) == (min(valores), max(valores))
+
+
+def test_fusionar_digests_equivale_al_digest_completo():
+    rnd = random.Random(11)
+    partes = [[rnd.expovariate(1 / (i + 1)) for _ in range(3000)] for i in range(10)]
+    fusionado = TDigest()
+    for parte in partes:
+        digest = TDigest()
+        for v in parte:
+            digest.agregar(v)
+        fusionado.fusionar(TDigest.desde_dict(digest.a_dict()))
+
+    ordenados = np.sort([v for parte in partes for v in parte])
+    assert fusionado.total == len(ordenados)
+    for q in (0.5, 0.9, 0.99):
+        assert _rango_relativo(ordenados, fusionado.cuantil(q)) == pytest.approx(
+            q, abs=0.01
+        )
+
+
+def test_ventas_actualizan_los_digests_por_dia_y_usuario(app):
+    with app.app_context():
+        _db.session.add_all(
+            [
+                User(id=1, username="ana", password="x", rol="admin"),
+                User(id=2, username="beto", password="x", rol="usuario"),
+            ]
+        )
+        _db.session.commit()
+        agregar_producto("Pan", 1000.0, 10_000, "General", "P1")
+        producto_id = obtener_productos()[0]["id"]
+
+        cantidades = {1: [1, 2, 3, 4, 10], 2: [5, 6], None: [7]}
+        for usuario_id, lista in cantidades.items():
+            for cantidad in lista:
+                assert registrar_venta(
+                    [{"id": producto_id, "cantidad": cantidad}], usuario_id=usuario_id
+                )[0]
+
+        todos = [1000.0 * c for lista in cantidades.values() for c in lista]
+        hoy = date.today().isoformat()
+        for desde in (None, hoy):
+            percentiles = obtener_percentiles_ticket(desde=desde)
+            assert percentiles["cantidad"] == len(todos)
+            assert percentiles["p50"] == pytest.approx(np.percentile(todos, 50))
+            assert percentiles["p90"] == pytest.approx(np.percentile(todos, 90))
+
+        de_ana = obtener_percentiles_ticket(usuario_id=1, cuantiles=(0.5, 0.99))
+        assert de_ana == {
+            "cantidad": 5,
+            "p50": 3000.0,
+            "p99": pytest.approx(np.percentile([1, 2, 3, 4, 10], 99) * 1000),
+        }
+        assert obtener_percentiles_ticket(usuario_id=0)["p50"] == 7000.0
+        assert obtener_percentiles_ticket(desde="2000-01-01", hasta="2000-12-31") == {
+            "cantidad": 0,
+            "p50": None,
+            "p90": None,
+            "p99": None,
+        }
+
+        # La reconstrucción desde ``ventas`` produce los mismos percentiles
+        incremental = obtener_percentiles_ticket()
+        reconstruir_resumenes()
+        assert obtener_percentiles_ticket() == incremental
+
+
+def test_ventana_sobre_meses_completos_y_dias(app):
+    with app.app_context():
+        dias_totales = [
+            (date(2026, 1, 31), 100),
+            (date(2026, 2, 15), 200),
+            (date(2026, 3, 1), 300),
+        ]
+        for i, (dia, total) in enumerate(dias_totales, start=1):
+            _db.session.add(
+                Venta(id=i, fecha=datetime.combine(dia, time(9)), total=total)
+            )
+        _db.session.commit()
+        reconstruir_resumenes()
+
+        def mediana(desde, hasta):
+            return obtener_percentiles_ticket(desde, hasta, cuantiles=(0.5,))
+
+        assert mediana("2026-02-01", "2026-02-28") == {"cantidad": 1, "p50": 200}
+        assert mediana("2026-01-31", "2026-03-01") == {"cantidad": 3, "p50": 200}
+        assert mediana("2026-02-01", "2026-03-31") == {"cantidad": 2, "p50": 250}
@@ -0,0 +1,54 @@
+import pytest
+
+from config import Config
+from models_alchemy import db as _db
+from services.perfil_sqlite import aplicar_perfil_sqlite, pragmas_del_perfil
+
+
+def _config_sqlite(**cambios):
+    config = {k: getattr(Config, k) for k in dir(Config) if k.startswith("SQLITE_")}
+    config.update(cambios)
+    return config
+
+
+def test_pragmas_del_perfil_por_defecto():
+    assert pragmas_del_perfil(_config_sqlite()) == [
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA busy_timeout=5000",
+        "PRAGMA cache_size=-65536",
+        f"PRAGMA mmap_size={256 * 1024 * 1024}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+
+
+def test_pragmas_del_perfil_configurables():
+    assert pragmas_del_perfil(_config_sqlite(SQLITE_OPTIMIZAR=False)) == []
+
+    pragmas = pragmas_del_perfil(
+        _config_sqlite(SQLITE_SYNCHRONOUS="full", SQLITE_MMAP_SIZE_MB=None)
+    )
+    assert "PRAGMA synchronous=FULL" in pragmas
+    assert not any("mmap_size" in p for p in pragmas)
+
+    with pytest.raises(ValueError):
+        pragmas_del_perfil(_config_sqlite(SQLITE_JOURNAL_MODE="WAL; DROP TABLE x"))
+
+
+def test_perfil_se_aplica_a_cada_conexion(app):
+    app.config.update(_config_sqlite())
+    aplicar_perfil_sqlite(app)
+
+    with app.app_context():
+        for _ in range(2):  # también en conexiones nuevas del pool
+            with _db.engine.connect() as conexion:
+
+                def pragma(nombre):
+                    return conexion.exec_driver_sql(f"PRAGMA {nombre}").scalar()
+
+                assert pragma("journal_mode") == "wal"
+                assert pragma("synchronous") == 1  # NORMAL
+                assert pragma("busy_timeout") == 5000
+                assert pragma("cache_size") == -65536
+                assert pragma("temp_store") == 2  # MEMORY
+            _db.engine.dispose()
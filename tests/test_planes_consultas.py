@@ -0,0 +1,265 @@
+"""Regresión de planes de consulta.
+
+Cada consulta SELECT que emiten las funciones de ``models`` se pasa por
+``EXPLAIN QUERY PLAN`` (SQLite) o ``EXPLAIN`` (Postgres) y el test falla si
+el plan recorre completa una tabla grande (o uno de sus índices) en lugar
+de buscar en un índice. Las pocas consultas que recorren una tabla a
+propósito están en ``ESCANEOS_PERMITIDOS``.
+
+Para correr la suite también contra Postgres:
+    KAIROS_TEST_POSTGRES_URL=postgresql://... pytest tests/test_planes_consultas.py
+"""
+
+import os
+import re
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, insert, select
+
+from models.inventario import obtener_inventario, obtener_stock_bajo
+from models.producto import obtener_producto_por_codigo
+from models.venta import (
+    contar_ventas,
+    iterar_ventas_exportacion,
+    obtener_detalle_venta,
+    obtener_detalles_ventas,
+    obtener_pagina_ventas,
+    obtener_ventas,
+    obtener_ventas_keyset,
+    registrar_venta,
+)
+from models_alchemy import DetalleVenta, Producto, User, Venta
+from models_alchemy import db as _db
+from tests.conftest import create_test_app
+
+TABLAS_GRANDES = {"ventas", "detalle_ventas", "productos"}
+
+# Todo "SCAN <tabla>" recorre la tabla completa, también "SCAN ventas USING
+# INDEX ...": recorrer un índice entero cuesta lo mismo que la tabla
+_SCAN_SQLITE = re.compile(r"^SCAN (\w+)")
+_SCAN_POSTGRES = re.compile(r"Seq Scan on (\w+)")
+
+
+@pytest.fixture(params=["sqlite", "postgresql"])
+def app_planes(request, tmp_path):
+    if request.param == "sqlite":
+        app = create_test_app(tmp_path)
+    else:
+        url = os.environ.get("KAIROS_TEST_POSTGRES_URL")
+        if not url:
+            pytest.skip("KAIROS_TEST_POSTGRES_URL no configurada")
+        app = create_test_app(tmp_path, database_uri=url)
+
+    with app.app_context():
+        _sembrar()
+        yield app
+        _db.session.remove()
+        if request.param != "sqlite":
+            _db.drop_all()
+
+
+def _sembrar(cantidad_ventas=2000):
+    usuarios = [
+        User(username=f"caja{i}", password="x", rol="usuario") for i in range(5)
+    ]
+    productos = [
+        Producto(
+            nombre=f"Producto {i:03d}",
+            precio=100.0 + i,
+            stock=1000,
+            categoria=f"cat{i % 7}",
+            codigo_barras=f"CB{i:05d}",
+        )
+        for i in range(200)
+    ]
+    _db.session.add_all(usuarios + productos)
+    _db.session.flush()
+
+    inicio = datetime(2024, 1, 1, 8)
+    _db.session.execute(
+        insert(Venta),
+        [
+            {
+                "id": i + 1,
+                "fecha": inicio + timedelta(hours=i * 5),
+                "total": 100.0,
+                "usuario_id": usuarios[i % 5].id,
+            }
+            for i in range(cantidad_ventas)
+        ],
+    )
+    _db.session.execute(
+        insert(DetalleVenta),
+        [
+            {
+                "venta_id": i + 1,
+                "producto_id": productos[(i + j * 31) % 200].id,
+                "cantidad": 1,
+                "subtotal": 100.0,
+            }
+            for i in range(cantidad_ventas)
+            for j in range(3)
+        ],
+    )
+    _db.session.commit()
+    # Estadísticas para que el planificador decida como con datos reales
+    _db.session.connection().exec_driver_sql("ANALYZE")
+    _db.session.commit()
+
+
+@contextmanager
+def _capturar_consultas():
+    """Registra las sentencias SELECT que se ejecutan dentro del bloque."""
+    consultas = []
+
+    def capturar(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and not executemany:
+            consultas.append((statement, parameters))
+
+    event.listen(_db.engine, "before_cursor_execute", capturar)
+    try:
+        yield consultas
+    finally:
+        event.remove(_db.engine, "before_cursor_execute", capturar)
+
+
+def _escaneos_completos(statement, parameters):
+    """Devuelve las tablas grandes que el plan de ``statement`` recorre completas."""
+    conexion = _db.session.connection()
+    if conexion.dialect.name == "postgresql":
+        # Con seqscan deshabilitado, un Seq Scan que persiste significa que
+        # ningún índice puede resolver la consulta.
+        conexion.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        plan = [
+            f[0] for f in conexion.exec_driver_sql("EXPLAIN " + statement, parameters)
+        ]
+        tablas = [m.group(1) for linea in plan for m in _SCAN_POSTGRES.finditer(linea)]
+    else:
+        plan = [
+            f[-1]
+            for f in conexion.exec_driver_sql(
+                "EXPLAIN QUERY PLAN " + statement, parameters
+            )
+        ]
+        tablas = [m.group(1) for m in map(_SCAN_SQLITE.match, plan) if m]
+    return [t for t in tablas if t in TABLAS_GRANDES], plan
+
+
+def _assert_sin_escaneos_completos(funcion, *args, permitidas=(), **kwargs):
+    with _capturar_consultas() as consultas:
+        resultado = funcion(*args, **kwargs)
+        if hasattr(resultado, "__next__"):
+            list(resultado)
+    assert consultas, f"{funcion.__name__} no ejecutó consultas"
+    for statement, parameters in consultas:
+        tablas, plan = _escaneos_completos(statement, parameters)
+        tablas = [t for t in tablas if t not in permitidas]
+        assert not tablas, (
+            f"{funcion.__name__} recorre completa(s) {tablas}:\n{statement}\n"
+            + "\n".join(plan)
+        )
+
+
+RANGO = {"fecha_desde": "2024-03-01", "fecha_hasta": "2024-03-07"}
+CONSULTAS = [
+    ("pagina", obtener_pagina_ventas, {"page": 3, "per_page": 10}),
+    ("pagina_rango", obtener_pagina_ventas, dict(RANGO, page=1, per_page=10)),
+    ("pagina_busqueda", obtener_pagina_ventas, {"search_query": "producto 01"}),
+    ("ventas_rango", obtener_ventas, RANGO),
+    ("ventas_rango_monto", obtener_ventas, dict(RANGO, monto_minimo="50")),
+    ("contar_rango", contar_ventas, RANGO),
+    ("keyset_inicio", obtener_ventas_keyset, {"per_page": 10}),
+    (
+        "keyset_siguiente",
+        obtener_ventas_keyset,
+        {"despues_de": (datetime(2024, 6, 1, 12), 700), "per_page": 10},
+    ),
+    (
+        "keyset_anterior",
+        obtener_ventas_keyset,
+        {"antes_de": (datetime(2024, 6, 1, 12), 700), "per_page": 10},
+    ),
+    ("exportacion_rango", iterar_ventas_exportacion, RANGO),
+    ("detalle_venta", obtener_detalle_venta, {"venta_id": 1234}),
+    ("detalles_ventas", obtener_detalles_ventas, {"venta_ids": range(100, 150)}),
+    ("inventario", obtener_inventario, {}),
+    ("stock_bajo", obtener_stock_bajo, {"limite": 5}),
+    ("producto_por_codigo", obtener_producto_por_codigo, {"codigo_barras": "CB00042"}),
+    (
+        "registrar_venta",
+        registrar_venta,
+        {"productos_cantidades": [{"id": 5, "cantidad": 1}, {"id": 9, "cantidad": 2}]},
+    ),
+]
+
+
+# Consultas que recorren una tabla completa a propósito, con el motivo
+ESCANEOS_PERMITIDOS = {
+    # COUNT sin filtros de la paginación numerada y OFFSET sobre el índice
+    # (fecha, id); con muchas ventas el listado pasa a paginar por cursor
+    "pagina": {"ventas"},
+    # Búsqueda con LIKE cuando no existe el índice de texto (ver
+    # test_busqueda_indexada_usa_el_indice_de_texto)
+    "pagina_busqueda": {"ventas"},
+    # Primera página por cursor: lee ix_ventas_fecha_id en orden y se
+    # detiene en el LIMIT, aunque el plan lo muestre como SCAN
+    "keyset_inicio": {"ventas"},
+    # El inventario lista todos los productos, y stock_bajo filtra por
+    # stock (sin índice) sobre el mismo listado ordenado por nombre
+    "inventario": {"productos"},
+    "stock_bajo": {"productos"},
+}
+
+
+@pytest.mark.parametrize(
+    "funcion,kwargs,permitidas",
+    [(f, k, ESCANEOS_PERMITIDOS.get(nombre, ())) for nombre, f, k in CONSULTAS],
+    ids=[c[0] for c in CONSULTAS],
+)
+def test_consultas_de_modelos_usan_indices(app_planes, funcion, kwargs, permitidas):
+    _assert_sin_escaneos_completos(funcion, permitidas=permitidas, **kwargs)
+
+
+def test_detector_reconoce_un_escaneo_completo(app_planes):
+    def sin_indice():
+        return _db.session.execute(select(Venta).where(Venta.total > 50)).all()
+
+    with pytest.raises(AssertionError, match="ventas"):
+        _assert_sin_escaneos_completos(sin_indice)
+
+
+def test_detector_reconoce_un_recorrido_completo_de_indice(app_planes):
+    # El predicado de cursor escrito con OR recorre ix_ventas_fecha_id desde
+    # el inicio ("SCAN ventas USING INDEX") en lugar de buscar en él
+    from sqlalchemy import and_, desc, or_
+
+    fecha, venta_id = datetime(2024, 6, 1, 12), 700
+
+    def cursor_con_or():
+        stmt = (
+            select(Venta)
+            .where(
+                or_(
+                    Venta.fecha < fecha,
+                    and_(Venta.fecha == fecha, Venta.id < venta_id),
+                )
+            )
+            .order_by(desc(Venta.fecha), desc(Venta.id))
+            .limit(10)
+        )
+        return _db.session.execute(stmt).all()
+
+    if _db.session.get_bind().dialect.name != "sqlite":
+        pytest.skip("El plan de SQLite es el que muestra el recorrido del índice")
+    with pytest.raises(AssertionError, match="ventas"):
+        _assert_sin_escaneos_completos(cursor_con_or)
+
+
+def test_busqueda_indexada_usa_el_indice_de_texto(app_planes):
+    from models.busqueda import reconstruir_indice_busqueda
+
+    reconstruir_indice_busqueda()
+    for filtros in ({"search_query": "producto 01"}, {"search_query": "caja3"}):
+        _assert_sin_escaneos_completos(obtener_pagina_ventas, **filtros)
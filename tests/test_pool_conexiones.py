@@ -0,0 +1,138 @@
+import threading
+import time
+
+import pytest
+from flask import Flask, g
+from sqlalchemy import create_engine, exc
+
+from config import Config
+from services.pool_conexiones import (
+    QueuePoolMedido,
+    configurar_pool,
+    estado_pool,
+    metricas_pool,
+)
+from tests.conftest import create_test_app
+
+
+@pytest.fixture
+def engine_chico(tmp_path):
+    """Engine con una sola conexión y sin overflow, para forzar esperas."""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=QueuePoolMedido,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.2,
+    )
+    yield engine
+    engine.dispose()
+
+
+def test_espera_por_pool_agotado(engine_chico):
+    with engine_chico.connect():
+        pass
+    assert metricas_pool(engine_chico)["agotamientos"] == 0
+
+    ocupada = engine_chico.connect()
+    liberar = threading.Timer(0.1, ocupada.close)
+    liberar.start()
+    with engine_chico.connect():
+        pass
+    liberar.join()
+
+    resumen = metricas_pool(engine_chico)
+    assert resumen["checkouts"] == 3
+    assert resumen["agotamientos"] == 1
+    assert resumen["timeouts"] == 0
+    assert resumen["espera_maxima_ms"] >= 90
+
+
+def test_timeout_del_pool(engine_chico):
+    with engine_chico.connect():
+        with pytest.raises(exc.TimeoutError):
+            engine_chico.connect()
+
+    resumen = metricas_pool(engine_chico)
+    assert resumen["timeouts"] == 1
+    assert resumen["agotamientos"] == 1
+    assert resumen["espera_maxima_ms"] >= 190
+
+    estado = estado_pool(engine_chico)
+    assert estado["clase"] == "QueuePoolMedido"
+    assert (estado["tamano"], estado["en_uso"], estado["max_overflow"]) == (1, 0, 0)
+
+
+def test_configurar_pool_solo_en_postgres():
+    app = Flask(__name__)
+    app.config.update(
+        {k: getattr(Config, k) for k in dir(Config) if k.startswith("DB_")}
+    )
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///kairos.db"
+    assert configurar_pool(app) == {}
+    assert "SQLALCHEMY_ENGINE_OPTIONS" not in app.config
+
+    app.config["SQLALCHEMY_DATABASE_URI"] = "postgresql://u:p@db/kairos"
+    app.config["DB_POOL_SIZE"] = 20
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {"pool_recycle": 60}
+    configurar_pool(app)
+    opciones = app.config["SQLALCHEMY_ENGINE_OPTIONS"]
+    assert opciones["poolclass"] is QueuePoolMedido
+    assert opciones["pool_size"] == 20
+    assert opciones["max_overflow"] == 10
+    assert opciones["pool_pre_ping"] is True
+    assert opciones["pool_recycle"] == 60  # la opción explícita tiene prioridad
+
+
+def test_endpoint_pool_solo_admin(tmp_path):
+    # Principal y réplica con pools medidos: cada uno informa sus checkouts
+    app = create_test_app(
+        tmp_path,
+        SQLALCHEMY_ENGINE_OPTIONS={"poolclass": QueuePoolMedido},
+        DATABASE_REPLICA_URL=f"sqlite:///{tmp_path / 'replica.db'}",
+    )
+    usuario = {"id": 1, "username": "caja1", "rol": "usuario"}
+
+    @app.before_request
+    def cargar_usuario():
+        g.usuario = usuario
+
+    client = app.test_client()
+    assert client.get("/admin/pool").status_code == 302
+
+    replica = app.extensions["kairos_replica"].motor
+    for _ in range(3):
+        replica.connect().close()
+
+    usuario["rol"] = "admin"
+    r = client.get("/admin/pool")
+    assert r.status_code == 200
+    datos = r.get_json()
+    assert "pid" in datos["estado"]
+    assert "espera_p95_ms" in datos["metricas"]
+    assert datos["replica"]["metricas"]["checkouts"] == 3
+    assert datos["metricas"]["checkouts"] >= 1
+    assert datos["metricas"]["checkouts"] != datos["replica"]["metricas"]["checkouts"]
+
+
+def test_metricas_sobreviven_a_dispose(engine_chico):
+    engine_chico.connect().close()
+    engine_chico.dispose()
+    engine_chico.connect().close()
+    assert metricas_pool(engine_chico)["checkouts"] == 2
+
+
+def test_reintento_interno_se_mide_una_vez(engine_chico):
+    # Dos hilos esperan la misma conexión: cada checkout cuenta una sola vez
+    ocupada = engine_chico.connect()
+    hilos = [
+        threading.Thread(target=lambda: engine_chico.connect().close())
+        for _ in range(2)
+    ]
+    for h in hilos:
+        h.start()
+    time.sleep(0.02)
+    ocupada.close()
+    for h in hilos:
+        h.join()
+    assert metricas_pool(engine_chico)["checkouts"] == 3
@@ -0,0 +1,201 @@
+from datetime import date
+
+import pytest
+from flask import g
+
+from models.producto import agregar_producto, obtener_productos
+from models.venta import registrar_venta
+from models_alchemy import User
+from models_alchemy import db as _db
+
+
+@pytest.fixture
+def usuario():
+    """Usuario del request; los tests pueden cambiarle el rol."""
+    return {"id": 1, "username": "ana", "rol": "admin"}
+
+
+@pytest.fixture
+def cliente(app, usuario):
+    """Cliente con ventas de hoy: 3 Pan y 1 Leche de ana, 3 Leche sin usuario."""
+
+    @app.before_request
+    def cargar_usuario():
+        g.usuario = usuario
+
+    with app.app_context():
+        _db.session.add(User(id=1, username="ana", password="x", rol="admin"))
+        _db.session.commit()
+        agregar_producto("Pan", 10.0, 100, "Panadería", "R-001")
+        agregar_producto("Leche", 25.0, 100, "Lácteos", "R-002")
+        ids = {p["nombre"]: p["id"] for p in obtener_productos()}
+        assert registrar_venta([{"id": ids["Pan"], "cantidad": 3}], usuario_id=1)[0]
+        assert registrar_venta([{"id": ids["Leche"], "cantidad": 1}], usuario_id=1)[0]
+        assert registrar_venta([{"id": ids["Leche"], "cantidad": 3}])[0]
+    return app.test_client()
+
+
+def test_api_top_productos(cliente):
+    r = cliente.get("/registros/api/top-productos")
+    assert r.status_code == 200
+    assert r.json["ventana"] == "todo"
+    assert r.json["desde"] is None
+    assert [(p["nombre"], p["cantidad_vendida"]) for p in r.json["productos"]] == [
+        ("Leche", 4),
+        ("Pan", 3),
+    ]
+
+    hoy = date.today().isoformat()
+    r = cliente.get("/registros/api/top-productos?ventana=hoy&n=1")
+    assert r.json["desde"] == hoy
+    assert len(r.json["productos"]) == 1
+
+    r = cliente.get(f"/registros/api/top-productos?desde={hoy}&hasta={hoy}&n=0")
+    assert len(r.json["productos"]) == 1  # n se acota a 1..50
+
+
+@pytest.mark.parametrize(
+    "consulta",
+    [
+        "ventana=anio",
+        "desde=2026-13-01",
+        "desde=2026-02-01&hasta=2026-01-01",
+        "desde=0001-01-01&hasta=9999-12-31",
+    ],
+)
+def test_api_top_productos_rechaza_ventanas_invalidas(cliente, consulta):
+    r = cliente.get(f"/registros/api/top-productos?{consulta}")
+    assert r.status_code == 400
+    assert r.json["error"]
+
+
+def test_api_top_productos_hasta_el_ultimo_mes_representable(cliente):
+    for desde in ("9999-01-01", "9999-12-01"):
+        r = cliente.get(f"/registros/api/top-productos?desde={desde}&hasta=9999-12-31")
+        assert r.status_code == 200
+        assert r.json["productos"] == []
+
+
+def test_api_percentiles(cliente):
+    r = cliente.get("/registros/api/percentiles")
+    assert r.status_code == 200
+    assert (r.json["desde"], r.json["hasta"]) == (None, None)
+    assert r.json["cantidad"] == 3
+    assert r.json["p50"] == 30.0  # tickets de 30, 25 y 75
+    assert 30.0 < r.json["p99"] <= 75.0
+
+    r = cliente.get("/registros/api/percentiles?usuario=ana")
+    assert r.json["cantidad"] == 2
+
+    hoy = date.today().isoformat()
+    r = cliente.get(f"/registros/api/percentiles?desde={hoy}&hasta={hoy}")
+    assert r.json["cantidad"] == 3
+    r = cliente.get("/registros/api/percentiles?desde=2000-01-01&hasta=2000-01-31")
+    assert r.json["cantidad"] == 0
+    assert r.json["p50"] is None
+
+
+@pytest.mark.parametrize(
+    "consulta",
+    [
+        "usuario=nadie",
+        "hasta=31/12/2026",
+        "desde=2026-02-01&hasta=2026-01-01",
+        "desde=0001-01-01&hasta=9999-12-31",
+    ],
+)
+def test_api_percentiles_rechaza_parametros_invalidos(cliente, consulta):
+    r = cliente.get(f"/registros/api/percentiles?{consulta}")
+    assert r.status_code == 400
+    assert r.json["error"]
+
+
+def test_api_series(cliente):
+    hoy = date.today()
+    r = cliente.get("/registros/api/series")
+    assert r.status_code == 200
+    assert r.json["granularidad"] == "day"
+    assert len(r.json["periodos"]) == 30
+    assert r.json["periodos"][-1] == hoy.isoformat()
+    assert (r.json["cantidad"][-1], r.json["total"][-1]) == (3, 130.0)
+
+    r = cliente.get("/registros/api/series?granularidad=month&periodos=3")
+    assert r.json["periodos"][-1] == hoy.strftime("%Y-%m")
+    assert len(r.json["periodos"]) == 3
+
+    r = cliente.get(f"/registros/api/series?granularidad=hour&hasta={hoy}")
+    assert len(r.json["periodos"]) == 24
+    assert sum(r.json["cantidad"]) == 3
+
+    r = cliente.get("/registros/api/series?usuario=ana&periodos=1")
+    assert (r.json["cantidad"], r.json["total"]) == ([2], [55.0])
+    r = cliente.get("/registros/api/series?categoria=Lácteos&periodos=1")
+    assert (r.json["cantidad"], r.json["total"]) == ([2], [100.0])
+
+
+@pytest.mark.parametrize("granularidad", ["hour", "day", "week", "month"])
+def test_api_series_hasta_el_ultimo_dia_representable(cliente, granularidad):
+    r = cliente.get(
+        f"/registros/api/series?granularidad={granularidad}&hasta=9999-12-31"
+        "&categoria=Lácteos"
+    )
+    assert r.status_code == 200
+    assert r.json["periodos"]
+
+
+@pytest.mark.parametrize(
+    "consulta",
+    [
+        "granularidad=year",
+        "desde=ayer",
+        "usuario=nadie",
+        "periodos=1000000000",
+        "desde=2026-02-01&hasta=2026-01-01",
+        "granularidad=hour&desde=2020-01-01&hasta=2026-01-01",
+    ],
+)
+def test_api_series_rechaza_parametros_invalidos(cliente, consulta):
+    r = cliente.get(f"/registros/api/series?{consulta}")
+    assert r.status_code == 400
+    assert r.json["error"]
+
+
+def test_api_buscar(app, cliente):
+    from models.busqueda import crear_indice_busqueda, reconstruir_indice_busqueda
+
+    # Sin índice de búsqueda no hay resultados, pero la respuesta es válida
+    r = cliente.get("/registros/api/buscar?q=leche")
+    assert r.status_code == 200
+    assert r.json == {"q": "leche", "resultados": []}
+
+    with app.app_context():
+        assert crear_indice_busqueda()
+        reconstruir_indice_busqueda()
+
+    r = cliente.get("/registros/api/buscar?q=%20leche%20")
+    assert r.json["q"] == "leche"
+    assert {v["total"] for v in r.json["resultados"]} == {25.0, 75.0}
+    fecha = r.json["resultados"][0]["fecha"]
+    assert date.fromisoformat(fecha[:10]) == date.today() and len(fecha) == 19
+
+    r = cliente.get("/registros/api/buscar?q=ana")
+    assert {v["username"] for v in r.json["resultados"]} == {"ana"}
+
+    # limit se acota a 1..100; un valor no numérico usa el de por defecto
+    assert (
+        len(cliente.get("/registros/api/buscar?q=leche&limit=0").json["resultados"])
+        == 1
+    )
+    assert (
+        len(cliente.get("/registros/api/buscar?q=leche&limit=x").json["resultados"])
+        == 2
+    )
+    assert cliente.get("/registros/api/buscar").json["resultados"] == []
+
+
+def test_apis_solo_para_admin(cliente, usuario):
+    usuario["rol"] = "usuario"
+    assert cliente.get("/registros/api/top-productos").status_code == 302
+    assert cliente.get("/registros/api/percentiles").status_code == 302
+    assert cliente.get("/registros/api/series").status_code == 302
+    assert cliente.get("/registros/api/buscar?q=pan").status_code == 302
@@ -0,0 +1,220 @@
+from datetime import datetime
+
+from models.venta import (
+    contar_ventas,
+    iterar_ventas_exportacion,
+    obtener_detalle_venta,
+    obtener_detalles_ventas,
+    obtener_pagina_ventas,
+    obtener_ventas,
+    obtener_ventas_keyset,
+)
+from models_alchemy import DetalleVenta, Producto, User, Venta
+from models_alchemy import db as _db
+from services.exportacion_service import ENCABEZADOS_CSV, generar_csv_ventas
+from services.ventas_service import (
+    codificar_cursor,
+    decodificar_cursor,
+    filter_ventas,
+    paginate,
+    productos_mas_vendidos,
+)
+
+
+def _sembrar_ventas():
+    """Crea usuarios, productos y ventas con fechas conocidas."""
+    ana = User(username="ana", password="x", rol="admin")
+    beto = User(username="beto", password="x", rol="usuario")
+    cafe = Producto(nombre="Café 100%", precio=100.0, stock=100, codigo_barras="C1")
+    pan = Producto(nombre="Pan", precio=50.0, stock=100, codigo_barras="P1")
+    _db.session.add_all([ana, beto, cafe, pan])
+    _db.session.flush()
+
+    filas = [
+        ("2024-01-10 09:00:00", ana.id, cafe, 1),
+        ("2024-01-10 18:30:00", beto.id, pan, 3),
+        ("2024-02-01 12:00:00", ana.id, pan, 10),
+        ("2024-02-15 08:15:00", None, cafe, 2),
+        ("2024-03-01 00:00:00", beto.id, cafe, 5),
+    ]
+    for fecha, usuario_id, producto, cantidad in filas:
+        subtotal = producto.precio * cantidad
+        venta = Venta(
+            fecha=datetime.fromisoformat(fecha), total=subtotal, usuario_id=usuario_id
+        )
+        _db.session.add(venta)
+        _db.session.flush()
+        _db.session.add(
+            DetalleVenta(
+                venta_id=venta.id,
+                producto_id=producto.id,
+                cantidad=cantidad,
+                subtotal=subtotal,
+            )
+        )
+    _db.session.commit()
+
+
+FILTROS = [
+    {},
+    {"search_query": "café"},
+    {"search_query": "pan"},
+    {"search_query": "100%"},
+    {"search_query": "beto"},
+    {"fecha_desde": "2024-01-10", "fecha_hasta": "2024-02-01"},
+    {"fecha_desde": "no-es-fecha"},
+    {"usuario_filtro": "AN"},
+    {"monto_minimo": "250"},
+    {"monto_minimo": "abc"},
+    {"search_query": "pan", "monto_minimo": "200"},
+]
+
+
+def test_filtros_sql_equivalen_a_filtro_en_memoria(app):
+    with app.app_context():
+        _sembrar_ventas()
+        todas = obtener_ventas()
+
+        for filtros in FILTROS:
+            esperado = filter_ventas(todas, obtener_detalle_venta, **filtros)
+            obtenido = obtener_ventas(**filtros)
+            assert [v["id"] for v in obtenido] == [v["id"] for v in esperado], filtros
+            assert contar_ventas(**filtros) == len(esperado), filtros
+
+
+def test_pagina_ventas_coincide_con_paginate(app):
+    with app.app_context():
+        _sembrar_ventas()
+        todas = obtener_ventas()
+
+        for page in (1, 2, 3, 99, "x"):
+            esperado = paginate(todas, page=page, per_page=2)
+            ventas, *meta = obtener_pagina_ventas(page=page, per_page=2)
+            assert [v["id"] for v in ventas] == [v["id"] for v in esperado[0]]
+            assert tuple(meta) == esperado[1:]
+
+
+def test_detalles_en_lote_equivalen_a_consulta_por_venta(app):
+    with app.app_context():
+        _sembrar_ventas()
+        todas = obtener_ventas()
+        ids = [v["id"] for v in todas] + [9999]
+
+        detalles = obtener_detalles_ventas(ids, tamano_lote=2)
+
+        assert detalles[9999] == []
+        for venta_id in ids:
+            assert detalles[venta_id] == obtener_detalle_venta(venta_id)
+
+        # Los servicios aceptan el mapping en lugar de la función por venta
+        assert filter_ventas(todas, detalles, search_query="pan") == filter_ventas(
+            todas, obtener_detalle_venta, search_query="pan"
+        )
+        assert productos_mas_vendidos(todas, detalles) == productos_mas_vendidos(
+            todas, obtener_detalle_venta
+        )
+
+
+def test_keyset_recorre_todas_las_ventas_en_ambas_direcciones(app):
+    with app.app_context():
+        _sembrar_ventas()
+        # Varias ventas con la misma fecha para ejercitar el desempate por id
+        for total in (1.0, 2.0, 3.0):
+            _db.session.add(Venta(fecha=datetime(2024, 2, 1, 12), total=total))
+        _db.session.commit()
+        esperado = [v["id"] for v in obtener_ventas()]
+
+        paginas, cursor, hay_mas = [], None, True
+        while hay_mas:
+            ventas, hay_mas = obtener_ventas_keyset(despues_de=cursor, per_page=3)
+            paginas.append(ventas)
+            cursor = decodificar_cursor(codificar_cursor(ventas[-1]))
+        assert [v["id"] for pagina in paginas for v in pagina] == esperado
+
+        # Volver hacia atrás desde la última página reproduce las anteriores
+        cursor = decodificar_cursor(codificar_cursor(paginas[-1][0]))
+        for pagina in reversed(paginas[:-1]):
+            ventas, _ = obtener_ventas_keyset(antes_de=cursor, per_page=3)
+            assert ventas == pagina
+            cursor = decodificar_cursor(codificar_cursor(ventas[0]))
+
+        ventas, hay_mas = obtener_ventas_keyset(per_page=3, usuario_filtro="beto")
+        assert [v["username"] for v in ventas] == ["beto", "beto"]
+        assert hay_mas is False
+
+
+def test_contar_ventas_con_limite(app):
+    with app.app_context():
+        _sembrar_ventas()
+        total = contar_ventas()
+        assert contar_ventas(limite=total + 5) == total
+        assert contar_ventas(limite=2) == 2
+        assert contar_ventas(limite=10, usuario_filtro="beto") == 2
+
+
+def test_cursor_invalido_se_ignora():
+    assert decodificar_cursor("") is None
+    assert decodificar_cursor("no-es-un-cursor") is None
+
+
+def test_exportacion_agrega_detalles_en_una_consulta(app):
+    with app.app_context():
+        _sembrar_ventas()
+        # Venta sin detalles ni usuario
+        _db.session.add(Venta(fecha=datetime(2024, 4, 1, 10), total=0.0))
+        _db.session.commit()
+
+        for filtros in FILTROS:
+            ventas = obtener_ventas(**filtros)
+            detalles = obtener_detalles_ventas(v["id"] for v in ventas)
+            esperado = [
+                (
+                    v["id"],
+                    v["fecha"],
+                    v["username"],
+                    sum(d["cantidad"] for d in detalles[v["id"]]),
+                    v["total"],
+                    ", ".join(d["nombre"] for d in detalles[v["id"]]),
+                )
+                for v in ventas
+            ]
+            filas = list(iterar_ventas_exportacion(tamano_lote=2, **filtros))
+            assert filas == esperado, filtros
+
+
+def test_csv_se_genera_en_bloques():
+    filas = [(i, "2024-01-01 00:00:00", "ana", 1, 10.0, "Pan, Café") for i in range(5)]
+
+    bloques = list(generar_csv_ventas(iter(filas), filas_por_bloque=2))
+
+    assert len(bloques) == 3
+    assert bloques[0].startswith("\ufeff".encode("utf-8"))
+    assert not bloques[1].startswith("\ufeff".encode("utf-8"))
+    texto = b"".join(bloques).decode("utf-8-sig").splitlines()
+    assert texto[0] == ",".join(ENCABEZADOS_CSV)
+    assert texto[1] == '0,2024-01-01 00:00:00,ana,1,10.0,"Pan, Café"'
+    assert len(texto) == 6
+
+
+def test_fechas_legado_en_texto_se_normalizan(app):
+    from sqlalchemy import text
+
+    from models.venta import normalizar_fechas_legado
+
+    with app.app_context():
+        # Filas como las guardaba la columna String anterior
+        for total in (1.0, 2.0, 3.0):
+            _db.session.execute(
+                text("INSERT INTO ventas (fecha, total) VALUES (:f, :t)"),
+                {"f": "2024-02-01 12:00:00", "t": total},
+            )
+        _db.session.commit()
+
+        assert normalizar_fechas_legado(tamano_lote=2) == 3
+        assert normalizar_fechas_legado() == 0
+
+        ventas = obtener_ventas(fecha_desde="2024-02-01", fecha_hasta="2024-02-01")
+        assert [v["fecha"] for v in ventas] == [datetime(2024, 2, 1, 12)] * 3
+        cursor = decodificar_cursor(codificar_cursor(ventas[0]))
+        siguientes, _ = obtener_ventas_keyset(despues_de=cursor, per_page=5)
+        assert [v["id"] for v in siguientes] == [v["id"] for v in ventas[1:]]
@@ -0,0 +1,208 @@
+import shutil
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from flask import g
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.exc import OperationalError
+
+from models.producto import agregar_producto
+from models_alchemy import Producto, Venta
+from models_alchemy import db as _db
+from services.replica_lectura import configurar_replica, usar_replica
+from tests.conftest import create_test_app
+
+
+def _crear_app(tmp_path, replica_url=None, **config):
+    """App con réplica: la base principal se copia a ``replica.db``."""
+    ruta_replica = tmp_path / "replica.db"
+    app = create_test_app(
+        tmp_path,
+        DATABASE_REPLICA_URL=replica_url or f"sqlite:///{ruta_replica}",
+        REPLICA_TOLERANCIA_SEGUNDOS=30,
+        REPLICA_VERIFICACION_SEGUNDOS=3600,  # los tests verifican a mano
+        **config,
+    )
+
+    @app.before_request
+    def cargar_usuario():
+        g.usuario = {"id": None, "username": "admin", "rol": "admin"}
+
+    with app.app_context():
+        agregar_producto("Pan", 10.0, 50, "Panadería", "REP-001")
+        _db.session.add(Venta(fecha=datetime.now() - timedelta(hours=1), total=10.0))
+        _db.session.commit()
+        _db.engine.dispose()
+    shutil.copy(tmp_path / "test_kairos.db", ruta_replica)
+    _verificar(app)
+    return app
+
+
+def _verificar(app):
+    with app.app_context():
+        return app.extensions["kairos_replica"].verificar(_db.engine)
+
+
+def _agregar_en_principal(app, *, producto=None, venta_hace=None):
+    with app.app_context():
+        if producto:
+            agregar_producto(producto, 5.0, 5, "Varios", f"REP-{producto}")
+        if venta_hace is not None:
+            fecha = datetime.now() - timedelta(seconds=venta_hace)
+            _db.session.add(Venta(fecha=fecha, total=99.0))
+            _db.session.commit()
+
+
+def _nombres_sugeridos(client):
+    r = client.get("/inventario/sugerencias?q=REP")
+    assert r.status_code == 200
+    return {p["nombre"] for p in r.get_json()}
+
+
+def test_reportes_leen_de_la_replica(tmp_path):
+    app = _crear_app(tmp_path)
+    client = app.test_client()
+
+    # Una venta reciente aún sin replicar está dentro de la tolerancia
+    _agregar_en_principal(app, producto="Leche", venta_hace=1)
+    assert _verificar(app) is True
+    assert _nombres_sugeridos(client) == {"Pan"}
+
+    r = client.post("/registros/exportar-csv", json={})
+    assert r.status_code == 200
+    assert r.data.decode("utf-8-sig").count("\n") == 2  # encabezado + 1 venta
+
+    # Las vistas sin el decorador siguen en la principal
+    r = client.get("/productos/")
+    assert "Leche" in r.get_data(as_text=True)
+
+
+def test_replica_atrasada_usa_la_principal(tmp_path):
+    app = _crear_app(tmp_path)
+    client = app.test_client()
+
+    _agregar_en_principal(app, producto="Leche", venta_hace=120)
+    assert _verificar(app) is False
+    assert _nombres_sugeridos(client) == {"Pan", "Leche"}
+
+    estado = app.extensions["kairos_replica"].resumen()
+    assert estado["disponible"] is False
+    assert estado["retraso_segundos"] >= 120
+
+
+def test_replica_caida_usa_la_principal(tmp_path):
+    app = _crear_app(tmp_path, replica_url=f"sqlite:///{tmp_path}/no/existe.db")
+    _agregar_en_principal(app, producto="Leche")
+
+    assert _nombres_sugeridos(app.test_client()) == {"Pan", "Leche"}
+    assert app.extensions["kairos_replica"].resumen()["error"]
+
+
+def test_escrituras_van_a_la_principal(tmp_path):
+    app = _crear_app(tmp_path)
+
+    with app.app_context():
+        assert usar_replica() is True
+        _db.session.add(Producto(nombre="Yerba", precio=30.0, stock=3))
+        _db.session.commit()
+        # Los SELECT del mismo contexto se leen de la réplica
+        total = _db.session.execute(select(func.count(Producto.id))).scalar()
+        assert total == 1
+
+    replica = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    principal = create_engine(f"sqlite:///{tmp_path / 'test_kairos.db'}")
+    contar = select(func.count(Producto.id))
+    with replica.connect() as r, principal.connect() as p:
+        assert (r.execute(contar).scalar(), p.execute(contar).scalar()) == (1, 2)
+    replica.dispose()
+    principal.dispose()
+
+
+def test_configurar_replica(app):
+    assert configurar_replica(app) is False
+
+    app.config["DATABASE_REPLICA_URL"] = "postgresql://u:p@replica/kairos"
+    with pytest.raises(ValueError):
+        configurar_replica(app)
+
+
+def test_verificacion_no_demora_el_request(tmp_path, monkeypatch):
+    import services.replica_lectura as replica_lectura
+
+    app = _crear_app(tmp_path)
+    estado = app.extensions["kairos_replica"]
+    estado.intervalo = 0
+
+    def medicion_lenta(*args):
+        time.sleep(0.5)
+        raise OperationalError("SELECT 1", {}, Exception("sin respuesta"))
+
+    monkeypatch.setattr(replica_lectura, "medir_retraso", medicion_lenta)
+    with app.app_context():
+        inicio = time.perf_counter()
+        assert usar_replica() is True  # última decisión, sin esperar la medición
+        assert time.perf_counter() - inicio < 0.2
+
+    # Al terminar la medición en segundo plano, las lecturas vuelven a la principal
+    for _ in range(50):
+        if not estado.disponible:
+            break
+        time.sleep(0.05)
+    assert estado.disponible is False
+    assert "sin respuesta" in estado.resumen()["error"]
+
+
+def test_venta_con_la_misma_fecha_que_la_ultima_replicada(tmp_path):
+    app = _crear_app(tmp_path)
+    with app.app_context():
+        ultima = _db.session.execute(select(func.max(Venta.fecha))).scalar()
+        _db.session.add(Venta(fecha=ultima, total=5.0))
+        _db.session.commit()
+
+    # Falta una venta de hace una hora, aunque su fecha no sea posterior
+    assert _verificar(app) is False
+    assert app.extensions["kairos_replica"].retraso >= 3500
+
+
+class _MotorFalso:
+    """Engine mínimo que responde siempre la misma fila (Postgres sin servidor)."""
+
+    dialect = type("Dialecto", (), {"name": "postgresql"})
+
+    def __init__(self, fila):
+        self.fila = fila
+
+    def connect(self):
+        from contextlib import nullcontext
+
+        resultado = type(
+            "Resultado", (), {"one": lambda _: self.fila, "scalar": lambda _: self.fila}
+        )()
+        conexion = type("Conexion", (), {"execute": lambda _, *a: resultado})()
+        return nullcontext(conexion)
+
+
+@pytest.mark.parametrize(
+    "fila, esperado",
+    [
+        ((True, "streaming", True, 3600.0), 0.0),
+        ((True, "streaming", False, 12.5), 12.5),
+        ((True, "streaming", False, None), float("inf")),
+        ((True, None, True, 0.0), "receptor de WAL"),
+        ((True, "waiting", True, 0.0), "receptor de WAL"),
+        ((False, None, True, None), "no es un standby"),
+    ],
+)
+def test_retraso_de_un_standby_postgres(fila, esperado):
+    from sqlalchemy.exc import DBAPIError
+
+    from services.replica_lectura import medir_retraso
+
+    primario = _MotorFalso("0/3000060")
+    if isinstance(esperado, str):
+        # Un standby desconectado no parece al día aunque haya aplicado todo
+        with pytest.raises(DBAPIError, match=esperado):
+            medir_retraso(_MotorFalso(fila), primario)
+    else:
+        assert medir_retraso(_MotorFalso(fila), primario) == esperado
@@ -0,0 +1,120 @@
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from models.producto import agregar_producto, obtener_productos
+from models.resumen import (
+    obtener_productos_mas_vendidos,
+    obtener_usuarios_con_ventas,
+    obtener_ventas_diarias,
+    reconstruir_resumenes,
+)
+from models.venta import obtener_detalles_ventas, obtener_ventas, registrar_venta
+from models_alchemy import User, Venta, VentaProductoDiaria
+from models_alchemy import db as _db
+from services.ventas_service import (
+    estadisticas_del_dia,
+    estadisticas_del_dia_desde_resumen,
+    estadisticas_generales,
+    estadisticas_generales_desde_resumen,
+    productos_mas_vendidos,
+)
+
+
+def _sembrar_historial():
+    """Ventas repartidas en los últimos ~200 días, con y sin usuario."""
+    ana = User(username="ana", password="x", rol="admin")
+    _db.session.add(ana)
+    _db.session.flush()
+
+    hoy = date.today()
+    for i in range(60):
+        dia = hoy - timedelta(days=(i * 7) % 200)
+        _db.session.add(
+            Venta(
+                fecha=datetime.combine(dia, time(i % 24)),
+                total=float(100 + (i * 37) % 500),
+                usuario_id=ana.id if i % 3 else None,
+            )
+        )
+    _db.session.commit()
+
+
+def _assert_estadisticas_equivalentes(ventas, resumen):
+    assert estadisticas_del_dia_desde_resumen(resumen) == pytest.approx(
+        estadisticas_del_dia(ventas)
+    )
+    assert estadisticas_generales_desde_resumen(resumen) == pytest.approx(
+        estadisticas_generales(ventas)
+    )
+
+
+def test_registrar_venta_actualiza_resumen_diario(app):
+    with app.app_context():
+        _db.session.add(User(username="caja", password="x", rol="usuario"))
+        _db.session.commit()
+        agregar_producto("Prod", 150.0, 100, "Cat", "R-001")
+        pid = obtener_productos()[0]["id"]
+
+        for cantidad in (1, 4, 2):
+            exito, _ = registrar_venta([{"id": pid, "cantidad": cantidad}], 1)
+            assert exito is True
+        registrar_venta([{"id": pid, "cantidad": 3}], usuario_id=None)
+
+        resumen = obtener_ventas_diarias()
+        por_usuario = {r["usuario_id"]: r for r in resumen}
+        assert por_usuario[1]["cantidad"] == 3
+        assert por_usuario[1]["total"] == 1050.0
+        assert por_usuario[1]["minimo"] == 150.0
+        assert por_usuario[1]["maximo"] == 600.0
+        assert por_usuario[None]["cantidad"] == 1
+        assert obtener_usuarios_con_ventas() == ["caja"]
+
+        _assert_estadisticas_equivalentes(obtener_ventas(), resumen)
+
+
+def test_reconstruir_resumen_equivale_a_recorrer_ventas(app):
+    with app.app_context():
+        _sembrar_historial()
+
+        assert reconstruir_resumenes()["ventas_diarias"] > 0
+        _assert_estadisticas_equivalentes(obtener_ventas(), obtener_ventas_diarias())
+
+
+def test_resumen_por_producto_y_top_n_por_ventana(app):
+    with app.app_context():
+        agregar_producto("Arroz", 10.0, 100, "Cat", "T-001")
+        agregar_producto("Fideos", 20.0, 100, "Cat", "T-002")
+        arroz, fideos = (p["id"] for p in obtener_productos())
+
+        registrar_venta([{"id": arroz, "cantidad": 2}, {"id": fideos, "cantidad": 5}])
+        registrar_venta([{"id": arroz, "cantidad": 1}])
+
+        top = obtener_productos_mas_vendidos(top_n=5)
+        assert [(p["producto_id"], p["cantidad_vendida"]) for p in top] == [
+            (fideos, 5),
+            (arroz, 3),
+        ]
+        assert top[0]["ventas_total"] == 100.0
+        assert top[1]["precio_promedio"] == 10.0
+
+        ventas = obtener_ventas()
+        detalles = obtener_detalles_ventas(v["id"] for v in ventas)
+        esperado = productos_mas_vendidos(ventas, detalles, top_n=5)
+        assert [{k: p[k] for k in esperado[0]} for p in top] == esperado
+
+        # Fuera de la ventana de días no hay ventas
+        assert obtener_productos_mas_vendidos(hasta="2000-01-01") == []
+        hoy = obtener_productos_mas_vendidos(top_n=1, desde=date.today().isoformat())
+        assert hoy[0]["producto_id"] == fideos
+
+        # La reconstrucción produce las mismas filas que el mantenimiento incremental
+        def filas():
+            return sorted(
+                (r.dia, r.producto_id, r.unidades, r.ingresos)
+                for r in _db.session.query(VentaProductoDiaria).all()
+            )
+
+        incremental = filas()
+        reconstruir_resumenes()
+        assert filas() == incremental
@@ -0,0 +1,167 @@
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from models.agregados import refrescar_agregados
+from models.resumen import reconstruir_resumenes
+from models.series import desde_para_periodos, obtener_serie_ventas
+from models_alchemy import DetalleVenta, Producto, User, Venta
+from models_alchemy import db as _db
+
+HASTA = date(2026, 3, 10)
+
+
+def _sembrar():
+    """Ventas cada 29 horas durante ~4 meses, con dos productos y usuarios."""
+    _db.session.add_all(
+        [
+            User(id=1, username="ana", password="x", rol="admin"),
+            User(id=2, username="beto", password="x", rol="usuario"),
+            Producto(id=1, nombre="Pan", precio=10, stock=0, categoria="Panadería"),
+            Producto(id=2, nombre="Leche", precio=25, stock=0, categoria="Lácteos"),
+        ]
+    )
+    ventas = []
+    inicio = datetime.combine(HASTA - timedelta(days=120), time(6))
+    for i in range(100):
+        fecha = inicio + timedelta(hours=29 * i)
+        lineas = [(1, 1 + i % 3)] + ([(2, 1)] if i % 4 == 0 else [])
+        total = sum(10 * c if p == 1 else 25 * c for p, c in lineas)
+        venta = Venta(
+            id=i + 1, fecha=fecha, total=total, usuario_id=(None, 1, 2)[i % 3]
+        )
+        ventas.append((venta, lineas))
+        _db.session.add(venta)
+        for producto_id, cantidad in lineas:
+            subtotal = cantidad * (10 if producto_id == 1 else 25)
+            _db.session.add(
+                DetalleVenta(
+                    venta_id=i + 1,
+                    producto_id=producto_id,
+                    cantidad=cantidad,
+                    subtotal=subtotal,
+                )
+            )
+    _db.session.commit()
+    reconstruir_resumenes()
+    refrescar_agregados()
+    return ventas
+
+
+def _esperado(ventas, clave, usuario_id=None, categoria=None):
+    """Serie calculada en Python sobre las ventas sembradas."""
+    acumulado = defaultdict(lambda: [0, 0])
+    for venta, lineas in ventas:
+        if usuario_id is not None and venta.usuario_id != (usuario_id or None):
+            continue
+        if categoria:
+            lineas = [
+                (p, c) for p, c in lineas if (p == 1) == (categoria == "Panadería")
+            ]
+            if not lineas:
+                continue
+            total = sum(10 * c if p == 1 else 25 * c for p, c in lineas)
+        else:
+            total = venta.total
+        fila = acumulado[clave(venta.fecha)]
+        fila[0] += 1
+        fila[1] += total
+    return acumulado
+
+
+def _claves(granularidad):
+    return {
+        "hour": lambda f: f.strftime("%Y-%m-%d %H"),
+        "day": lambda f: f.date().isoformat(),
+        "week": lambda f: (f.date() - timedelta(days=f.weekday())).isoformat(),
+        "month": lambda f: f.strftime("%Y-%m"),
+    }[granularidad]
+
+
+@pytest.mark.parametrize(
+    "granularidad,desde,filtros",
+    [
+        ("month", HASTA - timedelta(days=150), {}),
+        ("week", HASTA - timedelta(days=110), {}),  # cruza el año
+        ("day", HASTA - timedelta(days=30), {}),
+        ("hour", HASTA - timedelta(days=6), {}),
+        ("week", HASTA - timedelta(days=60), {"usuario_id": 2}),
+        ("month", HASTA - timedelta(days=150), {"usuario_id": 0}),
+        ("day", HASTA - timedelta(days=30), {"categoria": "Lácteos"}),
+        (
+            "hour",
+            HASTA - timedelta(days=6),
+            {"usuario_id": 1, "categoria": "Panadería"},
+        ),
+    ],
+)
+def test_serie_coincide_con_el_calculo_sobre_ventas(app, granularidad, desde, filtros):
+    with app.app_context():
+        ventas = _sembrar()
+        serie = obtener_serie_ventas(granularidad, desde, HASTA, **filtros)
+
+        esperado = _esperado(ventas, _claves(granularidad), **filtros)
+        periodos = serie["periodos"]
+        assert len(periodos) == len(serie["cantidad"]) == len(serie["total"])
+        assert serie["cantidad"] == [esperado[p][0] for p in periodos]
+        assert serie["total"] == pytest.approx([esperado[p][1] for p in periodos])
+        assert sum(serie["cantidad"]) > 0
+
+
+def test_extremos_se_amplian_al_periodo_completo(app):
+    with app.app_context():
+        serie = obtener_serie_ventas("month", date(2026, 1, 15), date(2026, 3, 10))
+        assert (serie["desde"], serie["hasta"]) == ("2026-01-01", "2026-03-31")
+        assert serie["periodos"] == ["2026-01", "2026-02", "2026-03"]
+        assert serie["cantidad"] == [0, 0, 0]
+
+        serie = obtener_serie_ventas("week", date(2026, 1, 1), date(2026, 1, 14))
+        assert serie["periodos"] == ["2025-12-29", "2026-01-05", "2026-01-12"]
+        assert serie["hasta"] == "2026-01-18"
+
+        serie = obtener_serie_ventas("hour", date(2026, 1, 1), date(2026, 1, 1))
+        assert len(serie["periodos"]) == 24 and serie["periodos"][-1] == "2026-01-01 23"
+
+
+def test_parametros_invalidos(app):
+    with app.app_context():
+        with pytest.raises(ValueError):
+            obtener_serie_ventas("year")
+        with pytest.raises(ValueError):
+            obtener_serie_ventas("day", date(2026, 2, 1), date(2026, 1, 1))
+        with pytest.raises(ValueError):
+            obtener_serie_ventas("hour", date(2025, 1, 1), date(2026, 1, 1))
+
+
+def test_rango_enorme_se_rechaza_sin_generar_los_periodos(app, monkeypatch):
+    import models.series as series
+
+    monkeypatch.setattr(series, "_periodos", lambda *args: pytest.fail("enumeró"))
+    with app.app_context():
+        with pytest.raises(ValueError, match="períodos"):
+            obtener_serie_ventas("hour", date(1, 1, 1), date(9999, 12, 31))
+
+
+@pytest.mark.parametrize("granularidad", ["hour", "day", "week", "month"])
+def test_cantidad_de_periodos_coincide_con_la_lista(granularidad):
+    from models.series import _cantidad_periodos, _periodos, inicio_de_periodo
+
+    for desde, hasta in [
+        (date(2026, 1, 1), date(2026, 1, 1)),
+        (date(2025, 12, 29), date(2026, 3, 1)),
+        (date(2024, 2, 29), date(2026, 2, 28)),
+    ]:
+        desde = inicio_de_periodo(desde, granularidad)
+        assert _cantidad_periodos(granularidad, desde, hasta) == len(
+            _periodos(granularidad, desde, hasta)
+        )
+
+
+def test_desde_para_periodos():
+    assert desde_para_periodos("month", date(2026, 1, 15), 6) == date(2025, 8, 1)
+    assert desde_para_periodos("week", date(2026, 1, 15), 8) == date(2025, 11, 27)
+    assert desde_para_periodos("day", date(2026, 1, 15)) == date(2025, 12, 17)
+    assert desde_para_periodos("hour", date(2026, 1, 15), 48) == date(2026, 1, 14)
+    with pytest.raises(ValueError):
+        desde_para_periodos("day", date(2026, 1, 15), 10**9)
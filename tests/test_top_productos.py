@@ -0,0 +1,169 @@
+import random
+from collections import Counter
+from datetime import date, datetime, time
+
+from models.producto import agregar_producto, obtener_productos
+from models.resumen import reconstruir_resumenes
+from models.top_productos import obtener_productos_mas_vendidos_aproximado
+from models.venta import registrar_venta
+from models_alchemy import DetalleVenta, Producto, SketchProductos, User, Venta
+from models_alchemy import db as _db
+from services.space_saving import SpaceSaving
+
+
+def _flujo_zipf(n, claves, semilla):
+    rnd = random.Random(semilla)
+    pesos = [1 / (i + 1) for i in range(claves)]
+    return rnd.choices(range(claves), weights=pesos, k=n)
+
+
+def _assert_cotas(sketch, exactos):
+    for clave, estimado, error in sketch.top(len(sketch)):
+        assert estimado - error <= exactos[clave] <= estimado
+    for clave, real in exactos.items():
+        if clave not in sketch.contadores:
+            assert real <= sketch.umbral
+
+
+def test_space_saving_acota_el_error():
+    flujo = _flujo_zipf(20_000, 1000, semilla=1)
+    sketch = SpaceSaving(capacidad=50)
+    for clave in flujo:
+        sketch.agregar(clave)
+
+    exactos = Counter(flujo)
+    assert len(sketch) == 50 and sketch.total == len(flujo)
+    _assert_cotas(sketch, exactos)
+    assert max(err for _, _, err in sketch.top(50)) <= len(flujo) / 50
+    # Con una distribución sesgada los primeros coinciden con los exactos
+    assert [c for c, _, _ in sketch.top(3)] == [c for c, _ in exactos.most_common(3)]
+
+
+def test_space_saving_fusionado_mantiene_las_cotas():
+    partes = [_flujo_zipf(5000, 500, semilla=s) for s in range(6)]
+    fusionado = SpaceSaving(capacidad=40)
+    for parte in partes:
+        sketch = SpaceSaving(capacidad=40)
+        for clave in parte:
+            sketch.agregar(clave, 2)
+        fusionado.fusionar(SpaceSaving.desde_dict(sketch.a_dict()))
+
+    exactos = Counter()
+    for parte in partes:
+        exactos.update({c: 2 * n for c, n in Counter(parte).items()})
+    assert fusionado.total == sum(exactos.values())
+    _assert_cotas(fusionado, exactos)
+    assert [c for c, _, _ in fusionado.top(3)] == [c for c, _ in exactos.most_common(3)]
+
+
+def test_sin_desbordar_los_conteos_son_exactos():
+    a, b = SpaceSaving(10), SpaceSaving(10)
+    a.agregar("pan", 3).agregar("leche")
+    b.agregar("pan").agregar("cafe", 2)
+    assert a.fusionar(b).top() == [("pan", 4, 0), ("cafe", 2, 0), ("leche", 1, 0)]
+
+
+def test_ventas_actualizan_los_resumenes_y_la_reconstruccion_coincide(app):
+    with app.app_context():
+        for i, nombre in enumerate(["Pan", "Leche", "Café"]):
+            agregar_producto(nombre, 10.0, 1000, "General", f"C{i}")
+        ids = {p["nombre"]: p["id"] for p in obtener_productos()}
+        for nombre, cantidad in [("Pan", 3), ("Leche", 1), ("Pan", 2), ("Café", 4)]:
+            assert registrar_venta([{"id": ids[nombre], "cantidad": cantidad}])[0]
+        assert registrar_venta(
+            [{"id": ids["Leche"], "cantidad": 2}, {"id": ids["Café"], "cantidad": 2}]
+        )[0]
+
+        hoy = date.today().isoformat()
+        esperado = [("Café", 6), ("Pan", 5), ("Leche", 3)]
+        for desde in (None, hoy):
+            top = obtener_productos_mas_vendidos_aproximado(top_n=3, desde=desde)
+            assert [(p["nombre"], p["cantidad_vendida"]) for p in top] == esperado
+            assert all(p["error"] == 0 for p in top)
+
+        reconstruir_resumenes()
+        top = obtener_productos_mas_vendidos_aproximado(top_n=2)
+        assert [(p["nombre"], p["cantidad_vendida"]) for p in top] == esperado[:2]
+
+
+def test_cada_usuario_actualiza_sus_resumenes_y_se_fusionan(app):
+    from sqlalchemy import select
+
+    with app.app_context():
+        _db.session.add_all(
+            [
+                User(id=1, username="ana", password="x", rol="admin"),
+                User(id=2, username="beto", password="x", rol="usuario"),
+            ]
+        )
+        _db.session.commit()
+        agregar_producto("Pan", 10.0, 1000, "General", "C0")
+        agregar_producto("Leche", 10.0, 1000, "General", "C1")
+        ids = {p["nombre"]: p["id"] for p in obtener_productos()}
+        for usuario_id, nombre, cantidad in [
+            (1, "Pan", 3),
+            (2, "Pan", 2),
+            (2, "Leche", 4),
+            (None, "Leche", 2),
+        ]:
+            assert registrar_venta(
+                [{"id": ids[nombre], "cantidad": cantidad}], usuario_id=usuario_id
+            )[0]
+
+        mes = date.today().strftime("%Y-%m")
+        usuarios = _db.session.execute(
+            select(SketchProductos.usuario_id).where(SketchProductos.periodo == mes)
+        ).scalars()
+        assert sorted(usuarios) == [0, 1, 2]
+
+        top = obtener_productos_mas_vendidos_aproximado(top_n=2)
+        assert [(p["nombre"], p["cantidad_vendida"], p["error"]) for p in top] == [
+            ("Leche", 6, 0),
+            ("Pan", 5, 0),
+        ]
+
+
+def test_ventana_combina_meses_completos_y_dias_sueltos(app):
+    with app.app_context():
+        _db.session.add_all(
+            [
+                Producto(id=1, nombre="Pan", precio=1, stock=0),
+                Producto(id=2, nombre="Leche", precio=1, stock=0),
+            ]
+        )
+        # Pan se vende en enero y febrero; Leche solo en los extremos
+        ventas = [
+            (date(2026, 1, 30), 2, 50),
+            (date(2026, 2, 10), 1, 30),
+            (date(2026, 2, 20), 1, 30),
+            (date(2026, 3, 2), 2, 40),
+            (date(2026, 3, 5), 2, 100),
+        ]
+        for i, (dia, producto_id, cantidad) in enumerate(ventas, start=1):
+            _db.session.add(
+                Venta(id=i, fecha=datetime.combine(dia, time(12)), total=cantidad)
+            )
+            _db.session.add(
+                DetalleVenta(
+                    venta_id=i,
+                    producto_id=producto_id,
+                    cantidad=cantidad,
+                    subtotal=cantidad,
+                )
+            )
+        _db.session.commit()
+        reconstruir_resumenes()
+
+        def top(desde, hasta):
+            return [
+                (p["nombre"], p["cantidad_vendida"])
+                for p in obtener_productos_mas_vendidos_aproximado(
+                    desde=desde, hasta=hasta
+                )
+            ]
+
+        assert top("2026-01-30", "2026-03-02") == [("Leche", 90), ("Pan", 60)]
+        assert top("2026-01-31", "2026-03-01") == [("Pan", 60)]
+        assert top("2026-02-01", "2026-02-28") == [("Pan", 60)]
+        assert top(None, "2026-03-31") == [("Leche", 190), ("Pan", 60)]
+        assert top("2026-04-01", None) == []
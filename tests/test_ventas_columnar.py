@@ -0,0 +1,68 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from services.ventas_columnar import VentasColumnar
+from services.ventas_service import (
+    estadisticas_del_dia,
+    estadisticas_generales,
+    usuarios_unicos,
+    ventas_por_mes,
+    ventas_por_semana,
+)
+
+
+def _ventas_aleatorias(n, semilla=7):
+    rnd = random.Random(semilla)
+    hoy = date.today()
+    ventas = []
+    for i in range(n):
+        dia = hoy - timedelta(days=rnd.randint(0, 900))
+        ventas.append(
+            {
+                "id": i + 1,
+                "fecha": f"{dia.isoformat()} {rnd.randint(0, 23):02d}:15:00",
+                "total": round(rnd.uniform(1000, 500000), 2),
+                "username": rnd.choice(["ana", "beto", "caja1", "-"]),
+            }
+        )
+    # Semanas que cruzan el año y hoy, para ejercitar los bordes
+    for dia in ("2024-12-30", "2025-01-01", "2025-12-29", "2026-01-02"):
+        ventas.append({"id": 0, "fecha": f"{dia} 10:00:00", "total": 10.0})
+    ventas.append({"id": 0, "fecha": f"{hoy.isoformat()} 09:00:00", "total": 5.0})
+    return ventas
+
+
+@pytest.mark.parametrize("n", [0, 1, 2000])
+def test_motor_columnar_equivale_al_servicio(n):
+    ventas = _ventas_aleatorias(n) if n else []
+    motor = VentasColumnar.desde_ventas(ventas)
+
+    assert motor.usuarios_unicos() == usuarios_unicos(ventas)
+    assert motor.estadisticas_del_dia() == pytest.approx(estadisticas_del_dia(ventas))
+    assert motor.estadisticas_generales() == pytest.approx(
+        estadisticas_generales(ventas)
+    )
+    for meses in (1, 6, 36):
+        esperado = ventas_por_mes(ventas, meses)
+        obtenido = motor.ventas_por_mes(meses)
+        assert [m["mes"] for m in obtenido] == [m["mes"] for m in esperado]
+        assert obtenido == [pytest.approx(m) for m in esperado]
+    for semanas in (1, 8, 120):
+        esperado = ventas_por_semana(ventas, semanas)
+        obtenido = motor.ventas_por_semana(semanas)
+        assert [s["semana"] for s in obtenido] == [s["semana"] for s in esperado]
+        assert obtenido == [pytest.approx(s) for s in esperado]
+
+
+def test_motor_columnar_ignora_fechas_invalidas():
+    ventas = [
+        {"fecha": "no-es-fecha", "total": 3.0, "username": "ana"},
+        {"fecha": f"{date.today().isoformat()} 10:00:00", "total": 7.0},
+    ]
+    motor = VentasColumnar.desde_ventas(ventas)
+
+    assert motor.estadisticas_generales()["dias_con_ventas"] == 1
+    assert motor.estadisticas_generales()["total_recaudado"] == 10.0
+    assert motor.estadisticas_del_dia()["cantidad_ventas_hoy"] == 1
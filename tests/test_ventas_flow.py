@@ -24,3 +24,126 @@ def test_registrar_venta_y_actualiza_stock(app):
         p_after = obtener_producto_por_id(pid)
         assert p_after is not None
         assert p_after["stock"] == 7
+
+
+def _contar_lecturas_productos():
+    """Cuenta los SELECT sobre ``productos`` ejecutados mientras está activo."""
+    from sqlalchemy import event
+
+    from models_alchemy import db
+
+    conteo = {"productos": 0}
+
+    def contar(conn, cursor, statement, parameters, context, executemany):
+        sql = statement.lstrip().upper()
+        if sql.startswith("SELECT") and "FROM PRODUCTOS" in sql:
+            conteo["productos"] += 1
+
+    event.listen(db.engine, "before_cursor_execute", contar)
+    return conteo, lambda: event.remove(db.engine, "before_cursor_execute", contar)
+
+
+def test_registrar_venta_consultas_no_crecen_con_el_carrito(app):
+    with app.app_context():
+        from models.producto import obtener_productos
+
+        for i in range(20):
+            agregar_producto(f"Prod {i}", 10.0 + i, 100, "Cat", f"CONS-{i:03d}")
+        ids = [p["id"] for p in obtener_productos()]
+
+        # Una venta previa para que los resúmenes del día y del mes ya existan
+        assert registrar_venta([{"id": ids[0], "cantidad": 1}])[0]
+
+        conteos = []
+        for carrito in (ids[:1], ids):
+            conteo, quitar = _contar_lecturas_productos()
+            try:
+                exito, _ = registrar_venta(
+                    [{"id": pid, "cantidad": 1} for pid in carrito]
+                )
+            finally:
+                quitar()
+            assert exito is True
+            conteos.append(conteo)
+
+        assert conteos[0]["productos"] == conteos[1]["productos"] == 1
+
+
+def test_registrar_venta_suma_lineas_repetidas_contra_stock(app):
+    with app.app_context():
+        agregar_producto("Prod Repetido", 50.0, 5, "Cat", "REP-001")
+        from models.producto import obtener_productos
+
+        pid = obtener_productos()[0]["id"]
+
+        items = [{"id": pid, "cantidad": 3}, {"id": pid, "cantidad": 3}]
+        exito, mensaje = registrar_venta(items)
+        assert exito is False
+        assert "Stock insuficiente" in mensaje
+        assert obtener_producto_por_id(pid)["stock"] == 5
+
+        items = [{"id": pid, "cantidad": 2}, {"id": pid, "cantidad": 3}]
+        exito, _ = registrar_venta(items)
+        assert exito is True
+        assert obtener_producto_por_id(pid)["stock"] == 0
+
+
+def test_registrar_venta_inserta_detalles_en_una_sentencia(app):
+    from sqlalchemy import event, func, select
+
+    from models_alchemy import DetalleVenta, Venta, db
+
+    with app.app_context():
+        from models.producto import obtener_productos
+
+        for i in range(50):
+            agregar_producto(f"Mayorista {i}", 5.0, 100, "Cat", f"MAY-{i:03d}")
+        ids = [p["id"] for p in obtener_productos()]
+
+        inserts = []
+
+        def capturar(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("INSERT INTO DETALLE_VENTAS"):
+                inserts.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", capturar)
+        try:
+            exito, _ = registrar_venta([{"id": pid, "cantidad": 2} for pid in ids])
+        finally:
+            event.remove(db.engine, "before_cursor_execute", capturar)
+
+        assert exito is True
+        assert len(inserts) == 1
+        venta = db.session.execute(select(Venta)).scalar_one()
+        assert venta.total == 500.0
+        cantidad, suma = db.session.execute(
+            select(func.count(DetalleVenta.id), func.sum(DetalleVenta.subtotal)).where(
+                DetalleVenta.venta_id == venta.id
+            )
+        ).one()
+        assert (cantidad, suma) == (50, 500.0)
+
+
+def test_registrar_venta_falla_sin_dejar_cabecera_ni_detalles(app, monkeypatch):
+    from sqlalchemy import func, select
+
+    import models.venta as modulo_venta
+    from models_alchemy import DetalleVenta, Venta, db
+
+    with app.app_context():
+        agregar_producto("Atómico", 10.0, 10, "Cat", "ATO-001")
+        from models.producto import obtener_productos
+
+        pid = obtener_productos()[0]["id"]
+
+        def fallar(*args, **kwargs):
+            raise RuntimeError("falla después de insertar los detalles")
+
+        monkeypatch.setattr(modulo_venta, "acumular_venta_diaria", fallar)
+        exito, mensaje = registrar_venta([{"id": pid, "cantidad": 4}])
+
+        assert exito is False
+        assert "falla" in mensaje
+        assert db.session.execute(select(func.count(Venta.id))).scalar_one() == 0
+        assert db.session.execute(select(func.count(DetalleVenta.id))).scalar_one() == 0
+        assert obtener_producto_por_id(pid)["stock"] == 10